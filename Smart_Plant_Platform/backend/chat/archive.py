@@ -0,0 +1,190 @@
+import gzip
+import json
+import os
+from itertools import islice
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ChatMessage, Conversation
+
+
+def message_record(message):
+    return {
+        "id": message.id,
+        "content": message.content,
+        # isoformat keeps microseconds, which DjangoJSONEncoder would drop
+        "timestamp": message.timestamp.isoformat(),
+        "is_bot": message.is_bot,
+        "metadata": message.metadata,
+    }
+
+
+def segment_path(conversation):
+    return Path(str(conversation.user_id)) / f"{conversation.id}.jsonl.gz"
+
+
+def archive_conversation(conversation, batch_size=2000):
+    """
+    Move a conversation's messages into a compressed JSONL segment and leave
+    only the conversation row, with its summary fields, in the live tables.
+
+    The segment is written first. Then, with the conversation row locked,
+    ``updated_at`` is checked against the value seen before writing: a
+    message posted in between bumps it, and the conversation is left alone.
+    Only the messages that went into the segment are deleted. Returns
+    whether the conversation was archived.
+    """
+    seen_updated_at = (
+        Conversation.objects.filter(pk=conversation.pk)
+        .values_list("updated_at", flat=True)
+        .first()
+    )
+    relative_path = segment_path(conversation)
+    path = Path(settings.CHAT_ARCHIVE_ROOT) / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+
+    messages = conversation.messages.order_by("timestamp", "id").iterator(
+        chunk_size=batch_size
+    )
+    archived_ids = []
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as segment:
+        for message in messages:
+            segment.write(json.dumps(message_record(message), cls=DjangoJSONEncoder))
+            segment.write("\n")
+            archived_ids.append(message.id)
+
+    try:
+        with transaction.atomic():
+            locked = (
+                Conversation.objects.select_for_update()
+                .filter(pk=conversation.pk)
+                .values_list("updated_at", "archived_at")
+                .first()
+            )
+            if locked is None or locked != (seen_updated_at, None):
+                tmp_path.unlink(missing_ok=True)
+                return False
+
+            os.replace(tmp_path, path)
+            for start in range(0, len(archived_ids), batch_size):
+                ChatMessage.objects.filter(
+                    id__in=archived_ids[start : start + batch_size]
+                ).delete()
+            # update() leaves updated_at alone, so the conversation keeps
+            # its place in the last-activity ordering
+            Conversation.objects.filter(pk=conversation.pk).update(
+                archived_at=timezone.now(), archive_path=str(relative_path)
+            )
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return True
+
+
+def export_lines(user, batch_size=2000):
+    """
+    Yield a user's chat history as JSON lines: each conversation followed by
+    its messages. Live messages are streamed from a single ordered query and
+    archived ones straight from their segment, so memory use stays flat.
+    """
+    encoder = DjangoJSONEncoder()
+    conversations = Conversation.objects.filter(user=user).order_by("id")
+    live_messages = iter(
+        ChatMessage.objects.filter(conversation__user=user)
+        .order_by("conversation_id", "timestamp", "id")
+        .iterator(chunk_size=batch_size)
+    )
+    pending = next(live_messages, None)
+
+    for conversation in conversations.iterator(chunk_size=batch_size):
+        yield encoder.encode(
+            {
+                "type": "conversation",
+                "id": conversation.id,
+                "title": conversation.title,
+                "created_at": conversation.created_at,
+                "updated_at": conversation.updated_at,
+                "message_count": conversation.message_count,
+            }
+        ) + "\n"
+
+        if conversation.archived_at is not None:
+            for message in iter_archived_messages(conversation):
+                yield export_line(encoder, message)
+        else:
+            while pending is not None and pending.conversation_id == conversation.id:
+                yield export_line(encoder, pending)
+                pending = next(live_messages, None)
+
+
+async def stream_export(user, batch_size=2000, lines_per_chunk=500):
+    """
+    export_lines as an async iterator, for StreamingHttpResponse under ASGI.
+
+    Django buffers a sync iterator completely before sending it from an
+    async server. Here each chunk of lines is read in the sync thread, which
+    keeps the chunked queries on the one connection, and is sent before the
+    next is read.
+    """
+    lines = export_lines(user, batch_size)
+    read_chunk = sync_to_async(lambda: "".join(islice(lines, lines_per_chunk)))
+    while chunk := await read_chunk():
+        yield chunk
+
+
+def export_line(encoder, message):
+    record = {"type": "message", "conversation_id": message.conversation_id}
+    return encoder.encode(record | message_record(message)) + "\n"
+
+
+def iter_archived_messages(conversation):
+    """Stream ChatMessage instances back out of a conversation's segment."""
+    path = Path(settings.CHAT_ARCHIVE_ROOT) / conversation.archive_path
+    with gzip.open(path, "rt", encoding="utf-8") as segment:
+        for line in segment:
+            record = json.loads(line)
+            record["timestamp"] = parse_datetime(record["timestamp"])
+            yield ChatMessage(conversation_id=conversation.id, **record)
+
+
+def rehydrate_conversation(conversation, batch_size=2000):
+    """Restore an archived conversation's messages into the live table."""
+    with transaction.atomic():
+        conversation = Conversation.objects.select_for_update().get(
+            pk=conversation.pk
+        )
+        if conversation.archived_at is None:
+            return conversation
+
+        # bulk_create skips ChatMessage.save, so the summary fields that the
+        # stub kept are not counted twice.
+        batch = []
+        for message in iter_archived_messages(conversation):
+            batch.append(message)
+            if len(batch) >= batch_size:
+                ChatMessage.objects.bulk_create(batch)
+                batch = []
+        ChatMessage.objects.bulk_create(batch)
+
+        archive_path = conversation.archive_path
+        conversation.archived_at = None
+        conversation.archive_path = ""
+        # Touching updated_at keeps the next sweep from archiving it again
+        conversation.save(update_fields=["archived_at", "archive_path", "updated_at"])
+
+    transaction.on_commit(lambda: delete_segment(archive_path), robust=True)
+    return conversation
+
+
+def delete_segment(archive_path):
+    if not archive_path:
+        return
+    path = Path(settings.CHAT_ARCHIVE_ROOT) / archive_path
+    path.unlink(missing_ok=True)
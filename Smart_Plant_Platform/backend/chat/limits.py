@@ -0,0 +1,79 @@
+import asyncio
+import weakref
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+
+
+class ChatCapacityError(Exception):
+    """Raised when a generation cannot be admitted under the in-flight caps."""
+
+    def __init__(self, message, status_code, retry_after):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class InFlightLimiter:
+    """
+    Caps concurrent LLM generations per event loop, globally and per user.
+
+    A user already at their cap is rejected straight away. Otherwise the
+    request waits up to ``queue_timeout`` seconds for a global slot before
+    it is turned away, so a saturated worker sheds load instead of piling
+    up requests that will time out anyway.
+    """
+
+    def __init__(self, max_inflight, max_per_user, queue_timeout):
+        self.max_per_user = max_per_user
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_inflight)
+        self._per_user = defaultdict(int)
+
+    @asynccontextmanager
+    async def slot(self, user_id):
+        if self._per_user[user_id] >= self.max_per_user:
+            raise ChatCapacityError(
+                "Too many messages in progress, wait for the current reply",
+                status_code=429,
+                retry_after=1,
+            )
+
+        # Queued requests count against the user too, so one user cannot
+        # fill the global queue on their own.
+        self._per_user[user_id] += 1
+        try:
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise ChatCapacityError(
+                    "Chat is busy, please try again shortly",
+                    status_code=503,
+                    retry_after=int(self.queue_timeout) or 1,
+                )
+            try:
+                yield
+            finally:
+                self._slots.release()
+        finally:
+            self._per_user[user_id] -= 1
+            if not self._per_user[user_id]:
+                del self._per_user[user_id]
+
+
+_limiters = weakref.WeakKeyDictionary()
+
+
+def get_limiter():
+    """Return the limiter bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    limiter = _limiters.get(loop)
+    if limiter is None:
+        limiter = InFlightLimiter(
+            max_inflight=settings.CHAT_MAX_INFLIGHT,
+            max_per_user=settings.CHAT_MAX_INFLIGHT_PER_USER,
+            queue_timeout=settings.CHAT_QUEUE_TIMEOUT,
+        )
+        _limiters[loop] = limiter
+    return limiter
@@ -0,0 +1,57 @@
+import os
+
+import httpx
+from django.conf import settings
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI
+
+SYSTEM_PROMPT = """You are a plant care expert AI assistant. Your responses should be:
+1. Clear and well-structured using markdown formatting
+2. Use bullet points or numbered lists for steps
+3. Use headings (##) for different sections
+4. Use **bold** for important terms
+5. Include relevant emojis where appropriate (🌱, 🪴, 💧, ☀️, etc.)
+6. Keep responses concise but informative
+
+Remember to focus on plant care, gardening, and botanical topics."""
+
+CHAT_TEMPERATURE = 0.7
+
+
+def build_chain(history, model, timeout=None):
+    """
+    Build the prompt | llm | parser chain for a conversation.
+
+    ``history`` is an iterable of ChatMessage rows. They are passed to the
+    prompt as message objects rather than templates, so braces in earlier
+    messages are not treated as template variables. Retries are left to
+    chat.resilience, so the client itself never retries.
+    """
+    llm = ChatOpenAI(
+        model=model,
+        openai_api_base="https://openrouter.ai/api/v1",
+        openai_api_key=os.getenv("OPENROUTER_API_KEY"),
+        temperature=CHAT_TEMPERATURE,
+        timeout=httpx.Timeout(
+            timeout or settings.CHAT_LLM_TOTAL_TIMEOUT,
+            connect=settings.CHAT_LLM_CONNECT_TIMEOUT,
+        ),
+        max_retries=0,
+    )
+
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", SYSTEM_PROMPT),
+            *[
+                AIMessage(content=msg.content)
+                if msg.is_bot
+                else HumanMessage(content=msg.content)
+                for msg in history
+            ],
+            ("human", "{input}"),
+        ]
+    )
+
+    return prompt | llm | StrOutputParser()
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from chat.archive import archive_conversation
+from chat.models import Conversation
+
+
+class Command(BaseCommand):
+    help = "Move conversations idle for more than N days into compressed segments"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.CHAT_ARCHIVE_AFTER_DAYS,
+            help="Archive conversations not updated for this many days",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=None,
+            help="Stop after archiving this many conversations",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        idle = Conversation.objects.filter(
+            archived_at__isnull=True, updated_at__lt=cutoff, message_count__gt=0
+        ).order_by("id")
+        if options["limit"]:
+            idle = idle[: options["limit"]]
+
+        archived = 0
+        for conversation in idle.iterator(chunk_size=100):
+            # Skipped if a message arrives while its segment is written
+            archived += archive_conversation(conversation)
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} conversations"))
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+
+from chat.models import ChatMessage, Conversation
+
+
+class Command(BaseCommand):
+    help = "Populate the denormalized message summary on existing conversations"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of conversations updated per transaction",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_message = ChatMessage.objects.filter(
+            conversation=OuterRef("pk")
+        ).order_by("-timestamp", "-id")
+
+        updated = 0
+        last_id = 0
+        while True:
+            batch = list(
+                Conversation.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .annotate(
+                    total_messages=Count("messages"),
+                    last_message_id=Subquery(last_message.values("id")[:1]),
+                )[:batch_size]
+            )
+            if not batch:
+                break
+
+            last_messages = ChatMessage.objects.in_bulk(
+                [c.last_message_id for c in batch if c.last_message_id]
+            )
+            for conversation in batch:
+                message = last_messages.get(conversation.last_message_id)
+                conversation.message_count = conversation.total_messages
+                conversation.last_message_at = message.timestamp if message else None
+                conversation.last_message_preview = (
+                    message.content[: Conversation.PREVIEW_LENGTH] if message else ""
+                )
+                conversation.last_message_is_bot = message.is_bot if message else False
+
+            with transaction.atomic():
+                Conversation.objects.bulk_update(
+                    batch,
+                    [
+                        "message_count",
+                        "last_message_at",
+                        "last_message_preview",
+                        "last_message_is_bot",
+                    ],
+                )
+
+            updated += len(batch)
+            last_id = batch[-1].id
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Backfilled {updated} conversation summaries")
+        )
@@ -0,0 +1,75 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE chat_chatmessage_fts USING fts5(
+        content,
+        content='chat_chatmessage',
+        content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER chat_chatmessage_fts_insert AFTER INSERT ON chat_chatmessage
+    BEGIN
+        INSERT INTO chat_chatmessage_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER chat_chatmessage_fts_delete AFTER DELETE ON chat_chatmessage
+    BEGIN
+        INSERT INTO chat_chatmessage_fts(chat_chatmessage_fts, rowid, content)
+        VALUES ('delete', old.id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER chat_chatmessage_fts_update AFTER UPDATE OF content ON chat_chatmessage
+    BEGIN
+        INSERT INTO chat_chatmessage_fts(chat_chatmessage_fts, rowid, content)
+        VALUES ('delete', old.id, old.content);
+        INSERT INTO chat_chatmessage_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    "INSERT INTO chat_chatmessage_fts(chat_chatmessage_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS chat_chatmessage_fts_update",
+    "DROP TRIGGER IF EXISTS chat_chatmessage_fts_delete",
+    "DROP TRIGGER IF EXISTS chat_chatmessage_fts_insert",
+    "DROP TABLE IF EXISTS chat_chatmessage_fts",
+]
+
+POSTGRES_FORWARD = [
+    """
+    CREATE INDEX chat_chatmessage_content_fts
+    ON chat_chatmessage USING GIN (to_tsvector('english', content))
+    """,
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS chat_chatmessage_content_fts",
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        vendor_statements = statements.get(schema_editor.connection.vendor, [])
+        for statement in vendor_statements:
+            schema_editor.execute(statement)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0004_chatmessage_chat_message_history_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}),
+            run({"sqlite": SQLITE_REVERSE, "postgresql": POSTGRES_REVERSE}),
+        ),
+    ]
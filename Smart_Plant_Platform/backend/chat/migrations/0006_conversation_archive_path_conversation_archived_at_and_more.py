@@ -0,0 +1,69 @@
+# Generated by Django 5.1.6 on 2026-10-19 14:18
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# SQLite alters chatmessage.timestamp by rebuilding chat_chatmessage, which
+# drops the search index triggers from 0005_chatmessage_fulltext_index; put
+# them back afterwards.
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_chatmessage_fts_insert
+    AFTER INSERT ON chat_chatmessage
+    BEGIN
+        INSERT INTO chat_chatmessage_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_chatmessage_fts_delete
+    AFTER DELETE ON chat_chatmessage
+    BEGIN
+        INSERT INTO chat_chatmessage_fts(chat_chatmessage_fts, rowid, content)
+        VALUES ('delete', old.id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_chatmessage_fts_update
+    AFTER UPDATE OF content ON chat_chatmessage
+    BEGIN
+        INSERT INTO chat_chatmessage_fts(chat_chatmessage_fts, rowid, content)
+        VALUES ('delete', old.id, old.content);
+        INSERT INTO chat_chatmessage_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    "INSERT INTO chat_chatmessage_fts(chat_chatmessage_fts) VALUES ('rebuild')",
+]
+
+
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in SQLITE_TRIGGERS:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0005_chatmessage_fulltext_index'),
+    ]
+
+    operations = [
+        # Reversing rebuilds the table again, so restore the triggers then too
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='conversation',
+            name='archive_path',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.6 on 2026-10-19 15:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0006_conversation_archive_path_conversation_archived_at_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="conversation",
+            index=models.Index(
+                fields=["user", "updated_at", "id"], name="chat_conv_user_active_idx"
+            ),
+        ),
+    ]
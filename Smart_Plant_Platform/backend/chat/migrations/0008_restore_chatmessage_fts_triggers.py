@@ -0,0 +1,20 @@
+from importlib import import_module
+
+from django.db import migrations
+
+# Databases that ran 0006 before it restored the search triggers are still
+# missing them; the statements are idempotent, so this is a no-op elsewhere.
+restore_search_triggers = import_module(
+    "chat.migrations.0006_conversation_archive_path_conversation_archived_at_and_more"
+).restore_search_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0007_conversation_chat_conv_user_active_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -10,8 +12,25 @@ class Conversation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalized summary of the message stream, maintained by ChatMessage.save
+    message_count = models.PositiveIntegerField(default=0)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=255, blank=True)
+    last_message_is_bot = models.BooleanField(default=False)
+
+    # Set once the messages have been moved to a cold-storage segment
+    archived_at = models.DateTimeField(null=True, blank=True)
+    archive_path = models.CharField(max_length=255, blank=True)
+
+    PREVIEW_LENGTH = 255
+
     class Meta:
         ordering = ["-updated_at"]
+        indexes = [
+            models.Index(
+                fields=["user", "updated_at", "id"], name="chat_conv_user_active_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.title}"
@@ -22,7 +41,8 @@ class ChatMessage(models.Model):
         Conversation, on_delete=models.CASCADE, related_name="messages"
     )
     content = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add, so archived messages keep their original timestamps
+    timestamp = models.DateTimeField(default=timezone.now)
     is_bot = models.BooleanField(default=False)
     metadata = models.JSONField(
         null=True, blank=True
@@ -30,6 +50,26 @@ class ChatMessage(models.Model):
 
     class Meta:
         ordering = ["timestamp"]
+        indexes = [
+            models.Index(
+                fields=["conversation", "timestamp", "id"],
+                name="chat_message_history_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.conversation.title} - {'Bot' if self.is_bot else 'User'} Message"
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                # Keep the conversation summary in step with the message stream
+                Conversation.objects.filter(pk=self.conversation_id).update(
+                    message_count=F("message_count") + 1,
+                    last_message_at=self.timestamp,
+                    last_message_preview=self.content[: Conversation.PREVIEW_LENGTH],
+                    last_message_is_bot=self.is_bot,
+                    updated_at=timezone.now(),
+                )
@@ -0,0 +1,100 @@
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class MessageKeysetPagination(BasePagination):
+    """
+    Keyset pagination over a conversation's messages, ordered by (timestamp, id).
+
+    Without parameters the newest page is returned. ``before=<message id>``
+    walks back through older history ("load older") and ``after=<message id>``
+    returns only messages newer than the one the client already has, for
+    incremental refresh. Each page is returned oldest first.
+    """
+
+    default_limit = 50
+    max_limit = 200
+    limit_query_param = "limit"
+    before_query_param = "before"
+    after_query_param = "after"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        before = request.query_params.get(self.before_query_param)
+        after = request.query_params.get(self.after_query_param)
+        self.after = after
+        if before and after:
+            raise ValidationError("Use either 'before' or 'after', not both.")
+
+        if after:
+            anchor = self.get_anchor(queryset, after)
+            rows = list(
+                queryset.filter(
+                    Q(timestamp__gt=anchor.timestamp)
+                    | Q(timestamp=anchor.timestamp, id__gt=anchor.id)
+                ).order_by("timestamp", "id")[: self.limit + 1]
+            )
+            self.has_newer = len(rows) > self.limit
+            self.has_older = True
+            page = rows[: self.limit]
+        else:
+            if before:
+                anchor = self.get_anchor(queryset, before)
+                queryset = queryset.filter(
+                    Q(timestamp__lt=anchor.timestamp)
+                    | Q(timestamp=anchor.timestamp, id__lt=anchor.id)
+                )
+            rows = list(queryset.order_by("-timestamp", "-id")[: self.limit + 1])
+            self.has_older = len(rows) > self.limit
+            self.has_newer = bool(before)
+            page = rows[: self.limit][::-1]
+
+        self.page = page
+        return page
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def get_anchor(self, queryset, message_id):
+        try:
+            return queryset.only("id", "timestamp").get(id=message_id)
+        except (queryset.model.DoesNotExist, ValueError):
+            raise NotFound("Message not found.")
+
+    def get_link(self, param, message_id):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.before_query_param)
+        url = remove_query_param(url, self.after_query_param)
+        return replace_query_param(url, param, message_id)
+
+    def get_previous_link(self):
+        if not self.has_older or not self.page:
+            return None
+        return self.get_link(self.before_query_param, self.page[0].id)
+
+    def get_next_link(self):
+        # Always hand back a refresh cursor, even once the client is at the head
+        if self.page:
+            return self.get_link(self.after_query_param, self.page[-1].id)
+        if self.after:
+            return self.get_link(self.after_query_param, self.after)
+        return None
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "previous": self.get_previous_link(),
+                "next": self.get_next_link(),
+                "has_older": self.has_older,
+                "has_newer": self.has_newer,
+                "results": data,
+            }
+        )
@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+
+import openai
+from django.conf import settings
+
+from .llm import build_chain
+
+logger = logging.getLogger("chat")
+
+
+class LLMUnavailableError(Exception):
+    """Every model in the chain failed or is behind an open circuit."""
+
+
+class EmptyReplyError(Exception):
+    """The model closed the stream without producing any tokens."""
+
+
+class AttemptTimeoutError(Exception):
+    """The models of one attempt didn't finish within CHAT_LLM_ATTEMPT_TIMEOUT."""
+
+
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    EmptyReplyError,
+    AttemptTimeoutError,
+)
+
+
+class CircuitBreaker:
+    """
+    Per-model breaker: opens after ``threshold`` consecutive failures and
+    half-opens once ``cooldown`` seconds have passed. A failure while
+    half-open re-opens it straight away; a success closes it.
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        return time.monotonic() - self.opened_at >= self.cooldown
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+_breakers = {}
+
+
+def get_breaker(model):
+    breaker = _breakers.get(model)
+    if breaker is None:
+        breaker = _breakers[model] = CircuitBreaker(
+            settings.CHAT_LLM_BREAKER_THRESHOLD, settings.CHAT_LLM_BREAKER_COOLDOWN
+        )
+    return breaker
+
+
+@dataclass
+class Reply:
+    content: str
+    model: str
+    attempts: int
+    hedged: bool
+
+
+async def start_stream(history, message, model, timeout):
+    """Open a streaming generation and wait for its first token."""
+    chain = build_chain(history, model, timeout=timeout)
+    stream = chain.astream({"input": message})
+    try:
+        first = await stream.__anext__()
+    except StopAsyncIteration:
+        raise EmptyReplyError(f"{model} returned an empty reply")
+    except BaseException:
+        await stream.aclose()
+        raise
+    return model, first, stream
+
+
+async def first_token(history, message, models, timeout):
+    """
+    Race the models for the first token.
+
+    The primary starts immediately. If it hasn't produced a token within
+    CHAT_LLM_HEDGE_AFTER_MS, or fails outright, the next model is started
+    as well and whichever answers first wins; the loser is cancelled.
+    Models still silent after ``timeout`` seconds are cancelled, counted as
+    failures and AttemptTimeoutError is raised.
+    Returns ``(model, first_chunk, stream), hedged``.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    hedge_after = settings.CHAT_LLM_HEDGE_AFTER_MS / 1000
+    backups = list(models[1:]) if hedge_after else []
+    pending = {}
+    launched = []
+    winner = None
+    last_error = None
+
+    def launch(model):
+        task = asyncio.create_task(start_stream(history, message, model, timeout))
+        pending[task] = model
+        launched.append(model)
+
+    launch(models[0])
+    try:
+        while pending:
+            left = max(deadline - loop.time(), 0)
+            done, _ = await asyncio.wait(
+                pending,
+                timeout=min(hedge_after, left) if backups else left,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                model = pending.pop(task)
+                if task.exception() is None and winner is None:
+                    winner = task
+                elif task.exception() is not None:
+                    get_breaker(model).record_failure()
+                    last_error = task.exception()
+                else:
+                    # Lost a photo finish; release its open stream
+                    asyncio.ensure_future(task.result()[2].aclose())
+            if winner is not None:
+                return winner.result(), len(launched) > 1
+            if loop.time() >= deadline:
+                if not pending:
+                    break
+                # A hung model fails like any other, so its breaker can open
+                for model in pending.values():
+                    get_breaker(model).record_failure()
+                raise AttemptTimeoutError(
+                    f"No reply from {', '.join(pending.values())} in {timeout:.1f}s"
+                )
+            if backups and (not done or not pending):
+                logger.info("Hedging chat request to %s", backups[0])
+                launch(backups.pop(0))
+    finally:
+        for task in pending:
+            task.cancel()
+    raise last_error
+
+
+async def complete(history, message, models, timeout):
+    """
+    Run one attempt: race for the first token, then read the rest of the
+    winner's stream, all within ``timeout`` seconds.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    (model, first, stream), hedged = await first_token(
+        history, message, models, timeout
+    )
+    chunks = [first]
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(
+                    stream.__anext__(), deadline - loop.time()
+                )
+            except StopAsyncIteration:
+                break
+            chunks.append(chunk)
+    except asyncio.TimeoutError:
+        get_breaker(model).record_failure()
+        raise AttemptTimeoutError(f"{model} stalled mid-reply") from None
+    except Exception:
+        get_breaker(model).record_failure()
+        raise
+    get_breaker(model).record_success()
+    return "".join(chunks), model, hedged
+
+
+async def generate_reply(history, message):
+    """
+    Generate a reply with timeouts, jittered retries, per-model circuit
+    breakers and optional hedging across CHAT_LLM_MODELS. Each attempt gets
+    at most CHAT_LLM_ATTEMPT_TIMEOUT of the budget, so a hung model costs
+    one attempt and the retry moves on to the next model.
+
+    Raises asyncio.TimeoutError once CHAT_LLM_TOTAL_TIMEOUT is spent and
+    LLMUnavailableError when no model could answer.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.CHAT_LLM_TOTAL_TIMEOUT
+    last_error = None
+
+    for attempt in range(settings.CHAT_LLM_RETRIES + 1):
+        models = [m for m in settings.CHAT_LLM_MODELS if get_breaker(m).allow()]
+        if not models:
+            break
+        # Walk the fallback chain on each retry
+        offset = attempt % len(models)
+        models = models[offset:] + models[:offset]
+
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            raise asyncio.TimeoutError()
+        timeout = min(settings.CHAT_LLM_ATTEMPT_TIMEOUT, remaining)
+        try:
+            content, model, hedged = await complete(history, message, models, timeout)
+            return Reply(content, model, attempt + 1, hedged)
+        except RETRYABLE_ERRORS as e:
+            last_error = e
+            logger.warning("Chat LLM attempt %s failed: %s", attempt + 1, e)
+
+        # Full jitter keeps retrying clients from stampeding in lockstep
+        backoff = random.uniform(0, settings.CHAT_LLM_BACKOFF * 2**attempt)
+        if loop.time() + backoff >= deadline:
+            raise asyncio.TimeoutError()
+        await asyncio.sleep(backoff)
+
+    raise LLMUnavailableError(
+        f"No chat model available: {last_error}"
+        if last_error
+        else "No chat model available"
+    )
@@ -0,0 +1,102 @@
+import re
+
+from django.db import connection
+
+from .models import ChatMessage
+
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+
+SQLITE_SEARCH = """
+    SELECT m.id,
+           snippet(chat_chatmessage_fts, 0, %s, %s, '…', 16),
+           -bm25(chat_chatmessage_fts) AS rank
+    FROM chat_chatmessage_fts
+    JOIN chat_chatmessage m ON m.id = chat_chatmessage_fts.rowid
+    JOIN chat_conversation c ON c.id = m.conversation_id
+    WHERE chat_chatmessage_fts MATCH %s AND c.user_id = %s
+    ORDER BY rank DESC
+    LIMIT %s
+"""
+
+# The to_tsvector expression must match the GIN index in migration 0005
+POSTGRES_SEARCH = """
+    SELECT m.id,
+           ts_headline('english', m.content, q,
+                       'MaxFragments=1, MaxWords=24, MinWords=8, '
+                       'StartSel=' || %s || ', StopSel=' || %s),
+           ts_rank(to_tsvector('english', m.content), q) AS rank
+    FROM chat_chatmessage m
+    JOIN chat_conversation c ON c.id = m.conversation_id,
+         websearch_to_tsquery('english', %s) q
+    WHERE to_tsvector('english', m.content) @@ q AND c.user_id = %s
+    ORDER BY rank DESC
+    LIMIT %s
+"""
+
+
+def fts5_query(query):
+    """Quote each term so user input can't inject FTS5 query syntax."""
+    terms = re.findall(r"\w+", query)
+    return " ".join('"%s"' % term for term in terms)
+
+
+def search_messages(user, query, limit=20):
+    """
+    Ranked full-text search over the user's chat messages.
+
+    Uses the FTS5 table on SQLite and the tsvector GIN index on Postgres,
+    both created by migration 0005 and kept in sync as messages are written.
+    """
+    vendor = connection.vendor
+    if vendor == "sqlite":
+        match = fts5_query(query)
+        if not match:
+            return []
+        sql = SQLITE_SEARCH
+        params = [SNIPPET_START, SNIPPET_END, match, user.pk, limit]
+    elif vendor == "postgresql":
+        sql = POSTGRES_SEARCH
+        params = [SNIPPET_START, SNIPPET_END, query, user.pk, limit]
+    else:
+        return fallback_search(user, query, limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    messages = ChatMessage.objects.select_related("conversation").in_bulk(
+        [message_id for message_id, _, _ in rows]
+    )
+    return [
+        serialize_hit(messages[message_id], snippet, rank)
+        for message_id, snippet, rank in rows
+        if message_id in messages
+    ]
+
+
+def serialize_hit(message, snippet, rank):
+    return {
+        "message_id": message.id,
+        "conversation_id": message.conversation_id,
+        "conversation_title": message.conversation.title,
+        "timestamp": message.timestamp,
+        "is_bot": message.is_bot,
+        "snippet": snippet,
+        "rank": rank,
+    }
+
+
+def fallback_search(user, query, limit):
+    # Unindexed scan for backends without a full-text index; fine for
+    # development databases only.
+    messages = (
+        ChatMessage.objects.filter(
+            conversation__user=user, content__icontains=query
+        )
+        .select_related("conversation")
+        .order_by("-timestamp")[:limit]
+    )
+    return [
+        serialize_hit(message, message.content[:200], None) for message in messages
+    ]
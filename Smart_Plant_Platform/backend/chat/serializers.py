@@ -11,7 +11,6 @@ class ChatMessageSerializer(serializers.ModelSerializer):
 
 class ConversationSerializer(serializers.ModelSerializer):
     last_message = serializers.SerializerMethodField()
-    message_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Conversation
@@ -23,13 +22,24 @@ class ConversationSerializer(serializers.ModelSerializer):
             "last_message",
             "message_count",
         ]
-        read_only_fields = ["id", "created_at", "updated_at"]
+        read_only_fields = ["id", "created_at", "updated_at", "message_count"]
 
     def get_last_message(self, obj):
-        last_message = obj.messages.last()
-        if last_message:
-            return ChatMessageSerializer(last_message).data
-        return None
-
-    def get_message_count(self, obj):
-        return obj.messages.count()
+        if obj.last_message_at is None:
+            return None
+        # ConversationViewSet prefetches it for the whole page in one query
+        latest = getattr(obj, "latest_messages", None)
+        if latest is None:
+            latest = obj.messages.order_by("-timestamp", "-id")[:1]
+        if latest:
+            return ChatMessageSerializer(latest[0]).data
+        # Archived, so only the summary on the conversation is left
+        return {
+            "id": None,
+            "content": obj.last_message_preview,
+            "timestamp": serializers.DateTimeField().to_representation(
+                obj.last_message_at
+            ),
+            "is_bot": obj.last_message_is_bot,
+            "metadata": None,
+        }
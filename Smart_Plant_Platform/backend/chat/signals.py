@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .archive import delete_segment
+from .models import Conversation
+
+
+@receiver(post_delete, sender=Conversation)
+def remove_archive_segment(sender, instance, **kwargs):
+    if instance.archive_path:
+        archive_path = instance.archive_path
+        transaction.on_commit(lambda: delete_segment(archive_path), robust=True)
@@ -1,3 +1,360 @@
-from django.test import TestCase
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import archive, resilience
+from .limits import ChatCapacityError, InFlightLimiter
+from .models import ChatMessage, Conversation
+from .serializers import ChatMessageSerializer
+
+User = get_user_model()
+
+
+def make_conversation(name, title="Ferns"):
+    user = User.objects.create_user(
+        email=f"{name}@example.com", username=name, password=None, is_active=True
+    )
+    return Conversation.objects.create(user=user, title=title)
+
+
+class MessageSearchTests(TestCase):
+    def setUp(self):
+        self.conversation = make_conversation("ada")
+        self.client = APIClient()
+        self.client.force_authenticate(self.conversation.user)
+
+    def search(self, query):
+        return self.client.get("/chat/search/", {"q": query}).json()["results"]
+
+    def test_finds_message_posted_after_migrating(self):
+        message = ChatMessage.objects.create(
+            conversation=self.conversation, content="My fiddle leaf fig is drooping"
+        )
+
+        hits = self.search("drooping")
+
+        self.assertEqual([hit["message_id"] for hit in hits], [message.id])
+
+    def test_edited_message_is_reindexed(self):
+        message = ChatMessage.objects.create(
+            conversation=self.conversation, content="Repotting the monstera"
+        )
+        message.content = "Pruning the monstera"
+        message.save()
+
+        self.assertEqual(self.search("repotting"), [])
+        self.assertEqual(len(self.search("pruning")), 1)
+
+    def test_other_users_messages_are_not_searched(self):
+        other = make_conversation("grace")
+        ChatMessage.objects.create(conversation=other, content="Drooping leaves")
+
+        self.assertEqual(self.search("drooping"), [])
+
+
+class ConversationListTests(TestCase):
+    def setUp(self):
+        self.conversation = make_conversation("ada")
+        self.client = APIClient()
+        self.client.force_authenticate(self.conversation.user)
+
+    def test_lists_last_message_in_constant_queries(self):
+        for n in range(4):
+            conversation = Conversation.objects.create(
+                user=self.conversation.user, title=f"Plant {n}"
+            )
+            for content in ("Hello", f"Water plant {n} weekly"):
+                last = ChatMessage.objects.create(
+                    conversation=conversation,
+                    content=content,
+                    is_bot=True,
+                    metadata={"n": n},
+                )
+
+        # The page, then the last message of every conversation on it
+        with self.assertNumQueries(2):
+            results = self.client.get("/chat/conversations/").json()["results"]
+
+        self.assertEqual(results[0]["last_message"], ChatMessageSerializer(last).data)
+        self.assertEqual(
+            [r["last_message"] and r["last_message"]["content"] for r in results],
+            [f"Water plant {n} weekly" for n in (3, 2, 1, 0)] + [None],
+        )
+
+
+class MessagePaginationTests(TestCase):
+    def setUp(self):
+        self.conversation = make_conversation("ada")
+        for n in range(7):
+            ChatMessage.objects.create(conversation=self.conversation, content=f"{n}")
+        self.ids = list(
+            self.conversation.messages.order_by("timestamp", "id").values_list(
+                "id", flat=True
+            )
+        )
+        self.url = f"/chat/conversations/{self.conversation.id}/messages/"
+        self.client = APIClient()
+        self.client.force_authenticate(self.conversation.user)
+
+    def page(self, **params):
+        return self.client.get(self.url, params)
+
+    def ids_of(self, response):
+        return [message["id"] for message in response.json()["results"]]
+
+    def test_walks_back_through_older_history(self):
+        newest = self.page(limit=3)
+        older = self.client.get(newest.json()["previous"])
+        oldest = self.client.get(older.json()["previous"])
+
+        self.assertEqual(self.ids_of(newest), self.ids[4:])
+        self.assertEqual(self.ids_of(older), self.ids[1:4])
+        self.assertEqual(self.ids_of(oldest), self.ids[:1])
+        self.assertTrue(older.json()["has_older"])
+        self.assertFalse(oldest.json()["has_older"])
+        self.assertIsNone(oldest.json()["previous"])
+
+    def test_after_returns_only_newer_messages(self):
+        response = self.page(after=self.ids[2], limit=3)
+
+        self.assertEqual(self.ids_of(response), self.ids[3:6])
+        self.assertTrue(response.json()["has_newer"])
+        refresh = self.client.get(response.json()["next"])
+        self.assertEqual(self.ids_of(refresh), self.ids[6:])
+        self.assertFalse(refresh.json()["has_newer"])
+
+    def test_rejects_before_and_after_together(self):
+        response = self.page(before=self.ids[5], after=self.ids[1])
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_or_foreign_anchor_is_not_found(self):
+        other = make_conversation("grace")
+        foreign = ChatMessage.objects.create(conversation=other, content="Hi")
+
+        for anchor in (foreign.id, 999999, "nope"):
+            with self.subTest(anchor=anchor):
+                self.assertEqual(self.page(before=anchor).status_code, 404)
+                self.assertEqual(self.page(after=anchor).status_code, 404)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = Path(root.name)
+        settings = override_settings(CHAT_ARCHIVE_ROOT=root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.conversation = make_conversation("ada")
+        for n in range(5):
+            ChatMessage.objects.create(
+                conversation=self.conversation, content=f"Message {n}", is_bot=n % 2
+            )
+        self.live = list(
+            self.conversation.messages.order_by("id").values_list(
+                "id", "content", "timestamp", "is_bot"
+            )
+        )
+
+    def test_round_trip_restores_messages(self):
+        self.assertTrue(archive.archive_conversation(self.conversation, batch_size=2))
+        self.assertFalse(self.conversation.messages.exists())
+        self.conversation.refresh_from_db()
+        archived_updated_at = self.conversation.updated_at
+
+        with self.captureOnCommitCallbacks(execute=True):
+            conversation = archive.rehydrate_conversation(self.conversation)
+
+        restored = list(
+            conversation.messages.order_by("id").values_list(
+                "id", "content", "timestamp", "is_bot"
+            )
+        )
+        self.assertEqual(restored, self.live)
+        self.assertIsNone(conversation.archived_at)
+        self.assertGreater(conversation.updated_at, archived_updated_at)
+        self.assertEqual(list(self.root.rglob("*.gz")), [])
+
+    def test_message_posted_while_archiving_is_kept(self):
+        record = archive.message_record
+
+        def post_midway(message):
+            if message.id == self.live[0][0]:
+                ChatMessage.objects.create(
+                    conversation=self.conversation, content="Still there?"
+                )
+            return record(message)
+
+        with mock.patch.object(archive, "message_record", post_midway):
+            archived = archive.archive_conversation(self.conversation)
+
+        self.assertFalse(archived)
+        self.assertEqual(self.conversation.messages.count(), 6)
+        self.assertEqual([p for p in self.root.rglob("*") if p.is_file()], [])
+
+    async def test_export_streams_live_and_archived_messages(self):
+        other = await Conversation.objects.acreate(
+            user=self.conversation.user, title="Cacti"
+        )
+        await ChatMessage.objects.acreate(conversation=other, content="Water less")
+        archived = await archive.sync_to_async(archive.archive_conversation)(
+            self.conversation
+        )
+        self.assertTrue(archived)
+        token = AccessToken.for_user(self.conversation.user)
+
+        response = await AsyncClient().get(
+            "/chat/export/", headers={"Authorization": f"Bearer {token}"}
+        )
+
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        records = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual(
+            [(r["type"], r.get("content")) for r in records],
+            [("conversation", None)]
+            + [("message", content) for _, content, _, _ in self.live]
+            + [("conversation", None), ("message", "Water less")],
+        )
+
+
+class InFlightLimiterTests(SimpleTestCase):
+    async def test_rejects_a_user_over_their_cap(self):
+        limiter = InFlightLimiter(max_inflight=4, max_per_user=1, queue_timeout=1)
+
+        async with limiter.slot("ada"):
+            with self.assertRaises(ChatCapacityError) as raised:
+                async with limiter.slot("ada"):
+                    pass
+            async with limiter.slot("grace"):
+                pass
+
+        self.assertEqual(raised.exception.status_code, 429)
+        async with limiter.slot("ada"):
+            pass
+
+    async def test_sheds_load_once_the_queue_wait_runs_out(self):
+        limiter = InFlightLimiter(max_inflight=1, max_per_user=2, queue_timeout=0.05)
+
+        async with limiter.slot("ada"):
+            with self.assertRaises(ChatCapacityError) as raised:
+                async with limiter.slot("grace"):
+                    pass
+
+        self.assertEqual(raised.exception.status_code, 503)
+        self.assertEqual(limiter._per_user, {})
+
+    async def test_queued_request_runs_when_a_slot_frees(self):
+        limiter = InFlightLimiter(max_inflight=1, max_per_user=1, queue_timeout=1)
+        order = []
+
+        async def generate(user_id):
+            async with limiter.slot(user_id):
+                order.append(user_id)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(generate("ada"), generate("grace"))
+
+        self.assertEqual(order, ["ada", "grace"])
+
+
+@override_settings(
+    CHAT_LLM_MODELS=["primary", "backup"],
+    CHAT_LLM_BREAKER_THRESHOLD=2,
+    CHAT_LLM_BREAKER_COOLDOWN=30,
+    CHAT_LLM_HEDGE_AFTER_MS=20,
+)
+class ResilienceTests(SimpleTestCase):
+    def setUp(self):
+        breakers = mock.patch.dict(resilience._breakers, clear=True)
+        breakers.start()
+        self.addCleanup(breakers.stop)
+        self.cancelled = []
+
+    def fake_start(self, delays):
+        """Streams that answer after ``delays[model]`` seconds, or fail on None."""
+
+        async def chunks():
+            yield "there"
+
+        async def start_stream(history, message, model, timeout):
+            try:
+                if delays[model] is None:
+                    raise resilience.EmptyReplyError(model)
+                await asyncio.sleep(delays[model])
+            except asyncio.CancelledError:
+                self.cancelled.append(model)
+                raise
+            return model, "Hello ", chunks()
+
+        return mock.patch.object(resilience, "start_stream", start_stream)
+
+    def test_breaker_opens_half_opens_and_closes(self):
+        breaker = resilience.CircuitBreaker(threshold=2, cooldown=30)
+        with mock.patch.object(resilience.time, "monotonic") as clock:
+            clock.return_value = 100
+            breaker.record_failure()
+            self.assertTrue(breaker.allow())
+            breaker.record_failure()
+            self.assertFalse(breaker.allow())
+
+            clock.return_value = 130
+            self.assertTrue(breaker.allow())
+            breaker.record_failure()
+            self.assertFalse(breaker.allow())
+
+            clock.return_value = 160
+            breaker.record_success()
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.failures, 0)
+
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        with self.fake_start({"primary": 5, "backup": 0}):
+            with self.assertLogs("chat", "INFO") as logs:
+                reply = await resilience.generate_reply([], "Hi")
+
+        self.assertEqual(logs.output, ["INFO:chat:Hedging chat request to backup"])
+
+        self.assertEqual((reply.content, reply.model), ("Hello there", "backup"))
+        self.assertTrue(reply.hedged)
+        self.assertEqual(self.cancelled, ["primary"])
+
+    async def test_open_breaker_skips_the_failing_model(self):
+        with self.fake_start({"primary": None, "backup": 0}):
+            with override_settings(CHAT_LLM_HEDGE_AFTER_MS=0, CHAT_LLM_BACKOFF=0):
+                for _ in range(2):
+                    with self.assertLogs("chat", "WARNING"):
+                        reply = await resilience.generate_reply([], "Hi")
+                    self.assertEqual(reply.model, "backup")
+
+            self.assertFalse(resilience.get_breaker("primary").allow())
+            reply = await resilience.generate_reply([], "Hi")
+
+        self.assertEqual(
+            (reply.model, reply.attempts, reply.hedged), ("backup", 1, False)
+        )
+
+    async def test_hung_primary_times_out_and_falls_back(self):
+        with self.fake_start({"primary": 60, "backup": 0}):
+            with override_settings(
+                CHAT_LLM_HEDGE_AFTER_MS=0,
+                CHAT_LLM_BREAKER_THRESHOLD=1,
+                CHAT_LLM_ATTEMPT_TIMEOUT=0.05,
+                CHAT_LLM_BACKOFF=0,
+            ):
+                with self.assertLogs("chat", "WARNING"):
+                    reply = await resilience.generate_reply([], "Hi")
+
+        self.assertEqual((reply.model, reply.attempts), ("backup", 2))
+        self.assertEqual(self.cancelled, ["primary"])
+        self.assertEqual(resilience.get_breaker("primary").failures, 1)
+        self.assertFalse(resilience.get_breaker("primary").allow())
@@ -1,15 +1,22 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ChatViewSet, ConversationViewSet
+from .views import (
+    ChatExportView,
+    ConversationMessagesView,
+    ConversationViewSet,
+    MessageSearchView,
+)
 
 router = DefaultRouter()
 router.register(r"conversations", ConversationViewSet, basename="conversation")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("search/", MessageSearchView.as_view(), name="message-search"),
+    path("export/", ChatExportView.as_view(), name="chat-export"),
     path(
         "conversations/<int:conversation_id>/messages/",
-        ChatViewSet.as_view({"get": "list", "post": "create"}),
+        ConversationMessagesView.as_view(),
         name="conversation-messages",
     ),
 ]
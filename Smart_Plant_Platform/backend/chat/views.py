@@ -1,32 +1,46 @@
-from django.shortcuts import render
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.db.models import Prefetch
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import viewsets, permissions, status
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.response import Response
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage, AIMessage
-from langchain_core.output_parsers import StrOutputParser
-import os
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from core.pagination import UpdatedKeysetPagination
+from .archive import rehydrate_conversation, stream_export
+from .limits import ChatCapacityError, get_limiter
+from .llm import CHAT_TEMPERATURE
 from .models import ChatMessage, Conversation
+from .pagination import MessageKeysetPagination
+from .resilience import LLMUnavailableError, generate_reply
+from .search import search_messages
 from .serializers import ChatMessageSerializer, ConversationSerializer
 
-SYSTEM_PROMPT = """You are a plant care expert AI assistant. Your responses should be:
-1. Clear and well-structured using markdown formatting
-2. Use bullet points or numbered lists for steps
-3. Use headings (##) for different sections
-4. Use **bold** for important terms
-5. Include relevant emojis where appropriate (🌱, 🪴, 💧, ☀️, etc.)
-6. Keep responses concise but informative
-
-Remember to focus on plant care, gardening, and botanical topics."""
-
 
 class ConversationViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = ConversationSerializer
+    pagination_class = UpdatedKeysetPagination
 
     def get_queryset(self):
-        return Conversation.objects.filter(user=self.request.user).order_by(
-            "-updated_at"
+        return (
+            Conversation.objects.filter(user=self.request.user)
+            .order_by("-updated_at")
+            .prefetch_related(
+                Prefetch(
+                    "messages",
+                    queryset=ChatMessage.objects.order_by("-timestamp", "-id")[:1],
+                    to_attr="latest_messages",
+                )
+            )
         )
 
     def create(self, request):
@@ -39,92 +53,172 @@ class ConversationViewSet(viewsets.ModelViewSet):
 class ChatViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = ChatMessageSerializer
-
-    def get_queryset(self, conversation_id):
-        return ChatMessage.objects.filter(
-            conversation_id=conversation_id, conversation__user=self.request.user
-        ).order_by("timestamp")
+    pagination_class = MessageKeysetPagination
 
     def list(self, request, conversation_id=None):
-        messages = self.get_queryset(conversation_id)
+        conversation = get_object_or_404(
+            Conversation, id=conversation_id, user=request.user
+        )
+        if conversation.archived_at is not None:
+            conversation = rehydrate_conversation(conversation)
+        # Ownership is checked above, so page over the (conversation, timestamp)
+        # index directly instead of joining back to the conversation per row.
+        paginator = self.pagination_class()
+        messages = paginator.paginate_queryset(
+            conversation.messages.all(), request, view=self
+        )
         serializer = self.serializer_class(messages, many=True)
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
 
-    def create(self, request, conversation_id=None):
-        message = request.data.get("message")
-        if not message:
+
+class ChatExportView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        response = StreamingHttpResponse(
+            stream_export(request.user), content_type="application/x-ndjson"
+        )
+        response["Content-Disposition"] = 'attachment; filename="chat-history.jsonl"'
+        return response
+
+
+class MessageSearchView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    max_limit = 50
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
             return Response(
+                {"error": "Query parameter 'q' is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            limit = min(int(request.query_params.get("limit", 20)), self.max_limit)
+        except ValueError:
+            limit = 20
+
+        results = search_messages(request.user, query, limit=max(limit, 1))
+        return Response({"query": query, "results": results})
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class ConversationMessagesView(View):
+    """
+    Async endpoint for a conversation's messages.
+
+    Posting a message awaits the LLM on the event loop instead of holding a
+    worker thread, so under ASGI (core/asgi.py) one worker can keep hundreds
+    of generations pending while still serving the rest of the API. Listing
+    is delegated to the synchronous ChatViewSet.
+    """
+
+    list_view = staticmethod(ChatViewSet.as_view({"get": "list"}))
+
+    async def authenticate(self, request):
+        try:
+            result = await sync_to_async(JWTAuthentication().authenticate)(request)
+        except (AuthenticationFailed, InvalidToken):
+            return None
+        if result is None or not result[0].is_active:
+            return None
+        return result[0]
+
+    async def get(self, request, conversation_id):
+        return await sync_to_async(self.list_view)(
+            request, conversation_id=conversation_id
+        )
+
+    async def post(self, request, conversation_id):
+        user = await self.authenticate(request)
+        if user is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            data = request.POST
+        message = data.get("message") if isinstance(data, dict) else None
+        if not message:
+            return JsonResponse(
                 {"error": "Message is required"}, status=status.HTTP_400_BAD_REQUEST
             )
 
         try:
-            conversation = Conversation.objects.get(
-                id=conversation_id, user=request.user
+            conversation = await Conversation.objects.aget(
+                id=conversation_id, user=user
             )
         except Conversation.DoesNotExist:
-            return Response(
+            return JsonResponse(
                 {"error": "Conversation not found"}, status=status.HTTP_404_NOT_FOUND
             )
+        if conversation.archived_at is not None:
+            conversation = await sync_to_async(rehydrate_conversation)(conversation)
+
+        try:
+            async with get_limiter().slot(user.pk):
+                return await self.generate_reply(conversation, message)
+        except ChatCapacityError as e:
+            return JsonResponse(
+                {"error": str(e)},
+                status=e.status_code,
+                headers={"Retry-After": str(e.retry_after)},
+            )
 
+    async def generate_reply(self, conversation, message):
         # Save user message
-        user_message = ChatMessage.objects.create(
+        user_message = await ChatMessage.objects.acreate(
             conversation=conversation, content=message, is_bot=False
         )
 
         # Get chat history for context
-        chat_history = self.get_queryset(conversation_id).order_by("timestamp")
-        history_messages = []
-        for msg in chat_history:
-            if msg.is_bot:
-                history_messages.append(AIMessage(content=msg.content))
-            else:
-                history_messages.append(HumanMessage(content=msg.content))
-
-        # Initialize LangChain components with updated patterns
-        llm = ChatOpenAI(
-            model="nvidia/llama-3.1-nemotron-70b-instruct:free",
-            openai_api_base="https://openrouter.ai/api/v1",
-            openai_api_key=os.getenv("OPENROUTER_API_KEY"),
-            temperature=0.7,
-        )
-
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", SYSTEM_PROMPT),
-                *[(msg.type.lower(), msg.content) for msg in history_messages],
-                ("human", "{input}"),
-            ]
-        )
-
-        chain = prompt | llm | StrOutputParser()
+        history = [
+            msg
+            async for msg in conversation.messages.only("content", "is_bot").order_by(
+                "timestamp", "id"
+            )
+        ]
 
         try:
-            # Get response from LangChain
-            response = chain.invoke({"input": message})
+            # Get response from the model chain without blocking the event loop
+            reply = await generate_reply(history, message)
 
-            # Save bot response
-            bot_message = ChatMessage.objects.create(
+            # Save bot response, recording which model actually answered
+            bot_message = await ChatMessage.objects.acreate(
                 conversation=conversation,
-                content=response,
+                content=reply.content,
                 is_bot=True,
                 metadata={
-                    "model": "nvidia/llama-3.1-nemotron-70b-instruct:free",
-                    "temperature": 0.7,
+                    "model": reply.model,
+                    "temperature": CHAT_TEMPERATURE,
+                    "attempts": reply.attempts,
+                    "hedged": reply.hedged,
                 },
             )
 
-            # Update conversation timestamp
-            conversation.save()
-
-            return Response(
+            return JsonResponse(
                 {
                     "user_message": ChatMessageSerializer(user_message).data,
                     "bot_message": ChatMessageSerializer(bot_message).data,
                 }
             )
 
+        except asyncio.TimeoutError:
+            return JsonResponse(
+                {"error": "The assistant took too long to respond"},
+                status=status.HTTP_504_GATEWAY_TIMEOUT,
+            )
+        except LLMUnavailableError as e:
+            return JsonResponse(
+                {"error": str(e)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "5"},
+            )
         except Exception as e:
-            return Response(
+            return JsonResponse(
                 {"error": f"Failed to get response: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
@@ -0,0 +1,149 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q, prefetch_related_objects
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Newest-first keyset pagination over ``(ordering_field, id)``.
+
+    The ``cursor`` carries the key of the row a page starts after, so every
+    page is one range scan of the matching composite index no matter how deep
+    it is, and there is no OFFSET or COUNT. ``next`` walks towards older rows
+    and ``previous`` back towards newer ones. Rows deleted while a client is
+    paging don't invalidate its cursor.
+
+    Endpoints override ``ordering_field`` or the page sizes by subclassing and
+    setting ``pagination_class`` on the view. The field must be non-null.
+    """
+
+    ordering_field = "created_at"
+    default_limit = api_settings.PAGE_SIZE or 20
+    max_limit = 100
+    limit_query_param = "limit"
+    cursor_query_param = "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.field = queryset.model._meta.get_field(self.ordering_field)
+        cursor = request.query_params.get(self.cursor_query_param)
+        key = self.ordering_field
+        # Prefetch for the page itself, not the extra row that probes for more
+        lookups = queryset._prefetch_related_lookups
+        queryset = queryset.prefetch_related(None)
+
+        if cursor:
+            value, pk, reverse = self.decode_cursor(cursor)
+        else:
+            value = pk = None
+            reverse = False
+
+        if reverse:
+            # Step back towards newer rows, then flip the page into list order
+            rows = list(
+                queryset.filter(self.beyond(value, pk, "gt")).order_by(key, "id")[
+                    : self.limit + 1
+                ]
+            )
+            self.has_newer = len(rows) > self.limit
+            self.has_older = True
+            page = rows[: self.limit][::-1]
+        else:
+            if cursor:
+                queryset = queryset.filter(self.beyond(value, pk, "lt"))
+            rows = list(queryset.order_by(f"-{key}", "-id")[: self.limit + 1])
+            self.has_older = len(rows) > self.limit
+            self.has_newer = bool(cursor)
+            page = rows[: self.limit]
+
+        prefetch_related_objects(page, *lookups)
+        self.page = page
+        return page
+
+    def beyond(self, value, pk, lookup):
+        """
+        Rows strictly past ``(value, pk)``. The range on the ordering field is
+        what the index seeks to; the id tie-break only applies to rows that
+        share the cursor's value.
+        """
+        key = self.ordering_field
+        return Q(**{f"{key}__{lookup}e": value}) & (
+            Q(**{f"{key}__{lookup}": value}) | Q(**{f"id__{lookup}": pk})
+        )
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def encode_cursor(self, row, reverse):
+        value = self.field.value_from_object(row)
+        if hasattr(value, "isoformat"):
+            value = value.isoformat()
+        raw = json.dumps([value, row.pk, int(reverse)], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            value, pk, reverse = json.loads(raw)
+            value = self.field.to_python(value)
+            pk = int(pk)
+        except (TypeError, ValueError, DjangoValidationError):
+            raise ValidationError({self.cursor_query_param: "Invalid cursor."})
+        if value is None:
+            raise ValidationError({self.cursor_query_param: "Invalid cursor."})
+        return value, pk, bool(reverse)
+
+    def get_link(self, row, reverse):
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(row, reverse),
+        )
+
+    def get_next_link(self):
+        if not self.has_older or not self.page:
+            return None
+        return self.get_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_newer or not self.page:
+            return None
+        return self.get_link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class UpdatedKeysetPagination(KeysetPagination):
+    """Most recently active first, for lists the UI sorts by last activity."""
+
+    ordering_field = "updated_at"
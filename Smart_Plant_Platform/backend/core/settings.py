@@ -39,6 +39,8 @@ INSTALLED_APPS = [
     "plants",
     "chat",
     "disease",
+    "mediafiles",
+    "telemetry",
 ]
 
 MIDDLEWARE = [
@@ -68,6 +70,8 @@ REST_FRAMEWORK = {
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ],
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
+    "PAGE_SIZE": 20,
 }
 
 TEMPLATES = [
@@ -106,6 +110,14 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            # Take the write lock when a transaction starts, so concurrent
+            # writers wait on the busy timeout instead of failing to upgrade
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+        },
+        # A file, not :memory:, so threaded tests share one database
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
@@ -142,6 +154,28 @@ STATIC_URL = "static/"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Uploads are stored once per distinct content under media/cas/ and
+# reference-counted (see mediafiles/storage.py, manage.py gc_media_blobs).
+STORAGES = {
+    "default": {"BACKEND": "mediafiles.storage.ContentAddressedStorage"},
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+# Resized, EXIF-free derivatives of uploaded images (see mediafiles/variants.py).
+# IMAGE_VARIANT_FORMAT is any Pillow format that takes a quality, e.g. WEBP or
+# AVIF where the installed Pillow supports it.
+IMAGE_VARIANT_WIDTHS = [
+    int(width)
+    for width in os.getenv("IMAGE_VARIANT_WIDTHS", "160,320,640,1280").split(",")
+]
+IMAGE_VARIANT_FORMAT = os.getenv("IMAGE_VARIANT_FORMAT", "WEBP")
+IMAGE_VARIANT_QUALITY = int(os.getenv("IMAGE_VARIANT_QUALITY", 80))
+IMAGE_VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", 2))
+# Generate variants inline after commit instead of on the worker pool
+IMAGE_VARIANTS_SYNC = os.getenv("IMAGE_VARIANTS_SYNC", "False") == "True"
+
 AUTH_USER_MODEL = "authentication.User"
 
 # Default primary key field type
@@ -155,12 +189,99 @@ EMAIL_USE_TLS = True
 EMAIL_PORT = 587
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
+DEFAULT_FROM_EMAIL = os.getenv(
+    "DEFAULT_FROM_EMAIL", EMAIL_HOST_USER or "webmaster@localhost"
+)
+
+# Care reminder digests (manage.py send_care_reminders)
+CARE_REMINDER_MAX_PER_SECOND = float(os.getenv("CARE_REMINDER_MAX_PER_SECOND", 50))
+
+# Delta sync (GET /plants/sync/). Clients whose cursor is older than this get
+# a full snapshot; manage.py prune_sync_tombstones drops older tombstones.
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", 90))
+
+# Plant sensor telemetry (manage.py rollup_telemetry). Retention is in days
+# per level; raw readings and minute/hour rollups expire, daily ones are kept.
+TELEMETRY_RETENTION_DAYS = {
+    "raw": int(os.getenv("TELEMETRY_RAW_RETENTION_DAYS", 7)),
+    60: int(os.getenv("TELEMETRY_MINUTE_RETENTION_DAYS", 30)),
+    3600: int(os.getenv("TELEMETRY_HOUR_RETENTION_DAYS", 365)),
+}
+TELEMETRY_LATE_SECONDS = int(os.getenv("TELEMETRY_LATE_SECONDS", 300))
+TELEMETRY_MAX_BATCH = int(os.getenv("TELEMETRY_MAX_BATCH", 10000))
+TELEMETRY_MAX_CLOCK_SKEW = int(os.getenv("TELEMETRY_MAX_CLOCK_SKEW", 300))
+# Windows up to this many seconds are answered from raw readings
+TELEMETRY_RAW_MAX_WINDOW = int(os.getenv("TELEMETRY_RAW_MAX_WINDOW", 3 * 3600))
+
+# A care task done within this many hours of its due date counts as on time
+CARE_ON_TIME_GRACE_HOURS = float(os.getenv("CARE_ON_TIME_GRACE_HOURS", 12))
+
+# Care routine occurrences are stored this far ahead for the calendar, and
+# rolled forward once fewer than CARE_OCCURRENCE_REFRESH_DAYS remain
+CARE_OCCURRENCE_HORIZON_DAYS = int(os.getenv("CARE_OCCURRENCE_HORIZON_DAYS", 120))
+CARE_OCCURRENCE_REFRESH_DAYS = int(os.getenv("CARE_OCCURRENCE_REFRESH_DAYS", 30))
+CARE_CALENDAR_MAX_DAYS = 92
+
+# Local memory suits a single process; point every node at a shared backend
+# (e.g. django.core.cache.backends.redis.RedisCache) when running several, so
+# catalog invalidation reaches all of them.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+# Cached catalog responses are also dropped whenever a product or category
+# changes, so this only bounds how long an unused entry lingers
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", 3600))
+
+# Boundaries of the price ranges counted in product search facets
+PRODUCT_PRICE_FACETS = [10, 25, 50, 100]
+
+# How long adding to the cart holds stock; every change to a line renews it
+CART_RESERVATION_MINUTES = int(os.getenv("CART_RESERVATION_MINUTES", 15))
+
+# Growth analytics results stay cached until a growth record changes; this
+# only bounds how long an unused entry lingers.
+GROWTH_ANALYTICS_CACHE_TIMEOUT = int(os.getenv("GROWTH_ANALYTICS_CACHE_TIMEOUT", 86400))
 
 
 CORS_ORIGIN_ALLOW_ALL = True
 
 FRONTEND_URL = os.getenv("FRONTEND_URL")
 
+# In-flight LLM generations allowed per ASGI worker, and per user within it.
+# Requests wait up to CHAT_QUEUE_TIMEOUT seconds for a slot before a 503.
+CHAT_MAX_INFLIGHT = int(os.getenv("CHAT_MAX_INFLIGHT", 200))
+CHAT_MAX_INFLIGHT_PER_USER = int(os.getenv("CHAT_MAX_INFLIGHT_PER_USER", 2))
+CHAT_QUEUE_TIMEOUT = float(os.getenv("CHAT_QUEUE_TIMEOUT", 5))
+
+# Chat LLM resilience (see chat/resilience.py). Models are tried in order;
+# the first is the primary, the rest form the fallback chain.
+CHAT_LLM_MODELS = os.getenv(
+    "CHAT_LLM_MODELS",
+    "nvidia/llama-3.1-nemotron-70b-instruct:free,"
+    "meta-llama/llama-3.3-70b-instruct:free",
+).split(",")
+CHAT_LLM_CONNECT_TIMEOUT = float(os.getenv("CHAT_LLM_CONNECT_TIMEOUT", 5))
+CHAT_LLM_TOTAL_TIMEOUT = float(os.getenv("CHAT_LLM_TOTAL_TIMEOUT", 45))
+# Share of the total one attempt may take before the next model is tried
+CHAT_LLM_ATTEMPT_TIMEOUT = float(os.getenv("CHAT_LLM_ATTEMPT_TIMEOUT", 15))
+CHAT_LLM_RETRIES = int(os.getenv("CHAT_LLM_RETRIES", 2))
+CHAT_LLM_BACKOFF = float(os.getenv("CHAT_LLM_BACKOFF", 0.5))
+# Fire a request to the next model if the first token hasn't arrived in
+# this many milliseconds; 0 disables hedging.
+CHAT_LLM_HEDGE_AFTER_MS = int(os.getenv("CHAT_LLM_HEDGE_AFTER_MS", 0))
+CHAT_LLM_BREAKER_THRESHOLD = int(os.getenv("CHAT_LLM_BREAKER_THRESHOLD", 5))
+CHAT_LLM_BREAKER_COOLDOWN = float(os.getenv("CHAT_LLM_BREAKER_COOLDOWN", 30))
+
+# Cold storage for idle conversations (manage.py archive_conversations)
+CHAT_ARCHIVE_ROOT = os.getenv("CHAT_ARCHIVE_ROOT", BASE_DIR / "archive" / "chat")
+CHAT_ARCHIVE_AFTER_DAYS = int(os.getenv("CHAT_ARCHIVE_AFTER_DAYS", 90))
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -48,6 +48,7 @@ urlpatterns = [
     path("plants/", include("plants.urls")),
     path("chat/", include("chat.urls")),
     path("disease/", include("disease.urls")),
+    path("telemetry/", include("telemetry.urls")),
 ]
 
 if settings.DEBUG:
@@ -5,6 +5,7 @@ from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import AllowAny
 import os
+import tempfile
 from django.conf import settings
 from .temp.run_model import (
     load_onnx_model,
@@ -27,15 +28,19 @@ class DiseaseClassificationView(APIView):
                 {"error": "No image provided"}, status=status.HTTP_400_BAD_REQUEST
             )
 
+        temp_image_path = None
         try:
             # Get the uploaded image
             image_file = request.FILES["image"]
 
-            # Save the image temporarily
-            temp_image_path = os.path.join(settings.MEDIA_ROOT, "temp", image_file.name)
-            os.makedirs(os.path.dirname(temp_image_path), exist_ok=True)
-
-            with open(temp_image_path, "wb+") as destination:
+            # Save the image temporarily, under a name of our own so uploads
+            # can't collide or escape the temp directory
+            temp_dir = os.path.join(settings.MEDIA_ROOT, "temp")
+            os.makedirs(temp_dir, exist_ok=True)
+            fd, temp_image_path = tempfile.mkstemp(
+                dir=temp_dir, suffix=os.path.splitext(image_file.name)[1]
+            )
+            with os.fdopen(fd, "wb") as destination:
                 for chunk in image_file.chunks():
                     destination.write(chunk)
 
@@ -73,9 +78,6 @@ class DiseaseClassificationView(APIView):
             # Get results
             class_probs = interpret_predictions(predictions, labels)
 
-            # Clean up temporary file
-            os.remove(temp_image_path)
-
             return Response(
                 {
                     "predictions": class_probs,
@@ -87,3 +89,7 @@ class DiseaseClassificationView(APIView):
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        finally:
+            # Runs on every return path, not just the successful one
+            if temp_image_path is not None and os.path.exists(temp_image_path):
+                os.remove(temp_image_path)
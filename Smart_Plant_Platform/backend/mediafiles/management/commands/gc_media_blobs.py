@@ -0,0 +1,115 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from mediafiles.models import Blob
+from mediafiles.signals import content_addressed_fields
+from mediafiles.storage import CAS_PREFIX, ContentAddressedStorage
+from mediafiles.variants import VARIANT_MODELS
+
+
+def referenced_names(batch_size):
+    """Count how many times each blob is referenced by a file field or variant."""
+    counts = Counter()
+    for model in apps.get_models():
+        for field in content_addressed_fields(model):
+            names = model.objects.filter(
+                **{f"{field.attname}__startswith": CAS_PREFIX}
+            ).values_list(field.attname, flat=True)
+            counts.update(names.iterator(chunk_size=batch_size))
+    for label in VARIANT_MODELS:
+        variants = (
+            apps.get_model(label)
+            .objects.exclude(image_variants={})
+            .values_list("image_variants", flat=True)
+        )
+        for entry in variants.iterator(chunk_size=batch_size):
+            counts.update(
+                name
+                for name in entry.get("widths", {}).values()
+                if name.startswith(CAS_PREFIX)
+            )
+    return counts
+
+
+class Command(BaseCommand):
+    help = "Delete content-addressed media blobs that nothing refers to any more"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--recount",
+            action="store_true",
+            help="Recompute reference counts from the file fields first",
+        )
+        parser.add_argument(
+            "--grace",
+            type=int,
+            default=60,
+            help="Only collect blobs unreferenced for at least this many minutes",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be deleted without deleting anything",
+        )
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, ContentAddressedStorage):
+            self.stderr.write("The default storage is not content-addressed")
+            return
+
+        batch_size = options["batch_size"]
+        if options["recount"]:
+            self.recount(batch_size, options["dry_run"])
+
+        cutoff = timezone.now() - timedelta(minutes=options["grace"])
+        candidates = Blob.objects.filter(refcount=0, updated_at__lt=cutoff).order_by(
+            "pk"
+        )
+        deleted = freed = 0
+        for pk, name, size in candidates.values_list("pk", "name", "size").iterator(
+            chunk_size=batch_size
+        ):
+            if options["dry_run"]:
+                self.stdout.write(f"Would delete {name} ({size} bytes)")
+                deleted, freed = deleted + 1, freed + size
+                continue
+            # Locking the row makes a concurrent upload of the same content
+            # wait, then recreate the row and rewrite the file.
+            with transaction.atomic():
+                blob = (
+                    Blob.objects.select_for_update().filter(pk=pk, refcount=0).first()
+                )
+                if blob is None:
+                    continue
+                default_storage.purge(name)
+                blob.delete()
+            deleted, freed = deleted + 1, freed + size
+
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {deleted} blobs, {freed / 2**20:.1f} MiB")
+        )
+
+    def recount(self, batch_size, dry_run):
+        started = timezone.now()
+        counts = referenced_names(batch_size)
+        fixed = 0
+        blobs = Blob.objects.order_by("pk").values_list("pk", "name", "refcount")
+        for pk, name, refcount in blobs.iterator(chunk_size=batch_size):
+            actual = counts.get(name, 0)
+            if actual == refcount:
+                continue
+            fixed += 1
+            if not dry_run:
+                # Skip blobs touched since the scan began; their count moved
+                Blob.objects.filter(pk=pk, updated_at__lt=started).update(
+                    refcount=actual, updated_at=timezone.now()
+                )
+        self.stdout.write(f"Corrected the reference count of {fixed} blobs")
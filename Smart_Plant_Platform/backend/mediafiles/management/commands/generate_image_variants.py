@@ -0,0 +1,38 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from mediafiles.variants import VARIANT_MODELS, build_variants
+
+
+class Command(BaseCommand):
+    help = "Generate missing image variants, e.g. for uploads made before a restart"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate variants even where they are up to date",
+        )
+
+    def handle(self, *args, **options):
+        for label in VARIANT_MODELS:
+            model = apps.get_model(label)
+            generated = 0
+            rows = (
+                model.objects.exclude(image="")
+                .exclude(image__isnull=True)
+                .values_list("pk", "image", "image_variants")
+            )
+            for pk, image, variants in rows.iterator(chunk_size=2000):
+                if not options["force"] and (variants or {}).get("source") == image:
+                    continue
+                try:
+                    if build_variants(label, pk, image):
+                        generated += 1
+                except OSError as e:
+                    self.stderr.write(f"{label} {pk}: {e}")
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{label}: generated variants for {generated} images"
+                )
+            )
@@ -0,0 +1,58 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from mediafiles.reclaim import ReferenceIndex, find_orphans, iter_referenced_names
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete files under MEDIA_ROOT that no model field, image variant or "
+        "blob refers to"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace",
+            type=int,
+            default=24 * 60,
+            help="Only delete files unmodified for at least this many minutes",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be deleted without deleting anything",
+        )
+
+    def handle(self, *args, **options):
+        root = settings.MEDIA_ROOT
+        batch_size = options["batch_size"]
+        dry_run = options["dry_run"]
+        verbose = options["verbosity"] > 1
+        # Taken before the references are read, so a file uploaded during
+        # the scan is always younger than the cutoff.
+        cutoff = time.time() - options["grace"] * 60
+
+        with ReferenceIndex() as index:
+            index.add_all(iter_referenced_names(batch_size), batch_size)
+
+            deleted = freed = 0
+            for name, size in find_orphans(root, index, cutoff, batch_size):
+                if verbose or dry_run:
+                    self.stdout.write(f"{name} ({size} bytes)")
+                if not dry_run:
+                    try:
+                        os.remove(os.path.join(root, name))
+                    except FileNotFoundError:
+                        continue
+                deleted, freed = deleted + 1, freed + size
+
+        verb = "Would delete" if dry_run else "Deleted"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {deleted} orphaned files, {freed / 2**20:.1f} MiB"
+            )
+        )
@@ -0,0 +1,23 @@
+from django.db import models
+
+
+class Blob(models.Model):
+    """
+    One stored file in the content-addressed media store, with the number of
+    file fields currently pointing at it.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    digest = models.CharField(max_length=64)
+    size = models.BigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["refcount", "updated_at"], name="media_blob_gc_idx"),
+        ]
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,125 @@
+import os
+import sqlite3
+import tempfile
+from itertools import islice
+
+from django.apps import apps
+from django.db.models import FileField
+
+from .models import Blob
+from .variants import VARIANT_MODELS
+
+
+def iter_files(root, prefix=""):
+    """
+    Yield ``(name, size, mtime)`` for every file under ``root``, with names
+    relative to it as stored in file fields. os.scandir reads one directory
+    at a time, so memory use does not grow with the size of the tree.
+    """
+    stack = [prefix]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(root, directory))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                name = f"{directory}/{entry.name}" if directory else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(name)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    yield name, stat.st_size, stat.st_mtime
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def iter_referenced_names(batch_size):
+    """Every media name the database refers to, possibly with repeats."""
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, FileField):
+                names = (
+                    model._base_manager.exclude(**{field.attname: ""})
+                    .exclude(**{f"{field.attname}__isnull": True})
+                    .values_list(field.attname, flat=True)
+                )
+                yield from names.iterator(chunk_size=batch_size)
+    for label in VARIANT_MODELS:
+        variants = (
+            apps.get_model(label)
+            ._base_manager.exclude(image_variants={})
+            .values_list("image_variants", flat=True)
+        )
+        for entry in variants.iterator(chunk_size=batch_size):
+            yield from entry.get("widths", {}).values()
+    # Blob bytes belong to gc_media_blobs for as long as their row exists
+    yield from Blob.objects.values_list("name", flat=True).iterator(
+        chunk_size=batch_size
+    )
+
+
+class ReferenceIndex:
+    """
+    The set of referenced media names, kept in an indexed SQLite file on disk
+    rather than in memory so it scales to millions of paths.
+    """
+
+    def __init__(self, directory=None):
+        self.file = tempfile.NamedTemporaryFile(
+            prefix="media-refs-", suffix=".sqlite3", dir=directory
+        )
+        self.db = sqlite3.connect(self.file.name)
+        self.db.execute("PRAGMA journal_mode = OFF")
+        self.db.execute("PRAGMA synchronous = OFF")
+        self.db.execute("CREATE TABLE refs (name TEXT PRIMARY KEY) WITHOUT ROWID")
+
+    def add_all(self, names, batch_size):
+        for chunk in chunked(names, batch_size):
+            self.db.executemany(
+                "INSERT OR IGNORE INTO refs (name) VALUES (?)",
+                ((name,) for name in chunk),
+            )
+        self.db.commit()
+
+    def missing(self, names):
+        """The subset of ``names`` that is not referenced."""
+        # Stay under SQLite's default limit on bound parameters
+        found = set()
+        for chunk in chunked(names, 500):
+            placeholders = ",".join("?" * len(chunk))
+            found.update(
+                row[0]
+                for row in self.db.execute(
+                    f"SELECT name FROM refs WHERE name IN ({placeholders})", chunk
+                )
+            )
+        return [name for name in names if name not in found]
+
+    def close(self):
+        self.db.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def find_orphans(root, index, cutoff, batch_size):
+    """
+    Stream the media tree in batches and yield the ``(name, size)`` of each
+    file that nothing refers to and that was last modified before
+    ``cutoff``. The grace period keeps uploads whose row has not been
+    committed yet.
+    """
+    for batch in chunked(iter_files(root), batch_size):
+        sizes = {name: size for name, size, mtime in batch if mtime < cutoff}
+        for name in index.missing(list(sizes)):
+            yield name, sizes[name]
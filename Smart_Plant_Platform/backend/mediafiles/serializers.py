@@ -0,0 +1,26 @@
+from rest_framework import serializers
+
+
+class ImageSrcsetField(serializers.ReadOnlyField):
+    """
+    ``{width: url}`` map of an instance's image variants, or None while they
+    are still being generated. Stale variants of a replaced image are never
+    exposed.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["source"] = "*"
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        variants = instance.image_variants or {}
+        if not instance.image or variants.get("source") != instance.image.name:
+            return None
+
+        storage = instance.image.storage
+        request = self.context.get("request")
+        srcset = {}
+        for width, name in variants["widths"].items():
+            url = storage.url(name)
+            srcset[width] = request.build_absolute_uri(url) if request else url
+        return srcset
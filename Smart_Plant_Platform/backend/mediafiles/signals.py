@@ -0,0 +1,75 @@
+from django.apps import apps
+from django.db import transaction
+from django.db.models import FileField
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+from .storage import ContentAddressedStorage
+from .variants import VARIANT_MODELS, delete_variants, schedule_variants
+
+
+def stored_name(instance):
+    # Read the raw attribute so a deferred image doesn't trigger a query
+    value = instance.__dict__.get("image")
+    return getattr(value, "name", value) or ""
+
+
+def remember_image(sender, instance, **kwargs):
+    instance._stored_image_name = stored_name(instance)
+
+
+def drop_replaced_variants(sender, instance, **kwargs):
+    previous = getattr(instance, "_stored_image_name", "")
+    if previous and previous != stored_name(instance):
+        storage = sender._meta.get_field("image").storage
+        stale = instance.image_variants
+        instance.image_variants = {}
+        transaction.on_commit(lambda: delete_variants(storage, stale), robust=True)
+
+
+def queue_variants(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    name = stored_name(instance)
+    instance._stored_image_name = name
+    if name and (instance.image_variants or {}).get("source") != name:
+        schedule_variants(instance)
+
+
+def delete_all_variants(sender, instance, **kwargs):
+    storage = sender._meta.get_field("image").storage
+    variants = instance.image_variants
+    if variants:
+        transaction.on_commit(lambda: delete_variants(storage, variants), robust=True)
+
+
+for label in VARIANT_MODELS:
+    model = apps.get_model(label)
+    post_init.connect(remember_image, sender=model)
+    pre_save.connect(drop_replaced_variants, sender=model)
+    post_save.connect(queue_variants, sender=model)
+    post_delete.connect(delete_all_variants, sender=model)
+
+
+def content_addressed_fields(model):
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if isinstance(field, FileField)
+        and isinstance(field.storage, ContentAddressedStorage)
+    ]
+
+
+def release_blobs(sender, instance, **kwargs):
+    """Drop the blob references held by a deleted row's file fields."""
+    for field in content_addressed_fields(sender):
+        name = getattr(instance, field.attname).name
+        if name:
+            storage = field.storage
+            transaction.on_commit(
+                lambda storage=storage, name=name: storage.release(name), robust=True
+            )
+
+
+for model in apps.get_models():
+    if content_addressed_fields(model):
+        post_delete.connect(release_blobs, sender=model)
@@ -0,0 +1,89 @@
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+CAS_PREFIX = "cas/"
+
+
+def content_digest(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every file under ``cas/<aa>/<bb>/<sha256><ext>`` so identical
+    uploads share one file on disk, whichever field or upload_to they came
+    through. Each save takes a reference on the blob and each delete drops
+    one; the bytes are only removed by ``manage.py gc_media_blobs`` once
+    nothing refers to them.
+
+    Names outside ``cas/`` (files stored before this backend) are handled
+    exactly like FileSystemStorage.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # Rewriting a blob only ever replaces it with identical bytes
+        kwargs.setdefault("allow_overwrite", True)
+        super().__init__(*args, **kwargs)
+
+    def blob_name(self, digest, name):
+        extension = os.path.splitext(name)[1].lower()
+        return f"{CAS_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+    def get_available_name(self, name, max_length=None):
+        # Names are derived from content in _save, never made unique here
+        return name
+
+    def _save(self, name, content):
+        digest = content_digest(content)
+        blob_name = self.blob_name(digest, name)
+        created = self.acquire(blob_name, digest, content.size)
+        # A freshly created row means nobody else holds the blob, so the file
+        # may be mid-way through garbage collection: always (re)write it.
+        if created or not self.exists(blob_name):
+            super()._save(blob_name, content)
+        return blob_name
+
+    def acquire(self, name, digest, size):
+        """Take a reference on a blob, returning True if its row is new."""
+        from .models import Blob
+
+        now = timezone.now()
+        if Blob.objects.filter(name=name).update(
+            refcount=F("refcount") + 1, updated_at=now
+        ):
+            return False
+        try:
+            with transaction.atomic():
+                Blob.objects.create(digest=digest, name=name, size=size, refcount=1)
+            return True
+        except IntegrityError:
+            # Another upload of the same content created it first
+            Blob.objects.filter(name=name).update(
+                refcount=F("refcount") + 1, updated_at=now
+            )
+            return False
+
+    def release(self, name):
+        from .models import Blob
+
+        Blob.objects.filter(name=name, refcount__gt=0).update(
+            refcount=F("refcount") - 1, updated_at=timezone.now()
+        )
+
+    def delete(self, name):
+        if name and name.startswith(CAS_PREFIX):
+            self.release(name)
+        else:
+            super().delete(name)
+
+    def purge(self, name):
+        """Remove a blob's bytes; only for the garbage collector."""
+        super().delete(name)
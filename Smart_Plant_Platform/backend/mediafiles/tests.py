@@ -0,0 +1,297 @@
+import io
+import os
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from plants.models import UserPlant
+
+from .models import Blob
+
+User = get_user_model()
+
+
+def image_bytes(width=40, height=30, color="green", format="PNG"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, format=format)
+    return buffer.getvalue()
+
+
+def upload(name="fern.png", **kwargs):
+    return SimpleUploadedFile(name, image_bytes(**kwargs), content_type="image/png")
+
+
+class MediaTestCase(TestCase):
+    """Runs each test against an empty MEDIA_ROOT of its own."""
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = Path(root.name)
+        settings = override_settings(MEDIA_ROOT=root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = User.objects.create_user(
+            email="ada@example.com", username="ada", password=None
+        )
+
+    def files(self):
+        return sorted(
+            str(path.relative_to(self.root))
+            for path in self.root.rglob("*")
+            if path.is_file()
+        )
+
+    def refcount(self, name):
+        return Blob.objects.get(name=name).refcount
+
+    def age(self, name, minutes):
+        Blob.objects.filter(name=name).update(
+            updated_at=timezone.now() - timedelta(minutes=minutes)
+        )
+
+    def gc(self, *args):
+        call_command("gc_media_blobs", *args, stdout=io.StringIO())
+
+
+class ContentAddressedStorageTests(MediaTestCase):
+    def test_identical_uploads_share_one_blob(self):
+        first = default_storage.save("plants/fern.png", ContentFile(b"leaf"))
+        second = default_storage.save("products/other.png", ContentFile(b"leaf"))
+
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith("cas/"))
+        self.assertEqual(self.files(), [first])
+        self.assertEqual(self.refcount(first), 2)
+
+    def test_deleting_a_row_releases_its_blob(self):
+        plants = [
+            UserPlant.objects.create(user=self.user, name=name, image=upload())
+            for name in ("Fern", "Ivy")
+        ]
+        name = plants[0].image.name
+        self.assertEqual(self.refcount(name), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            plants[0].delete()
+
+        self.assertEqual(self.refcount(name), 1)
+        self.assertEqual(self.files(), [name])
+
+    def test_replacing_an_image_releases_the_old_blob(self):
+        plant = UserPlant.objects.create(user=self.user, name="Fern", image=upload())
+        old = plant.image.name
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.patch(
+            f"/plants/{plant.id}/",
+            {"image": upload(color="red")},
+            format="multipart",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        plant.refresh_from_db()
+        self.assertNotEqual(plant.image.name, old)
+        self.assertEqual(self.refcount(old), 0)
+        self.assertEqual(self.refcount(plant.image.name), 1)
+
+    def test_gc_purges_only_unreferenced_blobs_past_the_grace(self):
+        stale, fresh, held = (
+            default_storage.save("plants/a.png", ContentFile(content))
+            for content in (b"stale", b"fresh", b"held")
+        )
+        for name in (stale, fresh):
+            default_storage.delete(name)
+        for name in (stale, held):
+            self.age(name, minutes=120)
+
+        self.gc("--grace", "60")
+
+        self.assertEqual(self.files(), sorted([fresh, held]))
+        self.assertEqual(
+            sorted(Blob.objects.values_list("name", flat=True)), sorted([fresh, held])
+        )
+
+    def test_dry_run_deletes_nothing(self):
+        name = default_storage.save("plants/a.png", ContentFile(b"stale"))
+        default_storage.delete(name)
+        self.age(name, minutes=120)
+
+        self.gc("--dry-run")
+
+        self.assertEqual(self.files(), [name])
+        self.assertTrue(Blob.objects.filter(name=name).exists())
+
+    def test_recount_corrects_drifted_counts(self):
+        plant = UserPlant.objects.create(user=self.user, name="Fern", image=upload())
+        kept = plant.image.name
+        # A reference dropped without going through the storage
+        lost = default_storage.save("plants/a.png", ContentFile(b"lost"))
+        Blob.objects.filter(name=kept).update(refcount=5)
+        self.age(kept, minutes=120)
+        self.age(lost, minutes=120)
+
+        self.gc("--recount")
+
+        self.assertEqual(self.refcount(kept), 1)
+        # Counted down just now, so the grace period starts over
+        self.assertEqual(self.refcount(lost), 0)
+        self.assertEqual(self.files(), sorted([kept, lost]))
+
+
+class ReclaimMediaTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        # Originals stored before the CAS backend, and one of their variants
+        legacy, variant = "plants/legacy.png", "plants/variants/legacy_160w.webp"
+        for name in (legacy, variant):
+            self.write(name)
+        UserPlant.objects.create(
+            user=self.user,
+            name="Ivy",
+            image=legacy,
+            image_variants={"source": legacy, "widths": {"160": variant}},
+        )
+        self.cas = UserPlant.objects.create(
+            user=self.user, name="Fern", image=upload()
+        ).image.name
+        self.unreferenced_blob = default_storage.save(
+            "plants/b.png", ContentFile(b"blob")
+        )
+        default_storage.delete(self.unreferenced_blob)
+        self.write("plants/orphan.png")
+        self.write("plants/variants/orphan_160w.webp")
+        self.kept = sorted([legacy, variant, self.cas, self.unreferenced_blob])
+        self.backdate(minutes=120)
+
+    def write(self, name, content=b"bytes"):
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+
+    def backdate(self, minutes):
+        then = time.time() - minutes * 60
+        for path in self.root.rglob("*"):
+            if path.is_file():
+                os.utime(path, (then, then))
+
+    def reclaim(self, *args):
+        out = io.StringIO()
+        call_command("reclaim_media", "--grace", "60", *args, stdout=out)
+        return out.getvalue()
+
+    def test_deletes_only_old_unreferenced_files(self):
+        self.write("plants/uploading.png")
+
+        self.reclaim()
+
+        self.assertEqual(self.files(), sorted(self.kept + ["plants/uploading.png"]))
+
+    def test_dry_run_deletes_nothing(self):
+        before = self.files()
+
+        output = self.reclaim("--dry-run")
+
+        self.assertEqual(self.files(), before)
+        self.assertIn("plants/orphan.png", output)
+        self.assertIn("Would delete 2 orphaned files", output)
+
+
+@override_settings(IMAGE_VARIANTS_SYNC=True, IMAGE_VARIANT_WIDTHS=[160, 320, 640])
+class ImageVariantTests(MediaTestCase):
+    def create(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            plant = UserPlant.objects.create(
+                user=self.user, name="Fern", image=upload(**kwargs)
+            )
+        plant.refresh_from_db()
+        return plant
+
+    def sizes(self, variants):
+        sizes = {}
+        for width, name in variants["widths"].items():
+            with default_storage.open(name) as file, Image.open(file) as image:
+                self.assertEqual(image.format, "WEBP")
+                sizes[width] = image.size
+        return sizes
+
+    def test_writes_a_webp_variant_at_each_width(self):
+        plant = self.create(width=800, height=600)
+
+        self.assertEqual(plant.image_variants["source"], plant.image.name)
+        self.assertEqual(plant.image_variants["format"], "webp")
+        self.assertEqual(
+            self.sizes(plant.image_variants),
+            {"160": (160, 120), "320": (320, 240), "640": (640, 480)},
+        )
+
+    def test_does_not_upscale_small_images(self):
+        plant = self.create(width=200, height=100)
+
+        self.assertEqual(self.sizes(plant.image_variants), {"160": (160, 80)})
+        smaller = self.create(width=100, height=50, color="red")
+        self.assertEqual(self.sizes(smaller.image_variants), {"100": (100, 50)})
+
+    def test_replacing_the_image_regenerates_its_variants(self):
+        plant = self.create(width=400, height=300)
+        old = set(plant.image_variants["widths"].values())
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.patch(
+                f"/plants/{plant.id}/",
+                {"image": upload(width=400, height=300, color="red")},
+                format="multipart",
+            )
+
+        self.assertEqual(response.status_code, 200)
+        plant.refresh_from_db()
+        new = set(plant.image_variants["widths"].values())
+        self.assertEqual(plant.image_variants["source"], plant.image.name)
+        self.assertEqual(len(new), 2)
+        self.assertFalse(old & new)
+        self.assertEqual([self.refcount(name) for name in old], [0, 0])
+        self.gc("--grace", "0")
+        self.assertEqual(self.files(), sorted([plant.image.name, *new]))
+
+    def test_deleting_the_row_removes_its_variants(self):
+        plant = self.create(width=400, height=300)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            plant.delete()
+
+        self.assertFalse(Blob.objects.filter(refcount__gt=0).exists())
+        self.gc("--grace", "0")
+        self.assertEqual(self.files(), [])
+
+    def test_command_fills_in_missing_variants(self):
+        plant = self.create(width=400, height=300)
+        expected = plant.image_variants
+        UserPlant.objects.filter(pk=plant.pk).update(image_variants={})
+
+        out = io.StringIO()
+        call_command("generate_image_variants", stdout=out)
+        call_command("generate_image_variants", stdout=out)
+
+        plant.refresh_from_db()
+        self.assertEqual(plant.image_variants, expected)
+        self.assertEqual(
+            out.getvalue().count("plants.UserPlant: generated variants for 1 images"),
+            1,
+        )
+        self.assertIn(
+            "plants.UserPlant: generated variants for 0 images", out.getvalue()
+        )
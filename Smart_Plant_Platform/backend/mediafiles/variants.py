@@ -0,0 +1,134 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Models whose ``image`` gets resized variants recorded in ``image_variants``
+VARIANT_MODELS = ("plants.UserPlant", "plants.GrowthRecord", "store.Product")
+
+# Sent after a row's variants are recorded, which bypasses post_save
+variants_built = Signal()
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_VARIANT_WORKERS,
+            thread_name_prefix="image-variants",
+        )
+    return _executor
+
+
+def variant_name(source, width, extension):
+    directory, filename = os.path.split(source)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, "variants", f"{stem}_{width}w.{extension}")
+
+
+def render_variants(image_file):
+    """
+    Yield ``(width, bytes)`` for every configured width narrower than the
+    original, or a single re-encode at the original width if it is already
+    small. Orientation is applied and EXIF is dropped along the way.
+    """
+    image_file.open("rb")
+    with Image.open(image_file) as image:
+        widest = max(settings.IMAGE_VARIANT_WIDTHS)
+        # Let JPEG decode at a reduced scale when the original is huge
+        image.draft("RGB", (widest, widest * image.height // image.width))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        widths = sorted(
+            (w for w in settings.IMAGE_VARIANT_WIDTHS if w < image.width),
+            reverse=True,
+        ) or [image.width]
+        for width in widths:
+            # Each size is scaled down from the previous, larger one
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+            buffer = BytesIO()
+            image.save(
+                buffer,
+                format=settings.IMAGE_VARIANT_FORMAT,
+                quality=settings.IMAGE_VARIANT_QUALITY,
+                method=4,
+            )
+            yield width, buffer.getvalue()
+
+
+def generate_variants(field_file):
+    """Write the variants of an image and return the map to store on the model."""
+    extension = settings.IMAGE_VARIANT_FORMAT.lower()
+    widths = {}
+    for width, data in render_variants(field_file):
+        name = variant_name(field_file.name, width, extension)
+        widths[str(width)] = field_file.storage.save(name, ContentFile(data))
+    widths = dict(sorted(widths.items(), key=lambda item: int(item[0])))
+    return {"source": field_file.name, "format": extension, "widths": widths}
+
+
+def delete_variants(storage, variants):
+    for name in (variants or {}).get("widths", {}).values():
+        try:
+            storage.delete(name)
+        except OSError:
+            logger.warning("Could not delete image variant %s", name)
+
+
+def build_variants(model_label, pk, source):
+    """
+    Generate and record the variants for one stored image. Does nothing if
+    the image has since been replaced, and cleans up after itself if it is
+    replaced while the variants are being written.
+    """
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).only("image", "image_variants").first()
+    if instance is None or instance.image.name != source:
+        return None
+
+    storage = instance.image.storage
+    variants = generate_variants(instance.image)
+    # Bump updated_at so delta-syncing clients pick up the new srcset
+    updated = model.objects.filter(pk=pk, image=source).update(
+        image_variants=variants, updated_at=timezone.now()
+    )
+    if not updated:
+        delete_variants(storage, variants)
+        return None
+    # Regenerating leaves the previous set behind under different names
+    delete_variants(storage, instance.image_variants)
+    variants_built.send(sender=model, pk=pk, variants=variants)
+    return variants
+
+
+def run_in_background(model_label, pk, source):
+    try:
+        build_variants(model_label, pk, source)
+    except Exception:
+        logger.exception("Image variants failed for %s %s", model_label, pk)
+    finally:
+        connections.close_all()
+
+
+def schedule_variants(instance):
+    """Queue variant generation for once the current transaction commits."""
+    args = (instance._meta.label, instance.pk, instance.image.name)
+    if settings.IMAGE_VARIANTS_SYNC:
+        transaction.on_commit(lambda: build_variants(*args))
+    else:
+        transaction.on_commit(lambda: get_executor().submit(run_in_background, *args))
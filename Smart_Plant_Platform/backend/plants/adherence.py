@@ -0,0 +1,105 @@
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import CareEvent, CareRoutine
+
+
+def replay(routine, events):
+    """Rebuild a routine's counters from its events, oldest first."""
+    routine.reset_stats()
+    for event in events:
+        routine.apply_completion(event)
+    return routine
+
+
+def recomputed_stats(routines):
+    """
+    Map each routine id to the counters its event log implies, reading all of
+    the routines' events in one ordered query.
+    """
+    by_id = {routine.id: routine for routine in routines}
+    events = (
+        CareEvent.objects.filter(routine_id__in=by_id)
+        .order_by("routine_id", "performed_at", "id")
+        .only("routine_id", "performed_at", "due_at")
+    )
+    stats = {
+        routine_id: dict.fromkeys(CareRoutine.STAT_FIELDS, 0) for routine_id in by_id
+    }
+    for routine_id, routine_events in groupby(events, key=lambda e: e.routine_id):
+        scratch = replay(CareRoutine(), routine_events)
+        stats[routine_id] = {
+            name: getattr(scratch, name) for name in CareRoutine.STAT_FIELDS
+        }
+    return stats
+
+
+def iter_routine_batches(batch_size):
+    """Walk all routines in primary-key order, locking each batch."""
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                CareRoutine.objects.select_for_update()
+                .filter(id__gt=last_id)
+                .order_by("id")
+                .only("id", *CareRoutine.STAT_FIELDS)[:batch_size]
+            )
+            if not batch:
+                return
+            yield batch
+        last_id = batch[-1].id
+
+
+def stats_mismatch(routine, expected):
+    return {
+        name: (getattr(routine, name), value)
+        for name, value in expected.items()
+        if abs(getattr(routine, name) - value) > 1e-6
+    }
+
+
+def check_stats(batch_size=1000, fix=False):
+    """
+    Compare every routine's stored counters against a replay of its events.
+    Yields ``(routine_id, {field: (stored, expected)})`` for each mismatch and
+    writes the expected values back when ``fix`` is set.
+    """
+    for batch in iter_routine_batches(batch_size):
+        expected = recomputed_stats(batch)
+        broken = []
+        for routine in batch:
+            mismatch = stats_mismatch(routine, expected[routine.id])
+            if mismatch:
+                yield routine.id, mismatch
+                for name, value in expected[routine.id].items():
+                    setattr(routine, name, value)
+                broken.append(routine)
+        if fix and broken:
+            CareRoutine.objects.bulk_update(broken, CareRoutine.STAT_FIELDS)
+
+
+def backfill_events(batch_size=1000):
+    """
+    Record an event for the last completion of every routine that was
+    performed before the event log existed. Only ``last_performed`` survives
+    from that time, so each routine gets at most one event, with no due date.
+    """
+    has_events = CareEvent.objects.filter(routine=OuterRef("pk"))
+    routines = (
+        CareRoutine.objects.filter(last_performed__isnull=False)
+        .filter(~Exists(has_events))
+        .order_by("id")
+        .values_list("id", "last_performed")
+    )
+    created = 0
+    batch = []
+    for routine_id, performed_at in routines.iterator(chunk_size=batch_size):
+        batch.append(CareEvent(routine_id=routine_id, performed_at=performed_at))
+        if len(batch) >= batch_size:
+            created += len(CareEvent.objects.bulk_create(batch))
+            batch = []
+    created += len(CareEvent.objects.bulk_create(batch))
+    return created
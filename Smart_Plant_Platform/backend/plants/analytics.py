@@ -0,0 +1,208 @@
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import GrowthRecord
+
+METRICS = ("height", "width", "num_leaves")
+SECONDS_PER_DAY = 86400
+# Rates between measurements taken closer together than this are too noisy
+# to score, so the gap is clamped before dividing.
+MIN_RATE_INTERVAL_DAYS = 1 / 24
+# Modified z-score cut-off (Iglewicz and Hoaglin) for flagging a jump
+ANOMALY_THRESHOLD = 3.5
+MAX_ANOMALIES = 100
+
+
+def version_key(user_id):
+    return f"plants:analytics:version:{user_id}"
+
+
+def analytics_version(user_id):
+    return cache.get_or_set(version_key(user_id), 1, timeout=None)
+
+
+def invalidate_analytics(user_id):
+    """Orphan every cached analytics result for a user's plants."""
+    try:
+        cache.incr(version_key(user_id))
+    except ValueError:
+        cache.set(version_key(user_id), 1, timeout=None)
+
+
+def cached(user_id, name, compute):
+    key = f"plants:analytics:{user_id}:v{analytics_version(user_id)}:{name}"
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        cache.set(key, result, settings.GROWTH_ANALYTICS_CACHE_TIMEOUT)
+    return result
+
+
+def load_records(plant_ids):
+    """
+    Read the measurements of the given plants into NumPy arrays, ordered by
+    plant and time. Missing measurements come back as NaN.
+    """
+    rows = (
+        GrowthRecord.objects.filter(plant_id__in=plant_ids)
+        .order_by("plant_id", "recorded_at", "id")
+        .values_list("plant_id", "recorded_at", *METRICS)
+    )
+    rows = list(rows.iterator(chunk_size=5000))
+    count = len(rows)
+    plant = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+    seconds = np.fromiter(
+        (row[1].timestamp() for row in rows), dtype=np.float64, count=count
+    )
+    values = np.array([row[2:] for row in rows], dtype=np.float64).reshape(
+        count, len(METRICS)
+    )
+    return plant, seconds, values
+
+
+def rolling_mean(values, window):
+    """Trailing mean over the last ``window`` values, shorter at the start."""
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    end = np.arange(1, len(values) + 1)
+    start = np.maximum(end - window, 0)
+    return (sums[end] - sums[start]) / (end - start)
+
+
+def growth_rates(seconds, values):
+    """Change per day between consecutive measurements."""
+    days = np.maximum(np.diff(seconds) / SECONDS_PER_DAY, MIN_RATE_INTERVAL_DAYS)
+    return np.diff(values) / days
+
+
+def anomaly_scores(rates):
+    """
+    Robust z-scores of the growth rates, using the median and the median
+    absolute deviation so a few bad readings don't hide themselves.
+    """
+    if len(rates) < 3:
+        return np.zeros_like(rates)
+    deviation = rates - np.median(rates)
+    mad = np.median(np.abs(deviation))
+    if mad == 0:
+        mad = np.mean(np.abs(deviation)) / 0.7979
+    if mad == 0:
+        return np.zeros_like(rates)
+    return 0.6745 * deviation / mad
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling. Returns the indices of the
+    ``threshold`` points that best preserve the visual shape of the series.
+    """
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+
+    edges = np.linspace(1, count - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else count
+        next_start = end if bucket + 2 < len(edges) else count - 1
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        px, py = x[previous], y[previous]
+        area = np.abs(
+            (px - avg_x) * (y[start:end] - py) - (px - x[start:end]) * (avg_y - py)
+        )
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def iso(seconds):
+    return str(
+        np.datetime_as_string(
+            np.datetime64(int(seconds * 1000), "ms"), unit="s", timezone="UTC"
+        )
+    )
+
+
+def metric_summary(seconds, values, window, points):
+    """Growth statistics and a chart-ready series for one metric."""
+    present = ~np.isnan(values)
+    seconds, values = seconds[present], values[present]
+    if not len(values):
+        return None
+
+    rolling = rolling_mean(values, window)
+    summary = {
+        "count": int(len(values)),
+        "first": float(values[0]),
+        "latest": float(values[-1]),
+        "change": float(values[-1] - values[0]),
+        "rolling_mean": float(rolling[-1]),
+        "rate_per_day": None,
+        "recent_rate_per_day": None,
+        "anomalies": [],
+    }
+
+    if len(values) > 1 and seconds[-1] > seconds[0]:
+        days = (seconds - seconds[0]) / SECONDS_PER_DAY
+        summary["rate_per_day"] = float(np.polyfit(days, values, 1)[0])
+        rates = growth_rates(seconds, values)
+        summary["recent_rate_per_day"] = float(rates[-window:].mean())
+
+        scores = anomaly_scores(rates)
+        flagged = np.flatnonzero(np.abs(scores) > ANOMALY_THRESHOLD)
+        if len(flagged) > MAX_ANOMALIES:
+            strongest = np.argsort(-np.abs(scores[flagged]))[:MAX_ANOMALIES]
+            flagged = np.sort(flagged[strongest])
+        summary["anomalies"] = [
+            {
+                "recorded_at": iso(seconds[i + 1]),
+                "value": float(values[i + 1]),
+                "rate_per_day": float(rates[i]),
+                "score": round(float(scores[i]), 2),
+            }
+            for i in flagged
+        ]
+
+    keep = lttb(seconds, values, points)
+    # [epoch milliseconds, value, rolling mean] triples keep the payload small
+    summary["series"] = np.column_stack(
+        (np.round(seconds[keep] * 1000), values[keep], np.round(rolling[keep], 3))
+    ).tolist()
+    for point in summary["series"]:
+        point[0] = int(point[0])
+    return summary
+
+
+def plant_summary(plant, seconds, values, window, points):
+    return {
+        "plant": plant.id,
+        "name": plant.name,
+        "record_count": int(len(seconds)),
+        "first_recorded_at": iso(seconds[0]) if len(seconds) else None,
+        "last_recorded_at": iso(seconds[-1]) if len(seconds) else None,
+        "metrics": {
+            metric: metric_summary(seconds, values[:, column], window, points)
+            for column, metric in enumerate(METRICS)
+        },
+    }
+
+
+def growth_analytics(plants, window, points):
+    """
+    Analytics for each of ``plants``, computed from a single ordered read of
+    their growth records.
+    """
+    plants = list(plants)
+    plant_ids, seconds, values = load_records([plant.id for plant in plants])
+    # Each plant's records are a contiguous run in the ordered arrays
+    starts = np.searchsorted(plant_ids, [plant.id for plant in plants], "left")
+    ends = np.searchsorted(plant_ids, [plant.id for plant in plants], "right")
+    return [
+        plant_summary(plant, seconds[start:end], values[start:end], window, points)
+        for plant, start, end in zip(plants, starts, ends)
+    ]
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from plants.adherence import backfill_events, check_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed the care event log from last_performed for routines completed "
+        "before it existed, then rebuild their adherence counters"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        created = backfill_events(batch_size=options["batch_size"])
+        rebuilt = sum(1 for _ in check_stats(options["batch_size"], fix=True))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {created} care events, rebuilt stats for {rebuilt} routines"
+            )
+        )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from plants.adherence import check_stats
+
+
+class Command(BaseCommand):
+    help = "Verify the per-routine adherence counters against the care event log"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Overwrite mismatched counters with the values from the log",
+        )
+
+    def handle(self, *args, **options):
+        mismatched = 0
+        for routine_id, mismatch in check_stats(options["batch_size"], options["fix"]):
+            mismatched += 1
+            details = ", ".join(
+                f"{name} {stored} != {expected}"
+                for name, (stored, expected) in mismatch.items()
+            )
+            self.stdout.write(f"Routine {routine_id}: {details}")
+
+        if not mismatched:
+            self.stdout.write(self.style.SUCCESS("All care stats are consistent"))
+        elif options["fix"]:
+            self.stdout.write(self.style.SUCCESS(f"Fixed {mismatched} routines"))
+        else:
+            self.stdout.write(
+                self.style.WARNING(f"{mismatched} routines are inconsistent")
+            )
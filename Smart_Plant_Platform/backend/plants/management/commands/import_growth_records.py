@@ -0,0 +1,60 @@
+import json
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from plants.imports import detect_format, import_growth_records
+from plants.models import UserPlant
+
+
+class Command(BaseCommand):
+    help = "Bulk import growth records from a CSV or JSONL file ('-' for stdin)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--user", required=True, help="Email of the owner")
+        parser.add_argument(
+            "--plant",
+            type=int,
+            default=None,
+            help="Import every row into this plant instead of a plant column",
+        )
+        parser.add_argument("--format", choices=["csv", "jsonl"], default=None)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options["user"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+        plant = None
+        if options["plant"] is not None:
+            plant = UserPlant.objects.filter(user=user, pk=options["plant"]).first()
+            if plant is None:
+                raise CommandError(f"{user.email} has no plant {options['plant']}")
+
+        path = options["path"]
+        try:
+            fmt = detect_format(
+                path, options["format"] or ("jsonl" if path == "-" else None)
+            )
+        except ValueError as e:
+            raise CommandError(e)
+
+        started = time.monotonic()
+        stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+        with stream:
+            report = import_growth_records(
+                user, stream, fmt, plant=plant, batch_size=options["batch_size"]
+            )
+
+        for error in report.errors:
+            self.stderr.write(json.dumps(error))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {report.created} records, {report.failed} rows failed, "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from plants.schedule import extend_windows
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll the stored care occurrence window forward for routines whose "
+        "window is about to run out"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Rebuild the window of every routine, not just the stale ones",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep running, extending windows every N seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            refreshed, created = extend_windows(
+                batch_size=options["batch_size"], force=options["all"]
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Refreshed {refreshed} routines ({created} occurrences)"
+                )
+            )
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from plants.reminders import dispatch_care_reminders
+
+
+class Command(BaseCommand):
+    help = "Email each user a digest of their due care routines"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user-chunk",
+            type=int,
+            default=1000,
+            help="Number of users scanned per query",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of digests handed to the mail server per batch",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=None,
+            help="Emails per second, 0 for no limit (default CARE_REMINDER_MAX_PER_SECOND)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=None,
+            help="Keep running and dispatch every INTERVAL seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            digests, routines = dispatch_care_reminders(
+                user_chunk=options["user_chunk"],
+                batch_size=options["batch_size"],
+                rate=options["rate"],
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Sent {digests} digests covering {routines} routines "
+                    f"in {time.monotonic() - started:.1f}s"
+                )
+            )
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
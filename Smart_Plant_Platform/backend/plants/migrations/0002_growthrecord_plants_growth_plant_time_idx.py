@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-19 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='growthrecord',
+            index=models.Index(fields=['plant', 'recorded_at'], name='plants_growth_plant_time_idx'),
+        ),
+    ]
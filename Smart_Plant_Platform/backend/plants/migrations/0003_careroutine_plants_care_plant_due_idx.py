@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-19 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plants', '0002_growthrecord_plants_growth_plant_time_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='careroutine',
+            index=models.Index(fields=['plant', 'next_due'], name='plants_care_plant_due_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.6 on 2026-10-19 14:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plants', '0003_careroutine_plants_care_plant_due_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CareReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_at', models.DateTimeField()),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+                ('routine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='plants.careroutine')),
+            ],
+            options={
+                'unique_together': {('routine', 'due_at')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-19 14:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plants", "0004_carereminder"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="growthrecord",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="userplant",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-19 14:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plants", "0005_growthrecord_image_variants_userplant_image_variants"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="growthrecord",
+            name="recorded_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
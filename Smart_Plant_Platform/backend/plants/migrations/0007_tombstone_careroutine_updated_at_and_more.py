@@ -0,0 +1,77 @@
+# Generated by Django 5.1.6 on 2026-10-19 14:43
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plants", "0006_alter_growthrecord_recorded_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model", models.CharField(max_length=50)),
+                ("object_id", models.BigIntegerField()),
+                ("deleted_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="careroutine",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="growthrecord",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="careroutine",
+            index=models.Index(fields=["updated_at"], name="plants_care_sync_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="growthrecord",
+            index=models.Index(fields=["updated_at"], name="plants_growth_sync_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="plantnote",
+            index=models.Index(fields=["updated_at"], name="plants_note_sync_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="userplant",
+            index=models.Index(
+                fields=["user", "updated_at"], name="plants_plant_user_sync_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="tombstone",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(
+                fields=["user", "deleted_at"], name="plants_tombstone_sync_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-19 14:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plants", "0009_careroutine_materialized_until_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="plantnote",
+            index=models.Index(
+                fields=["plant", "created_at"], name="plants_note_plant_time_idx"
+            ),
+        ),
+    ]
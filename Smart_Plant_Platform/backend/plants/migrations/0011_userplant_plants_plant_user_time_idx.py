@@ -0,0 +1,21 @@
+# Generated by Django 5.1.6 on 2026-10-19 15:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("plants", "0010_plantnote_plants_note_plant_time_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="userplant",
+            index=models.Index(
+                fields=["user", "created_at", "id"], name="plants_plant_user_time_idx"
+            ),
+        ),
+    ]
@@ -1,6 +1,12 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
+from .recurrence import CUSTOM, next_occurrence
+
 User = get_user_model()
 
 
@@ -9,9 +15,18 @@ class UserPlant(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to="plants/", null=True, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "updated_at"], name="plants_plant_user_sync_idx"),
+            models.Index(
+                fields=["user", "created_at", "id"], name="plants_plant_user_time_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.user.username}'s {self.name}"
 
@@ -24,6 +39,12 @@ class PlantNote(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["plant", "created_at"], name="plants_note_plant_time_idx"
+            ),
+            models.Index(fields=["updated_at"], name="plants_note_sync_idx"),
+        ]
 
     def __str__(self):
         return f"Note for {self.plant.name}"
@@ -35,6 +56,7 @@ class CareRoutine(models.Model):
         ("weekly", "Weekly"),
         ("biweekly", "Bi-weekly"),
         ("monthly", "Monthly"),
+        (CUSTOM, "Custom"),
     ]
 
     plant = models.ForeignKey(
@@ -42,13 +64,147 @@ class CareRoutine(models.Model):
     )
     task = models.CharField(max_length=100)  # e.g., "Watering", "Fertilizing"
     frequency = models.CharField(max_length=20, choices=FREQUENCY_CHOICES)
+    # RRULE used when frequency is "custom", e.g. "FREQ=DAILY;INTERVAL=3"
+    recurrence = models.CharField(max_length=200, blank=True)
     instructions = models.TextField()
     last_performed = models.DateTimeField(null=True, blank=True)
     next_due = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Adherence counters, maintained incrementally by mark_performed
+    completion_count = models.PositiveIntegerField(default=0)
+    scheduled_count = models.PositiveIntegerField(default=0)
+    on_time_count = models.PositiveIntegerField(default=0)
+    delay_total = models.FloatField(default=0)  # seconds late, summed
+    current_streak = models.PositiveIntegerField(default=0)
+    longest_streak = models.PositiveIntegerField(default=0)
+    # End of the window stored in CareOccurrence for this routine
+    materialized_until = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["plant", "next_due"], name="plants_care_plant_due_idx"),
+            models.Index(fields=["updated_at"], name="plants_care_sync_idx"),
+        ]
 
     def __str__(self):
         return f"{self.task} for {self.plant.name}"
 
+    def next_due_after(self, moment):
+        return next_occurrence(self.frequency, self.recurrence, moment)
+
+    STAT_FIELDS = [
+        "completion_count",
+        "scheduled_count",
+        "on_time_count",
+        "delay_total",
+        "current_streak",
+        "longest_streak",
+    ]
+
+    def mark_performed(self, moment):
+        """
+        Complete the routine at ``moment``: update the adherence counters and
+        schedule the next occurrence. Returns the unsaved CareEvent to store
+        alongside the routine.
+        """
+        event = CareEvent(routine=self, performed_at=moment, due_at=self.next_due)
+        self.apply_completion(event)
+        self.last_performed = moment
+        self.next_due = self.next_due_after(moment)
+        return event
+
+    def apply_completion(self, event):
+        """
+        Fold one completion into the counters. A completion is on time if it
+        happens within CARE_ON_TIME_GRACE_HOURS of its due date; completions
+        with no due date extend the streak but don't count towards the rate.
+        """
+        self.completion_count += 1
+        on_time = True
+        if event.due_at is not None:
+            grace = timedelta(hours=settings.CARE_ON_TIME_GRACE_HOURS)
+            lateness = (event.performed_at - event.due_at).total_seconds()
+            on_time = event.performed_at <= event.due_at + grace
+            self.scheduled_count += 1
+            self.on_time_count += on_time
+            self.delay_total += max(lateness, 0)
+        self.current_streak = self.current_streak + 1 if on_time else 0
+        self.longest_streak = max(self.longest_streak, self.current_streak)
+
+    def reset_stats(self):
+        for name in self.STAT_FIELDS:
+            setattr(self, name, 0)
+
+    @property
+    def on_time_rate(self):
+        if not self.scheduled_count:
+            return None
+        return self.on_time_count / self.scheduled_count
+
+    @property
+    def mean_delay_hours(self):
+        if not self.scheduled_count:
+            return None
+        return self.delay_total / self.scheduled_count / 3600
+
+
+class CareOccurrence(models.Model):
+    """
+    An upcoming due date of a care routine, materialized so calendar views
+    are a range scan on (user, due_at). Rebuilt per routine by
+    plants.schedule.materialize.
+    """
+
+    routine = models.ForeignKey(
+        CareRoutine, on_delete=models.CASCADE, related_name="occurrences"
+    )
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    due_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "due_at"], name="plants_care_calendar_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.routine} due {self.due_at}"
+
+
+class CareEvent(models.Model):
+    """One completion of a care routine; rows are only ever appended."""
+
+    routine = models.ForeignKey(
+        CareRoutine, on_delete=models.CASCADE, related_name="events", db_index=False
+    )
+    performed_at = models.DateTimeField()
+    due_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["routine", "performed_at"], name="plants_care_event_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.routine} performed {self.performed_at}"
+
+
+class CareReminder(models.Model):
+    """A reminder that was emailed for one due occurrence of a routine."""
+
+    routine = models.ForeignKey(
+        CareRoutine, on_delete=models.CASCADE, related_name="reminders"
+    )
+    due_at = models.DateTimeField()
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("routine", "due_at")
+
+    def __str__(self):
+        return f"Reminder for {self.routine} due {self.due_at}"
+
 
 class GrowthRecord(models.Model):
     plant = models.ForeignKey(
@@ -59,10 +215,35 @@ class GrowthRecord(models.Model):
     num_leaves = models.IntegerField(null=True, blank=True)
     notes = models.TextField(blank=True)
     image = models.ImageField(upload_to="growth_records/", null=True, blank=True)
-    recorded_at = models.DateTimeField(auto_now_add=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    recorded_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-recorded_at"]
+        indexes = [
+            models.Index(
+                fields=["plant", "recorded_at"], name="plants_growth_plant_time_idx"
+            ),
+            models.Index(fields=["updated_at"], name="plants_growth_sync_idx"),
+        ]
 
     def __str__(self):
         return f"Growth record for {self.plant.name} on {self.recorded_at.date()}"
+
+
+class Tombstone(models.Model):
+    """Marks a deleted plant-tree row so delta sync can tell clients about it."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "deleted_at"], name="plants_tombstone_sync_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted {self.deleted_at}"
@@ -0,0 +1,108 @@
+from datetime import MAXYEAR
+
+from dateutil.relativedelta import relativedelta
+from dateutil.rrule import rrulestr
+from django.utils import timezone
+
+CUSTOM = "custom"
+# Calendar steps, so "monthly" lands on the same day of the next month
+PRESET_STEPS = {
+    "daily": relativedelta(days=1),
+    "weekly": relativedelta(weeks=1),
+    "biweekly": relativedelta(weeks=2),
+    "monthly": relativedelta(months=1),
+}
+ALLOWED_FREQUENCIES = {"DAILY", "WEEKLY", "MONTHLY", "YEARLY"}
+# Parts that would pin the rule to a fixed start or schedule several times a
+# day. Rules are re-anchored on every completion, so neither makes sense.
+REJECTED_PARTS = {"DTSTART", "COUNT", "BYHOUR", "BYMINUTE", "BYSECOND"}
+# How far ahead a rule has to occur. Leap-day rules can go eight years without
+# one; sparser or impossible rules are refused instead of scanned to year 9999.
+RULE_HORIZON = relativedelta(years=10)
+
+
+def normalize_rule(text):
+    """
+    Validate an RRULE such as ``FREQ=WEEKLY;BYDAY=MO,TH;BYMONTH=4,5,6,7,8,9``
+    and return it in canonical form. Raises ValueError if it can't be used.
+    """
+    text = text.strip().upper().removeprefix("RRULE:")
+    parts = {}
+    for part in filter(None, text.split(";")):
+        name, sep, value = part.partition("=")
+        if not sep or not value:
+            raise ValueError(f"Malformed rule part '{part}'")
+        parts[name] = value
+    if parts.get("FREQ") not in ALLOWED_FREQUENCIES:
+        raise ValueError(
+            "FREQ must be one of " + ", ".join(sorted(ALLOWED_FREQUENCIES))
+        )
+    rejected = REJECTED_PARTS & parts.keys()
+    if rejected:
+        raise ValueError(f"{', '.join(sorted(rejected))} is not supported")
+    interval = parts.get("INTERVAL", "1")
+    if not interval.isdigit() or int(interval) < 1:
+        raise ValueError("INTERVAL must be a whole number of at least 1")
+    text = ";".join(f"{name}={value}" for name, value in parts.items())
+    now = timezone.localtime()
+    if following(rrulestr(text, dtstart=now), now) is None:
+        raise ValueError(
+            f"The rule doesn't occur in the next {RULE_HORIZON.years} years"
+        )
+    return text
+
+
+def following(parsed, moment):
+    """
+    The first occurrence of a parsed rule after ``moment``, re-anchored at
+    ``moment``, or None if there is none within RULE_HORIZON.
+    """
+    if parsed._interval < 1:
+        return None
+    until = moment + RULE_HORIZON
+    if parsed._until is not None:
+        until = min(until, parsed._until)
+    # dateutil only checks UNTIL against dates that match, so a rule that
+    # never matches is scanned period by period up to year 9999. Try the same
+    # window first a multiple of 400 years later, where the calendar repeats
+    # and the scan runs out within a few centuries.
+    shift = relativedelta(years=(MAXYEAR - until.year) // 400 * 400)
+    probe = parsed.replace(dtstart=moment + shift, until=until + shift)
+    if probe.after(moment + shift) is None:
+        return None
+    return parsed.replace(dtstart=moment, until=until).after(moment)
+
+
+def next_occurrence(frequency, rule, moment):
+    """
+    When a routine is next due if it was performed at ``moment``, or None if
+    its rule has run out. Dates are worked out in local time so the time of
+    day survives DST changes.
+    """
+    moment = timezone.localtime(moment)
+    if frequency == CUSTOM:
+        return following(rrulestr(rule, dtstart=moment), moment) if rule else None
+    step = PRESET_STEPS.get(frequency)
+    return moment + step if step else None
+
+
+def iter_occurrences(frequency, rule, start):
+    """
+    The due dates that follow ``start`` if every occurrence is performed on
+    time. Parses a custom rule once and re-anchors it at each step.
+    """
+    current = timezone.localtime(start)
+    if frequency != CUSTOM:
+        step = PRESET_STEPS.get(frequency)
+        while step:
+            current += step
+            yield current
+        return
+    if not rule:
+        return
+    parsed = rrulestr(rule, dtstart=current)
+    while True:
+        current = following(parsed, current)
+        if current is None:
+            return
+        yield current
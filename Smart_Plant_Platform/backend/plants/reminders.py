@@ -0,0 +1,120 @@
+import time
+from itertools import groupby
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import CareReminder, CareRoutine
+
+User = get_user_model()
+
+
+class RateLimiter:
+    """Spaces out sends so no more than ``rate`` messages go out per second."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_slot = time.monotonic()
+
+    def wait(self, count):
+        now = time.monotonic()
+        if self.next_slot > now:
+            time.sleep(self.next_slot - now)
+        self.next_slot = max(now, self.next_slot) + count * self.interval
+
+
+def due_routines(user_ids, now):
+    """Due routines for a chunk of users that haven't been reminded yet."""
+    already_sent = CareReminder.objects.filter(
+        routine=OuterRef("pk"), due_at=OuterRef("next_due")
+    )
+    return (
+        CareRoutine.objects.filter(plant__user_id__in=user_ids, next_due__lte=now)
+        .filter(~Exists(already_sent))
+        .select_related("plant", "plant__user")
+        .order_by("plant__user_id", "next_due", "id")
+    )
+
+
+def build_digest(user, routines):
+    lines = [
+        f"- {routine.task} for {routine.plant.name} "
+        f"(due {timezone.localtime(routine.next_due):%b %d, %H:%M})"
+        for routine in routines
+    ]
+    body = (
+        f"Hi {user.username},\n\n"
+        f"These plants are waiting on you:\n\n" + "\n".join(lines) + "\n\n"
+        f"Mark them as done at {settings.FRONTEND_URL}/track"
+    )
+    count = len(routines)
+    subject = f"{count} plant care task{'s' if count != 1 else ''} due"
+    return EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [user.email])
+
+
+def dispatch_care_reminders(now=None, user_chunk=1000, batch_size=100, rate=None):
+    """
+    Send one digest per user for every routine that is due and not yet
+    reminded, over a single reused SMTP connection.
+
+    Users are walked in primary-key chunks, so each query only touches the
+    plants and routines of that chunk through the user and (plant, next_due)
+    indexes. Reminders are recorded per batch once the batch is accepted by
+    the mail server, so a rerun never sends the same due occurrence twice.
+    Returns ``(digests_sent, routines_reminded)``.
+    """
+    now = now or timezone.now()
+    if rate is None:
+        rate = settings.CARE_REMINDER_MAX_PER_SECOND
+    limiter = RateLimiter(rate)
+    digests_sent = routines_reminded = 0
+
+    connection = get_connection()
+    connection.open()
+    try:
+        batch, batch_routines = [], []
+
+        def flush():
+            nonlocal digests_sent, routines_reminded
+            if not batch:
+                return
+            limiter.wait(len(batch))
+            connection.send_messages(batch)
+            CareReminder.objects.bulk_create(
+                [
+                    CareReminder(routine=routine, due_at=routine.next_due)
+                    for routine in batch_routines
+                ],
+                ignore_conflicts=True,
+            )
+            digests_sent += len(batch)
+            routines_reminded += len(batch_routines)
+            batch.clear()
+            batch_routines.clear()
+
+        last_user_id = 0
+        while True:
+            user_ids = list(
+                User.objects.filter(id__gt=last_user_id, is_active=True)
+                .order_by("id")
+                .values_list("id", flat=True)[:user_chunk]
+            )
+            if not user_ids:
+                break
+            last_user_id = user_ids[-1]
+
+            routines = due_routines(user_ids, now)
+            for _, user_routines in groupby(routines, key=lambda r: r.plant.user_id):
+                user_routines = list(user_routines)
+                batch.append(build_digest(user_routines[0].plant.user, user_routines))
+                batch_routines.extend(user_routines)
+                if len(batch) >= batch_size:
+                    flush()
+        flush()
+    finally:
+        connection.close()
+
+    return digests_sent, routines_reminded
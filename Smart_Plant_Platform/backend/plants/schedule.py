@@ -0,0 +1,77 @@
+from datetime import timedelta
+from itertools import takewhile
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import CareOccurrence, CareRoutine
+from .recurrence import iter_occurrences
+
+
+def horizon(now):
+    return now + timedelta(days=settings.CARE_OCCURRENCE_HORIZON_DAYS)
+
+
+def occurrence_dates(routine, now, until):
+    """
+    The routine's current due date, overdue or not, followed by the projected
+    dates up to ``until``. Projections that already lie in the past are
+    dropped, since they assume completions that never happened.
+    """
+    if routine.next_due is None or routine.next_due >= until:
+        return []
+    projected = takewhile(
+        lambda due: due < until,
+        iter_occurrences(routine.frequency, routine.recurrence, routine.next_due),
+    )
+    return [routine.next_due] + [due for due in projected if due >= now]
+
+
+def materialize(routines, now=None):
+    """
+    Replace the stored upcoming occurrences of ``routines`` with a fresh
+    window running to CARE_OCCURRENCE_HORIZON_DAYS from now.
+    """
+    now = now or timezone.now()
+    until = horizon(now)
+    routines = list(routines)
+    rows = [
+        CareOccurrence(routine_id=routine.id, user_id=routine.plant.user_id, due_at=due)
+        for routine in routines
+        for due in occurrence_dates(routine, now, until)
+    ]
+    routine_ids = [routine.id for routine in routines]
+    with transaction.atomic():
+        CareOccurrence.objects.filter(routine_id__in=routine_ids).delete()
+        CareOccurrence.objects.bulk_create(rows, batch_size=1000)
+        # Plain update, so updated_at (and delta sync) is left alone
+        CareRoutine.objects.filter(id__in=routine_ids).update(materialized_until=until)
+    return len(rows)
+
+
+def stale_routines(now, force=False):
+    """Routines whose window ends within CARE_OCCURRENCE_REFRESH_DAYS."""
+    routines = CareRoutine.objects.select_related("plant").order_by("id")
+    if force:
+        return routines
+    cutoff = horizon(now) - timedelta(days=settings.CARE_OCCURRENCE_REFRESH_DAYS)
+    return routines.filter(
+        Q(materialized_until__isnull=True) | Q(materialized_until__lt=cutoff)
+    )
+
+
+def extend_windows(batch_size=500, force=False, now=None):
+    """Roll the occurrence window forward for every routine that needs it."""
+    now = now or timezone.now()
+    routines = stale_routines(now, force)
+    refreshed = created = 0
+    last_id = 0
+    while True:
+        batch = list(routines.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return refreshed, created
+        created += materialize(batch, now)
+        refreshed += len(batch)
+        last_id = batch[-1].id
@@ -1,5 +1,8 @@
 from rest_framework import serializers
-from .models import UserPlant, PlantNote, CareRoutine, GrowthRecord
+
+from mediafiles.serializers import ImageSrcsetField
+from .models import UserPlant, PlantNote, CareEvent, CareRoutine, GrowthRecord
+from .recurrence import CUSTOM, normalize_rule
 
 
 class PlantNoteSerializer(serializers.ModelSerializer):
@@ -16,14 +19,84 @@ class CareRoutineSerializer(serializers.ModelSerializer):
             "id",
             "task",
             "frequency",
+            "recurrence",
             "instructions",
             "last_performed",
             "next_due",
         ]
         read_only_fields = ["last_performed", "next_due"]
 
+    def validate(self, attrs):
+        frequency = attrs.get("frequency", getattr(self.instance, "frequency", None))
+        if frequency != CUSTOM:
+            attrs["recurrence"] = ""
+            return attrs
+        recurrence = attrs.get("recurrence", getattr(self.instance, "recurrence", ""))
+        if not recurrence:
+            raise serializers.ValidationError(
+                {"recurrence": "A custom frequency needs a recurrence rule."}
+            )
+        try:
+            attrs["recurrence"] = normalize_rule(recurrence)
+        except ValueError as exc:
+            raise serializers.ValidationError({"recurrence": str(exc)})
+        return attrs
+
+
+class DueCareRoutineSerializer(CareRoutineSerializer):
+    plant = serializers.IntegerField(source="plant_id", read_only=True)
+    plant_name = serializers.CharField(source="plant.name", read_only=True)
+
+    class Meta(CareRoutineSerializer.Meta):
+        fields = CareRoutineSerializer.Meta.fields + ["plant", "plant_name"]
+
+
+class CareRoutineStatsSerializer(serializers.ModelSerializer):
+    plant = serializers.IntegerField(source="plant_id", read_only=True)
+    plant_name = serializers.CharField(source="plant.name", read_only=True)
+    on_time_rate = serializers.SerializerMethodField()
+    mean_delay_hours = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CareRoutine
+        fields = [
+            "id",
+            "plant",
+            "plant_name",
+            "task",
+            "frequency",
+            "last_performed",
+            "next_due",
+            "completion_count",
+            "on_time_count",
+            "on_time_rate",
+            "mean_delay_hours",
+            "current_streak",
+            "longest_streak",
+        ]
+        read_only_fields = fields
+
+    def get_on_time_rate(self, obj):
+        rate = obj.on_time_rate
+        return None if rate is None else round(rate, 4)
+
+    def get_mean_delay_hours(self, obj):
+        delay = obj.mean_delay_hours
+        return None if delay is None else round(delay, 2)
+
+
+class CareEventSerializer(serializers.ModelSerializer):
+    task = serializers.CharField(source="routine.task", read_only=True)
+
+    class Meta:
+        model = CareEvent
+        fields = ["id", "routine", "task", "performed_at", "due_at"]
+        read_only_fields = fields
+
 
 class GrowthRecordSerializer(serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField()
+
     class Meta:
         model = GrowthRecord
         fields = [
@@ -33,6 +106,7 @@ class GrowthRecordSerializer(serializers.ModelSerializer):
             "num_leaves",
             "notes",
             "image",
+            "image_srcset",
             "recorded_at",
         ]
         read_only_fields = ["recorded_at"]
@@ -42,6 +116,7 @@ class UserPlantSerializer(serializers.ModelSerializer):
     notes = PlantNoteSerializer(many=True, read_only=True)
     care_routines = CareRoutineSerializer(many=True, read_only=True)
     growth_records = GrowthRecordSerializer(many=True, read_only=True)
+    image_srcset = ImageSrcsetField()
 
     class Meta:
         model = UserPlant
@@ -50,6 +125,7 @@ class UserPlantSerializer(serializers.ModelSerializer):
             "name",
             "description",
             "image",
+            "image_srcset",
             "created_at",
             "updated_at",
             "notes",
@@ -63,3 +139,88 @@ class UserPlantSerializer(serializers.ModelSerializer):
         # Remove user from validated_data if present to avoid duplicate
         validated_data.pop("user", None)
         return UserPlant.objects.create(user=user, **validated_data)
+
+
+class UserPlantListSerializer(serializers.ModelSerializer):
+    """
+    Compact representation for plant lists. Expects the queryset built by
+    UserPlantViewSet.get_queryset for the list action, which annotates the
+    counts and prefetches the latest growth record and next due routine.
+    """
+
+    notes_count = serializers.IntegerField(read_only=True)
+    care_routines_count = serializers.IntegerField(read_only=True)
+    growth_records_count = serializers.IntegerField(read_only=True)
+    latest_growth_record = serializers.SerializerMethodField()
+    next_due_task = serializers.SerializerMethodField()
+    image_srcset = ImageSrcsetField()
+
+    class Meta:
+        model = UserPlant
+        fields = [
+            "id",
+            "name",
+            "description",
+            "image",
+            "image_srcset",
+            "created_at",
+            "updated_at",
+            "notes_count",
+            "care_routines_count",
+            "growth_records_count",
+            "latest_growth_record",
+            "next_due_task",
+        ]
+        read_only_fields = fields
+
+    def get_latest_growth_record(self, obj):
+        records = obj.latest_growth_records
+        if not records:
+            return None
+        return GrowthRecordSerializer(records[0], context=self.context).data
+
+    def get_next_due_task(self, obj):
+        routines = obj.next_due_routines
+        if not routines:
+            return None
+        return CareRoutineSerializer(routines[0], context=self.context).data
+
+
+class SyncPlantSerializer(serializers.ModelSerializer):
+    """Flat plant row for delta sync; children are synced separately."""
+
+    image_srcset = ImageSrcsetField()
+
+    class Meta:
+        model = UserPlant
+        fields = [
+            "id",
+            "name",
+            "description",
+            "image",
+            "image_srcset",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = fields
+
+
+class SyncPlantNoteSerializer(PlantNoteSerializer):
+    plant = serializers.IntegerField(source="plant_id", read_only=True)
+
+    class Meta(PlantNoteSerializer.Meta):
+        fields = PlantNoteSerializer.Meta.fields + ["plant"]
+
+
+class SyncCareRoutineSerializer(CareRoutineSerializer):
+    plant = serializers.IntegerField(source="plant_id", read_only=True)
+
+    class Meta(CareRoutineSerializer.Meta):
+        fields = CareRoutineSerializer.Meta.fields + ["plant", "updated_at"]
+
+
+class SyncGrowthRecordSerializer(GrowthRecordSerializer):
+    plant = serializers.IntegerField(source="plant_id", read_only=True)
+
+    class Meta(GrowthRecordSerializer.Meta):
+        fields = GrowthRecordSerializer.Meta.fields + ["plant", "updated_at"]
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .analytics import invalidate_analytics
+from .models import CareRoutine, GrowthRecord, PlantNote, Tombstone, UserPlant
+from .schedule import materialize
+from .sync import TOMBSTONE_KEYS
+
+User = get_user_model()
+
+# Saving any of these changes when a routine falls due
+SCHEDULE_FIELDS = {"next_due", "frequency", "recurrence"}
+
+
+def cascaded_from(origin, *models):
+    """Whether a delete was started by deleting an instance of ``models``."""
+    if isinstance(origin, QuerySet):
+        return issubclass(origin.model, models)
+    return isinstance(origin, models)
+
+
+def plant_owner(plant_id):
+    return (
+        UserPlant.objects.filter(pk=plant_id).values_list("user_id", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=GrowthRecord)
+def invalidate_growth_analytics(sender, instance, **kwargs):
+    user_id = plant_owner(instance.plant_id)
+    if user_id is not None:
+        invalidate_analytics(user_id)
+
+
+@receiver(post_delete, sender=GrowthRecord)
+def invalidate_deleted_growth_analytics(sender, instance, origin=None, **kwargs):
+    # The plant's own post_delete already invalidates when it cascades here
+    if not cascaded_from(origin, UserPlant, User):
+        invalidate_growth_analytics(sender, instance)
+
+
+@receiver(post_save, sender=UserPlant)
+@receiver(post_delete, sender=UserPlant)
+def invalidate_plant_analytics(sender, instance, **kwargs):
+    invalidate_analytics(instance.user_id)
+
+
+@receiver(post_save, sender=CareRoutine)
+def refresh_care_occurrences(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is None or SCHEDULE_FIELDS & set(update_fields):
+        materialize([instance])
+
+
+@receiver(post_delete, sender=UserPlant)
+def record_plant_tombstone(sender, instance, origin=None, **kwargs):
+    if not cascaded_from(origin, User):
+        Tombstone.objects.create(
+            user_id=instance.user_id,
+            model=TOMBSTONE_KEYS[sender],
+            object_id=instance.pk,
+        )
+
+
+@receiver(post_delete, sender=PlantNote)
+@receiver(post_delete, sender=CareRoutine)
+@receiver(post_delete, sender=GrowthRecord)
+def record_child_tombstone(sender, instance, origin=None, **kwargs):
+    # Children of a deleted plant are implied by the plant's tombstone
+    if cascaded_from(origin, UserPlant, User):
+        return
+    user_id = plant_owner(instance.plant_id)
+    if user_id is not None:
+        Tombstone.objects.create(
+            user_id=user_id, model=TOMBSTONE_KEYS[sender], object_id=instance.pk
+        )
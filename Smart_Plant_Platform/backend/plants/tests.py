@@ -1,3 +1,568 @@
-from django.test import TestCase
+import io
+import socketserver
+import threading
+from datetime import UTC, datetime, timedelta
+from unittest import mock
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+import numpy as np
+from rest_framework.test import APIClient
+
+from .adherence import recomputed_stats
+from .analytics import lttb
+from .imports import import_growth_records
+from .recurrence import next_occurrence, normalize_rule
+
+from .models import (
+    CareEvent,
+    CareOccurrence,
+    CareReminder,
+    CareRoutine,
+    GrowthRecord,
+    PlantNote,
+    UserPlant,
+)
+
+User = get_user_model()
+
+
+def make_plant(username, name="Fern"):
+    user = User.objects.create_user(
+        email=f"{username}@example.com", username=username, password=None
+    )
+    return UserPlant.objects.create(user=user, name=name)
+
+
+class DebugSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept mail from smtplib and keep it in memory."""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 localhost debug SMTP")
+        in_data, lines = False, []
+        for raw in self.rfile:
+            line = raw.decode().rstrip("\r\n")
+            if in_data:
+                if line == ".":
+                    self.server.messages.append("\n".join(lines))
+                    in_data, lines = False, []
+                    self.reply("250 OK")
+                else:
+                    lines.append(line[1:] if line.startswith("..") else line)
+                continue
+            command = line[:4].upper()
+            if command in ("EHLO", "HELO"):
+                self.reply("250 localhost")
+            elif command == "DATA":
+                in_data = True
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                break
+            else:
+                self.reply("250 OK")
+
+
+class DebugSMTPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), DebugSMTPHandler)
+        self.connections = 0
+        self.messages = []
+
+
+class CareReminderDispatchTests(TestCase):
+    def setUp(self):
+        self.smtp = DebugSMTPServer()
+        threading.Thread(target=self.smtp.serve_forever, daemon=True).start()
+        self.addCleanup(self.smtp.server_close)
+        self.addCleanup(self.smtp.shutdown)
+
+        now = timezone.now()
+        for name in ("ada", "grace"):
+            user = User.objects.create_user(
+                email=f"{name}@example.com",
+                username=name,
+                password="x",
+                is_active=True,
+            )
+            plant = UserPlant.objects.create(user=user, name=f"{name}'s fern")
+            for task in ("Watering", "Misting"):
+                CareRoutine.objects.create(
+                    plant=plant,
+                    task=task,
+                    frequency="daily",
+                    instructions="",
+                    next_due=now - timedelta(hours=1),
+                )
+            CareRoutine.objects.create(
+                plant=plant,
+                task="Fertilizing",
+                frequency="monthly",
+                instructions="",
+                next_due=now + timedelta(days=3),
+            )
+
+    def send_reminders(self):
+        with override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=self.smtp.server_address[1],
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+        ):
+            call_command("send_care_reminders", "--rate", "0", stdout=io.StringIO())
+
+    def test_sends_one_digest_per_user_over_one_connection(self):
+        self.send_reminders()
+
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertEqual(len(self.smtp.messages), 2)
+        for message in self.smtp.messages:
+            self.assertIn("2 plant care tasks due", message)
+            self.assertIn("Watering", message)
+            self.assertNotIn("Fertilizing", message)
+        self.assertEqual(CareReminder.objects.count(), 4)
+
+    def test_rerun_does_not_resend(self):
+        self.send_reminders()
+        self.send_reminders()
+
+        self.assertEqual(len(self.smtp.messages), 2)
+
+    def test_new_due_occurrence_is_reminded_again(self):
+        self.send_reminders()
+        routine = CareRoutine.objects.filter(task="Watering").first()
+        routine.next_due = timezone.now() - timedelta(minutes=5)
+        routine.save()
+
+        self.send_reminders()
+
+        self.assertEqual(len(self.smtp.messages), 3)
+        self.assertIn("1 plant care task due", self.smtp.messages[-1])
+
+
+class TimelineTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            email="ada@example.com", username="ada", password=None
+        )
+        start = timezone.now() - timedelta(days=30)
+        self.expected = []
+        for p in range(10):
+            plant = UserPlant.objects.create(user=user, name=f"Fern {p}")
+            for n in range(2):
+                # Notes and records share instants, and some care events
+                # land on them too, so ties fall to the type then the id
+                at = start + timedelta(hours=p * 3 + n)
+                note = PlantNote.objects.create(plant=plant, content="Misted")
+                PlantNote.objects.filter(pk=note.pk).update(created_at=at)
+                record = GrowthRecord.objects.create(
+                    plant=plant, height=p + n, recorded_at=at
+                )
+                self.expected += [(at, 0, note.pk), (at, 1, record.pk)]
+            for task in ("Watering", "Misting"):
+                routine = CareRoutine.objects.create(
+                    plant=plant, task=task, frequency="daily", instructions="-"
+                )
+                event = CareEvent.objects.create(
+                    routine=routine, performed_at=start + timedelta(hours=p * 5)
+                )
+                self.expected.append((event.performed_at, 2, event.pk))
+        self.expected.sort(reverse=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_pages_merge_in_order_with_three_queries_each(self):
+        ranks = {"note": 0, "growth": 1, "care": 2}
+        url, seen = "/plants/timeline/?limit=7", []
+        while url:
+            with self.assertNumQueries(3):
+                page = self.client.get(url).json()
+            seen += [(ranks[e["type"]], e["item"]["id"]) for e in page["results"]]
+            url = page["next"] and f"/plants/timeline/?limit=7&cursor={page['next']}"
+
+        self.assertEqual(seen, [(rank, pk) for _, rank, pk in self.expected])
+
+
+class GrowthImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="ada@example.com", username="ada", password=None
+        )
+        self.plant = UserPlant.objects.create(user=self.user, name="Fern")
+        lines = ["plant_name,recorded_at,height"]
+        lines += [f"Fern,2026-01-{day:02d},{day}" for day in range(1, 12)]
+        lines.insert(4, "Cactus,2026-02-01,3")
+        self.csv = "\n".join(lines).encode()
+
+    def run_import(self):
+        return import_growth_records(
+            self.user, io.BytesIO(self.csv), "csv", batch_size=5
+        )
+
+    def test_inserts_in_batches_and_reports_bad_rows(self):
+        # Plant lookup, then a savepoint, an INSERT and a release per batch
+        with self.assertNumQueries(1 + 3 * 3):
+            report = self.run_import()
+
+        self.assertEqual((report.created, report.failed), (11, 1))
+        self.assertEqual(report.errors[0]["row"], 5)
+        self.assertEqual(self.plant.growth_records.count(), 11)
+
+    def test_each_batch_is_stamped_when_written(self):
+        start = timezone.now()
+        ticks = (start + timedelta(minutes=n) for n in range(100))
+        with mock.patch.object(timezone, "now", side_effect=lambda: next(ticks)):
+            self.run_import()
+
+        stamps = list(
+            self.plant.growth_records.order_by("id").values_list(
+                "updated_at", flat=True
+            )
+        )
+        self.assertEqual([len(set(stamps[i : i + 5])) for i in (0, 5, 10)], [1, 1, 1])
+        self.assertLess(stamps[0], stamps[5])
+        self.assertLess(stamps[5], stamps[10])
+
+
+class RecurrenceTests(TestCase):
+    def test_normalizes_rule(self):
+        self.assertEqual(
+            normalize_rule(" rrule:freq=weekly;byday=mo,th; "),
+            "FREQ=WEEKLY;BYDAY=MO,TH",
+        )
+
+    def test_rejects_unusable_rules(self):
+        for rule in (
+            "FREQ=HOURLY",
+            "FREQ=DAILY;COUNT=3",
+            "FREQ=DAILY;INTERVAL=0",
+            "FREQ=DAILY;INTERVAL=1.5",
+            "FREQ=DAILY;BYMONTH=2;BYMONTHDAY=30",
+            "FREQ=YEARLY;INTERVAL=4;BYMONTH=2;BYMONTHDAY=29;UNTIL=20270101T000000Z",
+        ):
+            with self.subTest(rule=rule), self.assertRaises(ValueError):
+                normalize_rule(rule)
+
+    def test_api_refuses_a_rule_that_never_comes_due(self):
+        plant = make_plant("ada")
+        client = APIClient()
+        client.force_authenticate(plant.user)
+
+        response = client.post(
+            f"/plants/{plant.id}/add_care_routine/",
+            {
+                "task": "Repotting",
+                "frequency": "custom",
+                "recurrence": "FREQ=DAILY;INTERVAL=0",
+                "instructions": "-",
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("recurrence", response.json())
+        self.assertFalse(CareRoutine.objects.exists())
+
+    @override_settings(TIME_ZONE="Europe/London")
+    def test_keeps_the_time_of_day_across_dst(self):
+        london = ZoneInfo("Europe/London")
+        # Clocks go forward an hour overnight
+        performed = datetime(2026, 3, 28, 9, 0, tzinfo=london)
+        expected = datetime(2026, 3, 29, 9, 0, tzinfo=london)
+
+        for frequency, rule in (("daily", ""), ("custom", "FREQ=DAILY")):
+            with self.subTest(frequency=frequency):
+                due = next_occurrence(frequency, rule, performed)
+                self.assertEqual(due, expected)
+                elapsed = due.astimezone(UTC) - performed.astimezone(UTC)
+                self.assertEqual(elapsed, timedelta(hours=23))
+
+    @override_settings(CARE_OCCURRENCE_HORIZON_DAYS=14)
+    def test_materializes_occurrences_of_a_custom_rule(self):
+        now = timezone.localtime()
+        monday = (now + timedelta(days=7 - now.weekday())).replace(
+            hour=9, minute=0, second=0, microsecond=0
+        )
+
+        CareRoutine.objects.create(
+            plant=make_plant("ada"),
+            task="Misting",
+            frequency="custom",
+            recurrence="FREQ=WEEKLY;BYDAY=MO,TH",
+            instructions="-",
+            next_due=monday,
+        )
+
+        expected = [
+            monday + timedelta(days=n)
+            for n in range(14)
+            if n % 7 in (0, 3) and monday + timedelta(days=n) < now + timedelta(days=14)
+        ]
+        due = CareOccurrence.objects.order_by("due_at").values_list("due_at", flat=True)
+        self.assertEqual(list(due), expected)
+
+
+@override_settings(CARE_ON_TIME_GRACE_HOURS=12)
+class AdherenceTests(TestCase):
+    def setUp(self):
+        self.start = timezone.now().replace(microsecond=0) - timedelta(days=30)
+        self.routine = CareRoutine.objects.create(
+            plant=make_plant("ada"),
+            task="Watering",
+            frequency="daily",
+            instructions="-",
+            next_due=self.start,
+        )
+
+    def complete(self, moment):
+        event = self.routine.mark_performed(moment)
+        self.routine.save()
+        event.save()
+
+    def stats(self):
+        self.routine.refresh_from_db()
+        return {name: getattr(self.routine, name) for name in CareRoutine.STAT_FIELDS}
+
+    def check(self, *args):
+        out = io.StringIO()
+        call_command("check_care_stats", *args, stdout=out)
+        return out.getvalue()
+
+    def test_counters_match_a_replay_of_the_log(self):
+        hour = timedelta(hours=1)
+        # On time, 20 hours late, three days skipped, early, then 2 hours late
+        for offset in (1, 45, 141, 164, 190):
+            self.complete(self.start + offset * hour)
+
+        expected = {
+            "completion_count": 5,
+            "scheduled_count": 5,
+            "on_time_count": 3,
+            "delay_total": (1 + 20 + 72 + 0 + 2) * 3600.0,
+            "current_streak": 2,
+            "longest_streak": 2,
+        }
+        self.assertEqual(self.stats(), expected)
+        self.assertEqual(recomputed_stats([self.routine]), {self.routine.id: expected})
+        self.assertIn("All care stats are consistent", self.check())
+
+    def test_fix_rebuilds_drifted_counters(self):
+        self.complete(self.start + timedelta(hours=1))
+        expected = self.stats()
+        CareRoutine.objects.filter(id=self.routine.id).update(
+            completion_count=9, current_streak=0
+        )
+
+        self.assertIn("1 routines are inconsistent", self.check())
+        self.assertNotEqual(self.stats(), expected)
+
+        self.assertIn("Fixed 1 routines", self.check("--fix"))
+        self.assertEqual(self.stats(), expected)
+        self.assertIn("All care stats are consistent", self.check())
+
+    def test_backfill_seeds_the_log_from_last_performed(self):
+        performed = self.start + timedelta(days=2)
+        CareRoutine.objects.filter(id=self.routine.id).update(last_performed=performed)
+
+        call_command("backfill_care_events", stdout=io.StringIO())
+        call_command("backfill_care_events", stdout=io.StringIO())
+
+        event = CareEvent.objects.get(routine=self.routine)
+        self.assertEqual((event.performed_at, event.due_at), (performed, None))
+        self.assertEqual(
+            self.stats(),
+            {
+                "completion_count": 1,
+                "scheduled_count": 0,
+                "on_time_count": 0,
+                "delay_total": 0,
+                "current_streak": 1,
+                "longest_streak": 1,
+            },
+        )
+
+
+class CareTaskTests(TestCase):
+    def setUp(self):
+        self.plant = make_plant("ada")
+        self.client = APIClient()
+        self.client.force_authenticate(self.plant.user)
+        now = timezone.now()
+        self.overdue, self.soon, self.later = (
+            self.routine(now + timedelta(days=days)) for days in (-1, 2, 10)
+        )
+        self.foreign = self.routine(now, plant=make_plant("bob"))
+
+    def routine(self, next_due, plant=None):
+        return CareRoutine.objects.create(
+            plant=plant or self.plant,
+            task="Watering",
+            frequency="weekly",
+            instructions="-",
+            next_due=next_due,
+        )
+
+    def due(self, **params):
+        response = self.client.get("/plants/care/due/", params)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        return (
+            [routine["id"] for routine in body["overdue"]],
+            [routine["id"] for routine in body["upcoming"]],
+        )
+
+    def complete(self, routine_ids):
+        return self.client.post(
+            "/plants/care/complete/", {"routine_ids": routine_ids}, format="json"
+        )
+
+    def test_due_lists_only_the_users_routines_inside_the_window(self):
+        self.assertEqual(self.due(), ([self.overdue.id], [self.soon.id]))
+        self.assertEqual(self.due(days=1), ([self.overdue.id], []))
+        self.assertEqual(
+            self.due(days=30), ([self.overdue.id], [self.soon.id, self.later.id])
+        )
+
+    def test_due_rejects_a_non_integer_window(self):
+        response = self.client.get("/plants/care/due/", {"days": "soon"})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_completion_advances_every_routine(self):
+        before = timezone.now()
+
+        response = self.complete([self.overdue.id, self.soon.id])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(routine["id"] for routine in response.json()["completed"]),
+            [self.overdue.id, self.soon.id],
+        )
+        self.assertEqual(response.json()["not_found"], [])
+        for routine in (self.overdue, self.soon):
+            routine.refresh_from_db()
+            self.assertGreaterEqual(routine.last_performed, before)
+            self.assertEqual(
+                routine.next_due, routine.last_performed + timedelta(weeks=1)
+            )
+            self.assertEqual(routine.completion_count, 1)
+            self.assertEqual(routine.events.count(), 1)
+        self.assertEqual(self.due(days=6), ([], []))
+
+    def test_bulk_completion_reports_unknown_and_foreign_routines(self):
+        response = self.complete([self.soon.id, self.foreign.id, 999999])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [routine["id"] for routine in response.json()["completed"]], [self.soon.id]
+        )
+        self.assertEqual(
+            response.json()["not_found"], sorted([self.foreign.id, 999999])
+        )
+        self.foreign.refresh_from_db()
+        self.assertIsNone(self.foreign.last_performed)
+        self.assertFalse(self.foreign.events.exists())
+
+    def test_bulk_completion_rejects_bad_ids(self):
+        for routine_ids in ([], "1", ["one"]):
+            with self.subTest(routine_ids=routine_ids):
+                self.assertEqual(self.complete(routine_ids).status_code, 400)
+
+
+class PlantListTests(TestCase):
+    def setUp(self):
+        self.user = make_plant("ada", name="Bare").user
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def photo(self, name):
+        return {
+            "image": name,
+            "image_variants": {
+                "source": name,
+                "widths": {"160": name.replace(".png", "_160w.webp")},
+            },
+        }
+
+    def test_lists_plants_in_constant_queries(self):
+        now = timezone.now()
+        for n in range(4):
+            plant = UserPlant.objects.create(
+                user=self.user, name=f"Plant {n}", **self.photo(f"plants/{n}.png")
+            )
+            PlantNote.objects.create(plant=plant, content="Repotted")
+            for days in (1, 2):
+                GrowthRecord.objects.create(
+                    plant=plant,
+                    height=days * 10,
+                    recorded_at=now - timedelta(days=days),
+                    **self.photo(f"growth_records/{n}_{days}.png"),
+                )
+                CareRoutine.objects.create(
+                    plant=plant,
+                    task=f"Task {days}",
+                    frequency="weekly",
+                    instructions="-",
+                    next_due=now + timedelta(days=days),
+                )
+
+        # The page, then the latest record and next routine of every plant
+        with self.assertNumQueries(3):
+            results = self.client.get("/plants/").json()["results"]
+
+        self.assertEqual(len(results), 5)
+        by_name = {plant["name"]: plant for plant in results}
+        plant = by_name["Plant 0"]
+        self.assertEqual(
+            (
+                plant["notes_count"],
+                plant["care_routines_count"],
+                plant["growth_records_count"],
+            ),
+            (1, 2, 2),
+        )
+        self.assertEqual(plant["latest_growth_record"]["height"], 10)
+        self.assertEqual(plant["next_due_task"]["task"], "Task 1")
+        self.assertEqual(
+            plant["image_srcset"], {"160": "http://testserver/media/plants/0_160w.webp"}
+        )
+        self.assertIsNone(by_name["Bare"]["latest_growth_record"])
+        self.assertIsNone(by_name["Bare"]["next_due_task"])
+
+
+class LttbTests(SimpleTestCase):
+    def setUp(self):
+        self.x = np.arange(100, dtype=np.float64)
+        self.y = np.sin(self.x / 10)
+
+    def test_keeps_the_ends_and_returns_threshold_points(self):
+        for threshold in (3, 10, 99):
+            with self.subTest(threshold=threshold):
+                keep = lttb(self.x, self.y, threshold)
+                self.assertEqual(len(keep), threshold)
+                self.assertEqual((keep[0], keep[-1]), (0, 99))
+                self.assertTrue(np.all(np.diff(keep) > 0))
+
+    def test_keeps_a_spike(self):
+        self.y[57] = 50
+
+        self.assertIn(57, lttb(self.x, self.y, 10))
+
+    def test_short_series_are_returned_unchanged(self):
+        for threshold in (100, 150, 2):
+            with self.subTest(threshold=threshold):
+                np.testing.assert_array_equal(
+                    lttb(self.x, self.y, threshold), np.arange(100)
+                )
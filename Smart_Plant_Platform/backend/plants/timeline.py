@@ -0,0 +1,133 @@
+import base64
+import heapq
+import json
+from datetime import timedelta
+
+from django.db.models import Q
+
+from .models import CareEvent, GrowthRecord, PlantNote, UserPlant
+from .serializers import (
+    CareEventSerializer,
+    GrowthRecordSerializer,
+    PlantNoteSerializer,
+)
+from .sync import EPOCH
+
+# Entry type, model, timestamp field, path to the plant and serializer.
+# Entries at the same instant are ordered by their position here, then by id.
+STREAMS = {
+    "note": (PlantNote, "created_at", "plant_id", PlantNoteSerializer),
+    "growth": (GrowthRecord, "recorded_at", "plant_id", GrowthRecordSerializer),
+    "care": (CareEvent, "performed_at", "routine__plant_id", CareEventSerializer),
+}
+RANKS = {kind: rank for rank, kind in enumerate(STREAMS)}
+
+
+def encode_cursor(key):
+    moment, rank, pk = key
+    micros = (moment - EPOCH) // timedelta(microseconds=1)
+    raw = json.dumps([micros, rank, pk], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor. Raises ValueError for anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        micros, rank, pk = json.loads(raw)
+        moment = EPOCH + timedelta(microseconds=int(micros))
+        pk = int(pk)
+    except (TypeError, ValueError, OverflowError) as e:
+        raise ValueError("Invalid cursor") from e
+    if rank not in RANKS.values():
+        raise ValueError("Invalid cursor")
+    return moment, rank, pk
+
+
+def before(queryset, field, rank, cursor):
+    """
+    Restrict one stream to entries that sort after ``cursor`` in the newest
+    first order. The range on ``field`` is what the index serves; the id
+    tie-break only has to look at rows sharing the cursor's timestamp.
+    """
+    moment, cursor_rank, pk = cursor
+    if rank < cursor_rank:
+        return queryset.filter(**{f"{field}__lte": moment})
+    if rank > cursor_rank:
+        return queryset.filter(**{f"{field}__lt": moment})
+    return queryset.filter(**{f"{field}__lte": moment}).filter(
+        Q(**{f"{field}__lt": moment}) | Q(pk__lt=pk)
+    )
+
+
+def iter_stream(kind, plant_ids, cursor, chunk_size):
+    """
+    Yield ``(key, kind, instance)`` newest first from one stream, such as the
+    notes of all of ``plant_ids``, fetching ``chunk_size`` rows at a time.
+    """
+    model, field, plant, _ = STREAMS[kind]
+    rank = RANKS[kind]
+    queryset = model.objects.filter(**{f"{plant}__in": plant_ids}).order_by(
+        f"-{field}", "-pk"
+    )
+    if kind == "care":
+        queryset = queryset.select_related("routine")
+    while True:
+        page = queryset if cursor is None else before(queryset, field, rank, cursor)
+        rows = list(page[:chunk_size])
+        for row in rows:
+            cursor = (getattr(row, field), rank, row.pk)
+            yield cursor, kind, row
+        if len(rows) < chunk_size:
+            return
+
+
+def timeline_page(plant_ids, cursor=None, limit=20):
+    """
+    One page of the merged activity of ``plant_ids``, newest first.
+
+    Notes, growth records and care events are three streams, each one query
+    for the ``limit + 1`` newest rows of all the plants past the cursor, and
+    heapq.merge interleaves them. A page costs three queries however many
+    plants and routines there are. ``plant_ids`` may be a values queryset,
+    which is then inlined as a subquery.
+    """
+    streams = [iter_stream(kind, plant_ids, cursor, limit + 1) for kind in STREAMS]
+    merged = heapq.merge(*streams, key=lambda entry: entry[0], reverse=True)
+
+    entries = []
+    for key, kind, row in merged:
+        if len(entries) == limit:
+            return entries, encode_cursor(entries[-1][0])
+        entries.append((key, kind, row))
+    return entries, None
+
+
+def serialize_entries(entries, context=None):
+    results = []
+    for key, kind, row in entries:
+        serializer_class = STREAMS[kind][3]
+        results.append(
+            {
+                "type": kind,
+                "at": key[0],
+                "plant": row.routine.plant_id if kind == "care" else row.plant_id,
+                "item": serializer_class(row, context=context).data,
+            }
+        )
+    return results
+
+
+def timeline_response(plant_ids, cursor=None, limit=20, context=None):
+    entries, next_cursor = timeline_page(plant_ids, cursor, limit)
+    return {"results": serialize_entries(entries, context), "next": next_cursor}
+
+
+def plant_timeline(plants, cursor=None, limit=20, context=None):
+    return timeline_response([plant.id for plant in plants], cursor, limit, context)
+
+
+def user_timeline(user, cursor=None, limit=20, context=None):
+    return timeline_response(
+        UserPlant.objects.filter(user=user).values("id"), cursor, limit, context
+    )
@@ -1,11 +1,36 @@
+import csv
+
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
 from django.shortcuts import render, get_object_or_404
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
-from datetime import timedelta
-from .models import UserPlant, PlantNote, CareRoutine, GrowthRecord
+from datetime import date, datetime, time, timedelta
+from django.conf import settings
+from django.db import transaction
+from .analytics import cached, growth_analytics
+from .imports import detect_format, import_growth_records
+from .sync import decode_cursor, sync_changes
+from .timeline import (
+    decode_cursor as decode_timeline_cursor,
+    plant_timeline,
+    user_timeline,
+)
+from .models import (
+    UserPlant,
+    PlantNote,
+    CareEvent,
+    CareOccurrence,
+    CareRoutine,
+    GrowthRecord,
+)
+from .schedule import materialize
 from .serializers import (
+    CareRoutineStatsSerializer,
+    DueCareRoutineSerializer,
+    UserPlantListSerializer,
     UserPlantSerializer,
     PlantNoteSerializer,
     CareRoutineSerializer,
@@ -15,12 +40,118 @@ from .serializers import (
 # Create your views here.
 
 
+def related_count(model):
+    """Correlated COUNT(*) of ``model`` rows pointing at the outer plant."""
+    counts = (
+        model.objects.filter(plant=OuterRef("pk"))
+        .order_by()
+        .values("plant")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def analytics_params(request, default_points):
+    """Parse the ``window`` and ``points`` query params of the analytics views."""
+    window = int(request.query_params.get("window", 7))
+    points = int(request.query_params.get("points", default_points))
+    if not 1 <= window <= 365 or not 3 <= points <= 5000:
+        raise ValueError
+    return window, points
+
+
+def timeline_params(request):
+    """Parse the ``cursor`` and ``limit`` query params of the timeline views."""
+    cursor = request.query_params.get("cursor")
+    limit = request.query_params.get("limit", "20")
+    if not limit.isdigit() or not 1 <= int(limit) <= 100:
+        raise ValueError("limit must be 1-100")
+    limit = int(limit)
+    return (decode_timeline_cursor(cursor) if cursor else None), limit
+
+
+def run_growth_import(request, plant=None):
+    """Import an uploaded CSV/JSONL ``file`` and respond with the row report."""
+    upload = request.FILES.get("file")
+    if upload is None:
+        return Response(
+            {"error": "Upload a CSV or JSONL file as 'file'"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        fmt = detect_format(upload.name, request.query_params.get("format"))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        report = import_growth_records(request.user, upload, fmt, plant=plant)
+    except (UnicodeDecodeError, csv.Error) as e:
+        return Response(
+            {"error": f"Could not read file: {e}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return Response(report.as_dict(), status=status.HTTP_201_CREATED)
+
+
+def calendar_range(request):
+    """Parse the calendar's start/end dates into local-midnight datetimes."""
+    params = request.query_params
+    try:
+        start = date.fromisoformat(params["start"]) if "start" in params else None
+        end = date.fromisoformat(params["end"]) if "end" in params else None
+    except ValueError:
+        raise ValueError("start and end must be dates (YYYY-MM-DD)")
+    start = start or timezone.localdate()
+    end = end or start + timedelta(days=31)
+    if not start < end <= start + timedelta(days=settings.CARE_CALENDAR_MAX_DAYS):
+        raise ValueError(
+            f"end must be after start and at most "
+            f"{settings.CARE_CALENDAR_MAX_DAYS} days later"
+        )
+    return (
+        timezone.make_aware(datetime.combine(start, time.min)),
+        timezone.make_aware(datetime.combine(end, time.min)),
+    )
+
+
 class UserPlantViewSet(viewsets.ModelViewSet):
     serializer_class = UserPlantSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return UserPlant.objects.filter(user=self.request.user)
+        queryset = UserPlant.objects.filter(user=self.request.user)
+        if self.action == "list":
+            # Subquery counts rather than Count() joins, which would multiply
+            # rows across the three relations.
+            return queryset.annotate(
+                notes_count=related_count(PlantNote),
+                care_routines_count=related_count(CareRoutine),
+                growth_records_count=related_count(GrowthRecord),
+            ).prefetch_related(
+                Prefetch(
+                    "growth_records",
+                    queryset=GrowthRecord.objects.order_by("-recorded_at", "-id")[:1],
+                    to_attr="latest_growth_records",
+                ),
+                Prefetch(
+                    "care_routines",
+                    queryset=CareRoutine.objects.filter(
+                        next_due__isnull=False
+                    ).order_by("next_due", "id")[:1],
+                    to_attr="next_due_routines",
+                ),
+            )
+        if self.action == "retrieve":
+            return queryset.prefetch_related(
+                "notes", "care_routines", "growth_records"
+            )
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return UserPlantListSerializer
+        return UserPlantSerializer
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -68,16 +199,9 @@ class UserPlantViewSet(viewsets.ModelViewSet):
             routine = serializer.save(plant=plant)
 
             # Set next_due based on frequency
-            frequency_days = {
-                "daily": 1,
-                "weekly": 7,
-                "biweekly": 14,
-                "monthly": 30,
-            }
-            days = frequency_days.get(routine.frequency)
-            if days:
-                routine.next_due = timezone.now() + timedelta(days=days)
-                routine.save()
+            routine.next_due = routine.next_due_after(timezone.now())
+            if routine.next_due:
+                routine.save(update_fields=["next_due"])
 
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -100,6 +224,21 @@ class UserPlantViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=["post"])
+    def import_growth_records(self, request, pk=None):
+        """Bulk import growth records for this plant from CSV or JSONL."""
+        return run_growth_import(request, plant=self.get_object())
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import_growth_records",
+        url_name="import-all-growth-records",
+    )
+    def import_all_growth_records(self, request):
+        """Bulk import growth records for any of the user's plants."""
+        return run_growth_import(request)
+
     @action(
         detail=True, methods=["delete"], url_path="growth_records/(?P<record_id>[^/.]+)"
     )
@@ -109,27 +248,236 @@ class UserPlantViewSet(viewsets.ModelViewSet):
         record.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=True, methods=["get"], url_path="analytics")
+    def growth_analytics(self, request, pk=None):
+        """Growth rates, rolling means, anomalies and a downsampled series."""
+        plant = self.get_object()
+        try:
+            window, points = analytics_params(request, default_points=500)
+        except ValueError:
+            return Response(
+                {"error": "window must be 1-365 and points 3-5000"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        result = cached(
+            request.user.id,
+            f"plant:{plant.id}:{window}:{points}",
+            lambda: growth_analytics([plant], window, points)[0],
+        )
+        return Response(result)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="analytics",
+        url_name="user-analytics",
+    )
+    def user_growth_analytics(self, request):
+        """Growth analytics for all of the user's plants in one response."""
+        try:
+            window, points = analytics_params(request, default_points=100)
+        except ValueError:
+            return Response(
+                {"error": "window must be 1-365 and points 3-5000"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        plants = UserPlant.objects.filter(user=request.user).order_by("id")
+        result = cached(
+            request.user.id,
+            f"user:{window}:{points}",
+            lambda: growth_analytics(plants, window, points),
+        )
+        return Response(result)
+
+    @action(detail=True, methods=["get"])
+    def timeline(self, request, pk=None):
+        """The plant's notes, growth records and care completions, newest first."""
+        plant = self.get_object()
+        try:
+            cursor, limit = timeline_params(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            plant_timeline([plant], cursor, limit, self.get_serializer_context())
+        )
+
+    @action(
+        detail=False, methods=["get"], url_path="timeline", url_name="user-timeline"
+    )
+    def user_timeline(self, request):
+        """The merged timeline of all of the user's plants, newest first."""
+        try:
+            cursor, limit = timeline_params(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            user_timeline(request.user, cursor, limit, self.get_serializer_context())
+        )
+
     @action(detail=True, methods=["post"])
     def complete_care_task(self, request, pk=None):
         plant = self.get_object()
         try:
-            routine = plant.care_routines.get(id=request.data.get("routine_id"))
-            routine.last_performed = timezone.now()
-
-            # Update next_due date
-            frequency_days = {
-                "daily": 1,
-                "weekly": 7,
-                "biweekly": 14,
-                "monthly": 30,
-            }
-            days = frequency_days.get(routine.frequency)
-            if days:
-                routine.next_due = timezone.now() + timedelta(days=days)
-
-            routine.save()
+            with transaction.atomic():
+                # Lock the row so concurrent completions don't lose counts
+                routine = plant.care_routines.select_for_update().get(
+                    id=request.data.get("routine_id")
+                )
+                event = routine.mark_performed(timezone.now())
+                routine.save()
+                event.save()
             return Response(CareRoutineSerializer(routine).data)
         except CareRoutine.DoesNotExist:
             return Response(
                 {"error": "Care routine not found"}, status=status.HTTP_404_NOT_FOUND
             )
+
+    @action(detail=True, methods=["get"])
+    def care_stats(self, request, pk=None):
+        """Adherence statistics for each of the plant's care routines."""
+        plant = self.get_object()
+        routines = plant.care_routines.select_related("plant").order_by("id")
+        return Response(CareRoutineStatsSerializer(routines, many=True).data)
+
+    @action(detail=False, methods=["get"], url_path="care/stats")
+    def user_care_stats(self, request):
+        """Adherence statistics for every care routine the user has."""
+        routines = (
+            CareRoutine.objects.filter(plant__user=request.user)
+            .select_related("plant")
+            .order_by("plant_id", "id")
+        )
+        return Response(CareRoutineStatsSerializer(routines, many=True).data)
+
+    @action(detail=False, methods=["get"])
+    def sync(self, request):
+        """Changes to the user's plant tree since the ``since`` cursor."""
+        since = request.query_params.get("since")
+        if since:
+            try:
+                since = decode_cursor(since)
+            except (ValueError, OverflowError):
+                return Response(
+                    {"error": "Invalid since cursor"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        return Response(
+            sync_changes(request.user, since or None, self.get_serializer_context())
+        )
+
+    @action(detail=False, methods=["get"], url_path="care/due")
+    def due_care_tasks(self, request):
+        """Overdue and upcoming care routines across all of the user's plants."""
+        try:
+            days = int(request.query_params.get("days", 7))
+        except ValueError:
+            return Response(
+                {"error": "days must be an integer"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        now = timezone.now()
+        routines = (
+            CareRoutine.objects.filter(
+                plant__user=request.user, next_due__lte=now + timedelta(days=days)
+            )
+            .select_related("plant")
+            .order_by("next_due", "id")
+        )
+        overdue, upcoming = [], []
+        for routine in routines:
+            (overdue if routine.next_due <= now else upcoming).append(routine)
+
+        return Response(
+            {
+                "overdue": DueCareRoutineSerializer(overdue, many=True).data,
+                "upcoming": DueCareRoutineSerializer(upcoming, many=True).data,
+            }
+        )
+
+    @action(detail=False, methods=["get"], url_path="care/calendar")
+    def care_calendar(self, request):
+        """
+        Upcoming care occurrences across all of the user's plants between the
+        ``start`` and ``end`` dates (ISO, end exclusive). Defaults to 31 days
+        from today.
+        """
+        try:
+            start, end = calendar_range(request)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        now = timezone.now()
+        occurrences = (
+            CareOccurrence.objects.filter(
+                user=request.user, due_at__gte=start, due_at__lt=end
+            )
+            .order_by("due_at", "routine_id")
+            .values(
+                "routine_id",
+                "due_at",
+                "routine__task",
+                "routine__plant_id",
+                "routine__plant__name",
+            )
+        )
+        return Response(
+            {
+                "start": start,
+                "end": end,
+                "occurrences": [
+                    {
+                        "routine": row["routine_id"],
+                        "plant": row["routine__plant_id"],
+                        "plant_name": row["routine__plant__name"],
+                        "task": row["routine__task"],
+                        "due_at": row["due_at"],
+                        "overdue": row["due_at"] <= now,
+                    }
+                    for row in occurrences
+                ],
+            }
+        )
+
+    @action(detail=False, methods=["post"], url_path="care/complete")
+    def bulk_complete_care_tasks(self, request):
+        """Mark many care routines as performed in a single transaction."""
+        routine_ids = request.data.get("routine_ids")
+        if not isinstance(routine_ids, list) or not routine_ids:
+            return Response(
+                {"error": "routine_ids must be a non-empty list"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            routine_ids = {int(routine_id) for routine_id in routine_ids}
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "routine_ids must contain integers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        now = timezone.now()
+        with transaction.atomic():
+            routines = list(
+                CareRoutine.objects.select_for_update()
+                .filter(plant__user=request.user, id__in=routine_ids)
+                .select_related("plant")
+            )
+            events = []
+            for routine in routines:
+                events.append(routine.mark_performed(now))
+                routine.updated_at = now
+            CareRoutine.objects.bulk_update(
+                routines,
+                ["last_performed", "next_due", "updated_at", *CareRoutine.STAT_FIELDS],
+            )
+            CareEvent.objects.bulk_create(events)
+            # bulk_update skips post_save, so refresh the calendar here
+            materialize(routines, now)
+
+        found = {routine.id for routine in routines}
+        return Response(
+            {
+                "completed": DueCareRoutineSerializer(routines, many=True).data,
+                "not_found": sorted(routine_ids - found),
+            }
+        )
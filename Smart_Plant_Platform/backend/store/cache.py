@@ -0,0 +1,89 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+VERSION_KEY = "store:catalog:version"
+MODIFIED_KEY = "store:catalog:modified"
+
+
+def catalog_version():
+    return cache.get_or_set(VERSION_KEY, 1, timeout=None)
+
+
+def catalog_modified():
+    """When the catalog last changed, as a Unix timestamp."""
+    return cache.get_or_set(MODIFIED_KEY, int(time.time()), timeout=None)
+
+
+def invalidate_catalog():
+    """Orphan every cached catalog response and restart validation."""
+    cache.set(MODIFIED_KEY, int(time.time()), timeout=None)
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, timeout=None)
+
+
+def catalog_key(request, name):
+    # Absolute image URLs depend on the host, so it is part of the key. The
+    # name can end in a raw URL lookup, so it is hashed too rather than put
+    # in the key, where memcached rejects spaces and long keys.
+    params = sorted(request.query_params.lists())
+    variant = f"{name}|{request.scheme}://{request.get_host()}|{params}"
+    digest = hashlib.sha1(variant.encode()).hexdigest()
+    return f"store:catalog:v{catalog_version()}:{digest}"
+
+
+def catalog_response(request, name, render):
+    """
+    Serve a catalog GET from the cache, or with a 304 when the client's
+    ETag or Last-Modified is still current. ``render`` builds the response
+    on a miss; only 200s are stored.
+    """
+    key = catalog_key(request, name)
+    etag = quote_etag(hashlib.sha1(key.encode()).hexdigest())
+    last_modified = catalog_modified()
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if not_modified is not None:
+        return not_modified
+
+    data = cache.get(key)
+    if data is None:
+        response = render()
+        if response.status_code != 200:
+            return response
+        data = response.data
+        cache.set(key, data, settings.CATALOG_CACHE_TIMEOUT)
+
+    response = Response(data)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    # Browsers keep the copy but check back with it every time
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+class CatalogCacheMixin:
+    """Cache the list and detail responses of a read-mostly catalog viewset."""
+
+    def list(self, request, *args, **kwargs):
+        return catalog_response(
+            request,
+            f"{self.basename}:list",
+            lambda: super(CatalogCacheMixin, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        return catalog_response(
+            request,
+            f"{self.basename}:detail:{lookup}",
+            lambda: super(CatalogCacheMixin, self).retrieve(request, *args, **kwargs),
+        )
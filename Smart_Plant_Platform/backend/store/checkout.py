@@ -0,0 +1,106 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from .cache import invalidate_catalog
+from .models import CartItem, Order, OrderItem, Product
+
+
+class CheckoutError(Exception):
+    pass
+
+
+class OutOfStock(CheckoutError):
+    def __init__(self, products):
+        self.products = products
+        names = ", ".join(product.name for product in products)
+        super().__init__(f"Not enough stock for {names}")
+
+
+def per_product(quantities):
+    """A CASE mapping product ids to the given numbers, 0 for any other."""
+    return Case(
+        *(When(pk=pk, then=Value(qty)) for pk, qty in quantities.items()),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def place_order(cart, shipping_address):
+    """
+    Turn a cart into an order with a fixed number of queries, however many
+    lines it has.
+
+    Stock for every line is taken by one conditional UPDATE that only
+    matches products with enough left. Lines still holding a reservation
+    convert it: their units leave ``reserved`` and ``stock`` together, so
+    they always fit. Other lines need that many units free of anyone's
+    reservation. If fewer rows match than there are lines, the transaction
+    rolls back and nothing is sold. Order items are then bulk-inserted. The
+    stock check and the decrement are one statement, so concurrent
+    checkouts can't oversell.
+    """
+    items = []
+    try:
+        with transaction.atomic():
+            # Locked so the expiry sweeper can't release a hold being converted
+            items = list(
+                CartItem.objects.select_for_update()
+                .filter(cart=cart)
+                .select_related("product")
+                .order_by("id")
+            )
+            if not items:
+                raise CheckoutError("Cart is empty")
+
+            quantity = per_product({item.product_id: item.quantity for item in items})
+            held = per_product(
+                {
+                    item.product_id: item.quantity
+                    for item in items
+                    if item.reserved_until is not None
+                }
+            )
+            taken = Product.objects.filter(
+                pk__in=[item.product_id for item in items],
+                stock__gte=F("reserved") - held + quantity,
+            ).update(
+                stock=F("stock") - quantity,
+                reserved=F("reserved") - held,
+                updated_at=timezone.now(),
+            )
+            if taken != len(items):
+                # Raising undoes the decrements of the lines that did match
+                raise OutOfStock([])
+
+            order = Order.objects.create(
+                user_id=cart.user_id,
+                total_price=sum(item.subtotal for item in items),
+                shipping_address=shipping_address,
+            )
+            OrderItem.objects.bulk_create(
+                OrderItem(
+                    order=order,
+                    product=item.product,
+                    quantity=item.quantity,
+                    price=item.product.price,
+                )
+                for item in items
+            )
+            CartItem.objects.filter(pk__in=[item.pk for item in items]).delete()
+            # The catalog only shows whether a product is in stock, so it is
+            # stale only if this order sold one out. The rows are locked.
+            if any(item.product.stock <= item.quantity for item in items):
+                transaction.on_commit(invalidate_catalog)
+    except OutOfStock:
+        short = set(
+            Product.objects.filter(
+                pk__in=[item.product_id for item in items],
+                stock__lt=F("reserved") - held + quantity,
+            ).values_list("pk", flat=True)
+        )
+        raise OutOfStock(
+            [item.product for item in items if item.product_id in short]
+            or [item.product for item in items]
+        ) from None
+    return order
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.reservations import release_expired
+
+
+class Command(BaseCommand):
+    help = "Return the stock held by expired cart reservations to sale"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep running, sweeping expired reservations every N seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            lines, units = release_expired(batch_size=options["batch_size"])
+            self.stdout.write(
+                self.style.SUCCESS(f"Released {units} units held by {lines} cart lines")
+            )
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,100 @@
+# Generated by Django 5.1.6 on 2026-10-19 15:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+SQLITE_FORWARDS = [
+    """
+    CREATE VIRTUAL TABLE store_product_fts USING fts5(
+        name, description,
+        content='store_product', content_rowid='id',
+        tokenize='porter unicode61', prefix='2 3'
+    )
+    """,
+    # Matches in the name count ten times as much as in the description
+    "INSERT INTO store_product_fts(store_product_fts, rank) "
+    "VALUES ('rank', 'bm25(10.0, 1.0)')",
+    """
+    CREATE TRIGGER store_product_fts_insert AFTER INSERT ON store_product BEGIN
+        INSERT INTO store_product_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER store_product_fts_delete AFTER DELETE ON store_product BEGIN
+        INSERT INTO store_product_fts(store_product_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER store_product_fts_update
+    AFTER UPDATE OF name, description ON store_product BEGIN
+        INSERT INTO store_product_fts(store_product_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO store_product_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    "INSERT INTO store_product_fts(store_product_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARDS = [
+    "DROP TRIGGER IF EXISTS store_product_fts_insert",
+    "DROP TRIGGER IF EXISTS store_product_fts_delete",
+    "DROP TRIGGER IF EXISTS store_product_fts_update",
+    "DROP TABLE IF EXISTS store_product_fts",
+]
+POSTGRES_FORWARDS = [
+    # Must match store.search.product_search_vector() for the planner to use it
+    """
+    CREATE INDEX store_product_search_idx ON store_product USING GIN ((
+        setweight(to_tsvector('english'::regconfig, COALESCE(name, '')), 'A')
+        || setweight(to_tsvector('english'::regconfig, COALESCE(description, '')), 'B')
+    ))
+    """,
+]
+POSTGRES_BACKWARDS = ["DROP INDEX IF EXISTS store_product_search_idx"]
+
+
+def run(statements):
+    def apply(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, []):
+            schema_editor.execute(sql)
+
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0002_product_image_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductSearchIndex",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        db_column="rowid",
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search_index",
+                        serialize=False,
+                        to="store.product",
+                    ),
+                ),
+                ("document", models.TextField(db_column="store_product_fts")),
+                ("rank", models.FloatField()),
+            ],
+            options={
+                "db_table": "store_product_fts",
+                "managed": False,
+            },
+        ),
+        migrations.RunPython(
+            run({"sqlite": SQLITE_FORWARDS, "postgresql": POSTGRES_FORWARDS}),
+            run({"sqlite": SQLITE_BACKWARDS, "postgresql": POSTGRES_BACKWARDS}),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F, Prefetch, Sum, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from decimal import Decimal
@@ -32,26 +34,89 @@ class Product(models.Model):
         max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal("0.01"))]
     )
     stock = models.PositiveIntegerField()
+    # Units held by cart reservations; available to sell is stock - reserved
+    reserved = models.PositiveIntegerField(default=0, editable=False)
     image = models.ImageField(upload_to="products/", blank=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="store_product_created_idx"),
+            models.Index(
+                fields=["category", "created_at", "id"],
+                name="store_product_cat_time_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def in_stock(self):
+        return self.stock > 0
+
+
+class ProductSearchIndex(models.Model):
+    """
+    The SQLite FTS5 table over product name and description, kept in sync by
+    triggers (see migration 0003). Filtering ``search_index__document`` runs
+    a MATCH, and ``rank`` is its bm25 score. Not used on PostgreSQL, which
+    searches an expression index on the product table instead.
+    """
+
+    product = models.OneToOneField(
+        Product,
+        primary_key=True,
+        db_column="rowid",
+        on_delete=models.DO_NOTHING,
+        related_name="search_index",
+    )
+    # FTS5's hidden column named after the table; "= query" is a MATCH
+    document = models.TextField(db_column="store_product_fts")
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "store_product_fts"
+
+
+def line_total(prefix=""):
+    """SUM(quantity * price) over cart items, as 0.00 when there are none."""
+    return Coalesce(
+        Sum(F(f"{prefix}quantity") * F(f"{prefix}product__price")),
+        Value(Decimal("0.00")),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+class CartQuerySet(models.QuerySet):
+    def with_totals(self):
+        """Annotate the cart total and prefetch the items with their products."""
+        return self.annotate(items_total=line_total("items__")).prefetch_related(
+            Prefetch(
+                "items",
+                queryset=CartItem.objects.select_related("product").order_by("id"),
+            )
+        )
+
 
 class Cart(models.Model):
     user = models.OneToOneField(User, related_name="cart", on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CartQuerySet.as_manager()
+
     @property
     def total_price(self):
-        return sum(item.subtotal for item in self.items.all())
+        # Querysets from Cart.objects.with_totals() carry it already
+        if hasattr(self, "items_total"):
+            return self.items_total
+        return self.items.aggregate(total=line_total())["total"]
 
     def __str__(self):
         return f"Cart {self.id} - {self.user.username}"
@@ -61,6 +126,8 @@ class CartItem(models.Model):
     cart = models.ForeignKey(Cart, related_name="items", on_delete=models.CASCADE)
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
+    # Set while the line's quantity is counted in Product.reserved
+    reserved_until = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -70,6 +137,9 @@ class CartItem(models.Model):
 
     class Meta:
         unique_together = ("cart", "product")
+        indexes = [
+            models.Index(fields=["reserved_until"], name="store_cartitem_hold_idx"),
+        ]
 
     def __str__(self):
         return f"{self.quantity}x {self.product.name}"
@@ -93,6 +163,11 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["user", "created_at", "id"], name="store_order_user_time_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"Order {self.id} - {self.user.username}"
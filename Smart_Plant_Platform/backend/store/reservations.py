@@ -0,0 +1,102 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .checkout import OutOfStock, per_product
+from .models import CartItem, Product
+
+
+def hold(cart, product, quantity, add=False, now=None):
+    """
+    Set the cart's line for ``product`` to ``quantity`` units (or add that
+    many with ``add``) and hold them for CART_RESERVATION_MINUTES.
+
+    Only the difference from what the line already holds is reserved, by one
+    conditional UPDATE that matches only if that many units are free. So the
+    last units can't be promised to two carts. Raises OutOfStock otherwise.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        # Creating the line first gives two first adds one row to queue on,
+        # instead of racing to insert it. It is rolled back with OutOfStock.
+        item, created = CartItem.objects.select_for_update().get_or_create(
+            cart=cart, product=product, defaults={"quantity": 0}
+        )
+        if add:
+            quantity += item.quantity
+        # An expired hold still counts until the sweeper releases it
+        held = item.quantity if item.reserved_until is not None else 0
+
+        delta = quantity - held
+        if delta:
+            products = Product.objects.filter(pk=product.pk)
+            if delta > 0:
+                products = products.filter(stock__gte=F("reserved") + delta)
+            if not products.update(reserved=F("reserved") + delta):
+                raise OutOfStock([product])
+
+        item.quantity = quantity
+        item.reserved_until = now + timedelta(minutes=settings.CART_RESERVATION_MINUTES)
+        item.save()
+    return item
+
+
+def release(items):
+    """
+    Give back the units held by ``items``, in one UPDATE. Callers lock the
+    lines and clear or delete them in the same transaction.
+    """
+    quantities = Counter()
+    for item in items:
+        if item.reserved_until is not None:
+            quantities[item.product_id] += item.quantity
+    if quantities:
+        Product.objects.filter(pk__in=quantities).update(
+            reserved=F("reserved") - per_product(quantities)
+        )
+    return sum(quantities.values())
+
+
+def drop(item):
+    """Remove a cart line and release its hold."""
+    with transaction.atomic():
+        item = CartItem.objects.select_for_update().get(pk=item.pk)
+        release([item])
+        item.delete()
+
+
+def release_expired(batch_size=500, now=None):
+    """
+    Release every hold that ran out before ``now``, a batch per transaction.
+    The lines stay in their carts, unreserved, and checkout takes them from
+    free stock. Returns ``(lines, units)`` released.
+    """
+    now = now or timezone.now()
+    lines = units = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                CartItem.objects.select_for_update(skip_locked=True)
+                .filter(reserved_until__lt=now)
+                .order_by("reserved_until")
+                .only("id", "product", "quantity", "reserved_until")[:batch_size]
+            )
+            if not batch:
+                break
+            CartItem.objects.filter(pk__in=[item.pk for item in batch]).update(
+                reserved_until=None
+            )
+            units += release(batch)
+            lines += len(batch)
+        if len(batch) < batch_size:
+            break
+    return lines, units
+
+
+def release_cart(cart):
+    """Release the holds of every line of a cart that is being deleted."""
+    return release(CartItem.objects.filter(cart=cart, reserved_until__isnull=False))
@@ -0,0 +1,139 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, F, Q
+
+from .models import Category, Product
+
+WORD = re.compile(r"\w+")
+MAX_TERMS = 8
+SEARCH_CONFIG = "english"
+EVERYTHING = Q(pk__isnull=False)
+
+
+def search_terms(text):
+    return WORD.findall(text.lower())[:MAX_TERMS]
+
+
+def product_search_vector():
+    from django.contrib.postgres.search import SearchVector
+
+    return SearchVector("name", weight="A", config=SEARCH_CONFIG) + SearchVector(
+        "description", weight="B", config=SEARCH_CONFIG
+    )
+
+
+def matching(queryset, terms):
+    """
+    Restrict ``queryset`` to products matching every term, the last one as a
+    prefix so results show up while the user is still typing.
+    """
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.search import SearchQuery
+
+        raw = " & ".join(terms[:-1] + [f"{terms[-1]}:*"])
+        query = SearchQuery(raw, search_type="raw", config=SEARCH_CONFIG)
+        return queryset.annotate(document=product_search_vector()).filter(
+            document=query
+        )
+    query = " ".join(f'"{term}"' for term in terms) + "*"
+    return queryset.filter(search_index__document=query)
+
+
+def ranked(queryset, terms):
+    """Order a ``matching`` queryset best match first."""
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        raw = " & ".join(terms[:-1] + [f"{terms[-1]}:*"])
+        query = SearchQuery(raw, search_type="raw", config=SEARCH_CONFIG)
+        return queryset.annotate(
+            score=SearchRank(product_search_vector(), query)
+        ).order_by("-score", "pk")
+    # bm25 scores are negative; the lowest is the most relevant
+    return queryset.annotate(score=F("search_index__rank")).order_by("score", "pk")
+
+
+def price_buckets():
+    """``(low, high)`` ranges between the PRODUCT_PRICE_FACETS boundaries."""
+    bounds = [None, *settings.PRODUCT_PRICE_FACETS, None]
+    return list(zip(bounds, bounds[1:]))
+
+
+def price_range(low, high):
+    q = EVERYTHING
+    if low is not None:
+        q &= Q(price__gte=low)
+    if high is not None:
+        q &= Q(price__lt=high)
+    return q
+
+
+def search_products(
+    text, category=None, min_price=None, max_price=None, in_stock=False
+):
+    """
+    Full-text search over active products. Returns the ranked queryset, the
+    number of results and the facet counts.
+
+    Facets are disjunctive: each one is counted with every filter applied
+    except its own, so picking a category still shows how many results the
+    other categories would give. All of them come from one pass over the
+    matches, grouped by category with a conditional count per facet value;
+    the category filter is then applied to the per-category rows in Python.
+    Three queries in all, however many products match.
+    """
+    terms = search_terms(text)
+    if not terms:
+        raise ValueError("q must contain at least one word")
+
+    base = matching(Product.objects.filter(is_active=True), terms)
+    by_price = price_range(min_price, max_price)
+    by_stock = Q(stock__gt=0) if in_stock else EVERYTHING
+    buckets = price_buckets()
+
+    rows = list(
+        base.values("category_id")
+        .annotate(
+            count=Count("pk", filter=by_price & by_stock),
+            in_stock=Count("pk", filter=by_price & Q(stock__gt=0)),
+            **{
+                f"price_{i}": Count("pk", filter=by_stock & price_range(*bucket))
+                for i, bucket in enumerate(buckets)
+            },
+        )
+        .order_by()
+    )
+    # Grouping on the bare column is cheaper than joining every match to
+    # its category; the few category rows are looked up afterwards
+    categories = Category.objects.in_bulk([row["category_id"] for row in rows])
+    rows.sort(key=lambda row: (-row["count"], categories[row["category_id"]].name))
+    selected = [
+        row for row in rows if category in (None, categories[row["category_id"]].slug)
+    ]
+    facets = {
+        "category": [
+            {
+                "slug": categories[row["category_id"]].slug,
+                "name": categories[row["category_id"]].name,
+                "count": row["count"],
+            }
+            for row in rows
+            if row["count"]
+        ],
+        "price": [
+            {
+                "min": low,
+                "max": high,
+                "count": sum(row[f"price_{i}"] for row in selected),
+            }
+            for i, (low, high) in enumerate(buckets)
+        ],
+        "in_stock": sum(row["in_stock"] for row in selected),
+    }
+    total = sum(row["count"] for row in selected)
+
+    by_category = Q(category__slug=category) if category else EVERYTHING
+    results = ranked(base.filter(by_category & by_price & by_stock), terms)
+    return results.select_related("category"), total, facets
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+
+from mediafiles.serializers import ImageSrcsetField
 from .models import Category, Product, Cart, CartItem, Order, OrderItem
 
 
@@ -10,6 +12,7 @@ class CategorySerializer(serializers.ModelSerializer):
 
 class ProductSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source="category.name", read_only=True)
+    image_srcset = ImageSrcsetField()
 
     class Meta:
         model = Product
@@ -22,11 +25,16 @@ class ProductSerializer(serializers.ModelSerializer):
             "description",
             "price",
             "stock",
+            "in_stock",
             "image",
+            "image_srcset",
             "is_active",
             "created_at",
             "updated_at",
         ]
+        # Unit counts change with every order, so the cached catalog only
+        # says whether there are any; the availability action has the counts
+        extra_kwargs = {"stock": {"write_only": True}}
 
 
 class CartItemSerializer(serializers.ModelSerializer):
@@ -45,6 +53,7 @@ class CartItemSerializer(serializers.ModelSerializer):
             "product_price",
             "quantity",
             "subtotal",
+            "reserved_until",
             "created_at",
             "updated_at",
         ]
@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from mediafiles.variants import variants_built
+
+from .cache import invalidate_catalog
+from .models import Cart, Category, Product
+from .reservations import release_cart
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog_on_change(sender, **kwargs):
+    invalidate_catalog()
+    # Again after commit, in case a request cached the old rows in between
+    transaction.on_commit(invalidate_catalog)
+
+
+@receiver(variants_built, sender=Product)
+def invalidate_catalog_on_variants(sender, **kwargs):
+    invalidate_catalog()
+
+
+@receiver(pre_delete, sender=Cart)
+def release_cart_holds(sender, instance, **kwargs):
+    # Deleting a user cascades to the cart, which would strand its holds
+    release_cart(instance)
@@ -1,3 +1,385 @@
-from django.test import TestCase
+import sys
+import threading
+import time
+import warnings
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import CacheKeyWarning
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .cache import catalog_version
+from .checkout import OutOfStock, place_order
+from .models import Cart, CartItem, Category, Order, OrderItem, Product
+from .reservations import hold, release_expired
+
+User = get_user_model()
+
+
+def make_product(category, name, stock, price="9.99"):
+    return Product.objects.create(
+        name=name,
+        slug=name.lower(),
+        category=category,
+        description="",
+        price=Decimal(price),
+        stock=stock,
+    )
+
+
+def make_cart(name, lines):
+    user = User.objects.create_user(
+        email=f"{name}@example.com", username=name, password=None
+    )
+    cart = Cart.objects.create(user=user)
+    for product, quantity in lines:
+        CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+    return cart
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Pots", slug="pots")
+        self.pot = make_product(category, "Pot", stock=5, price="10.00")
+        self.soil = make_product(category, "Soil", stock=1, price="2.50")
+
+    def test_places_order_with_constant_queries(self):
+        cart = make_cart("ada", [(self.pot, 2), (self.soil, 1)])
+
+        with self.assertNumQueries(7):
+            order = place_order(cart, "1 Garden Way")
+
+        self.assertEqual(order.total_price, Decimal("22.50"))
+        self.assertEqual(order.items.count(), 2)
+        self.assertFalse(cart.items.exists())
+        self.pot.refresh_from_db()
+        self.assertEqual(self.pot.stock, 3)
+
+    def test_insufficient_stock_sells_nothing(self):
+        cart = make_cart("ada", [(self.pot, 2), (self.soil, 2)])
+
+        with self.assertRaises(OutOfStock) as raised:
+            place_order(cart, "1 Garden Way")
+
+        self.assertEqual([p.name for p in raised.exception.products], ["Soil"])
+        self.pot.refresh_from_db()
+        self.assertEqual(self.pot.stock, 5)
+        self.assertEqual(cart.items.count(), 2)
+        self.assertFalse(Order.objects.exists())
+
+    def test_catalog_is_invalidated_only_when_an_order_sells_out(self):
+        version = catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            place_order(make_cart("ada", [(self.pot, 2)]), "1 Garden Way")
+        self.assertEqual(catalog_version(), version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            place_order(make_cart("grace", [(self.soil, 1)]), "2 Garden Way")
+        self.assertGreater(catalog_version(), version)
+        product = APIClient().get(f"/store/products/{self.soil.slug}/").json()
+        self.assertNotIn("stock", product)
+        self.assertFalse(product["in_stock"])
+
+
+class CatalogCacheTests(TestCase):
+    def test_any_lookup_makes_a_valid_cache_key(self):
+        category = Category.objects.create(name="Pots", slug="pots")
+        make_product(category, "Clay Pot", stock=1)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", CacheKeyWarning)
+            found = self.client.get("/store/products/clay pot/")
+            missing = self.client.get(f"/store/products/{'x' * 300}/")
+
+        self.assertEqual(found.status_code, 200)
+        self.assertEqual(missing.status_code, 404)
+
+
+class CartQueryTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Pots", slug="pots")
+        self.products = [
+            make_product(category, f"Pot{i}", stock=100, price="1.25")
+            for i in range(30)
+        ]
+        self.cart = make_cart("ada", [(product, 2) for product in self.products])
+        self.client = APIClient()
+        self.client.force_authenticate(self.cart.user)
+
+    def test_cart_total_is_one_aggregate(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.cart.total_price, Decimal("75.00"))
+
+    def test_cart_view_queries_do_not_grow_with_items(self):
+        with self.assertNumQueries(2):  # the cart with its total, then the items
+            response = self.client.get(f"/store/cart/{self.cart.pk}/")
+
+        self.assertEqual(len(response.json()["items"]), 30)
+        self.assertEqual(response.json()["total_price"], 75.0)
+
+    def test_checkout_queries_do_not_grow_with_items(self):
+        # The cart, seven for the checkout, then the order re-read with its
+        # user, and its items with their products
+        with self.assertNumQueries(10):
+            response = self.client.post(
+                "/store/orders/", {"shipping_address": "1 Garden Way"}
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()["items"]), 30)
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        pots = Category.objects.create(name="Pots", slug="pots")
+        seeds = Category.objects.create(name="Seeds", slug="seeds")
+        make_product(pots, "Terracotta Pot", stock=3, price="12.00")
+        make_product(pots, "Glazed Planter", stock=0, price="30.00")
+        Product.objects.filter(name="Glazed Planter").update(
+            description="A terracotta planter with a glaze"
+        )
+        make_product(seeds, "Terracotta Tomato Seeds", stock=9, price="4.00")
+        self.hidden = make_product(pots, "Terracotta Urn", stock=1, price="80.00")
+        self.hidden.is_active = False
+        self.hidden.save()
+        self.client = APIClient()
+
+    def search(self, query):
+        return self.client.get(f"/store/products/search/?{query}").json()
+
+    def test_ranks_name_matches_first_and_skips_inactive(self):
+        result = self.search("q=terrac")
+
+        names = [product["name"] for product in result["results"]]
+        self.assertEqual(result["count"], 3)
+        self.assertEqual(names[-1], "Glazed Planter")
+        self.assertNotIn("Terracotta Urn", names)
+
+    def test_facets_ignore_their_own_filter(self):
+        result = self.search("q=terracotta&category=pots&in_stock=1")
+
+        self.assertEqual(result["count"], 1)
+        self.assertEqual(
+            {row["slug"]: row["count"] for row in result["facets"]["category"]},
+            {"pots": 1, "seeds": 1},
+        )
+        self.assertEqual(result["facets"]["in_stock"], 1)
+        price_counts = [row["count"] for row in result["facets"]["price"]]
+        self.assertEqual(price_counts, [0, 1, 0, 0, 0])
+
+    def test_list_and_detail_skip_inactive(self):
+        listed = self.client.get("/store/products/?limit=100").json()["results"]
+
+        self.assertNotIn("Terracotta Urn", [product["name"] for product in listed])
+        self.assertEqual(len(listed), 3)
+        response = self.client.get(f"/store/products/{self.hidden.slug}/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_renamed_product_is_reindexed(self):
+        Product.objects.filter(name="Terracotta Pot").update(name="Clay Pot")
+
+        self.assertEqual(self.search("q=clay")["count"], 1)
+        self.assertEqual(self.search("q=terracotta")["count"], 2)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            email="ada@example.com", username="ada", password=None
+        )
+        Order.objects.bulk_create(
+            Order(user=user, total_price=Decimal("1.00"), shipping_address="")
+            for _ in range(25)
+        )
+        # A run of identical timestamps has to be split on the id tie-break
+        orders = list(Order.objects.order_by("id"))
+        Order.objects.filter(id__in=[o.id for o in orders[5:15]]).update(
+            created_at=orders[5].created_at
+        )
+        self.expected = list(
+            Order.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def ids(self, page):
+        return [order["id"] for order in page["results"]]
+
+    def test_walks_every_row_once_in_constant_queries(self):
+        url, seen = "/store/orders/?limit=7", []
+        while url:
+            # One page of orders, then the items of just those orders
+            with self.assertNumQueries(2):
+                page = self.client.get(url).json()
+            seen.extend(self.ids(page))
+            url = page["next"]
+
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_returns_the_page_before(self):
+        first = self.client.get("/store/orders/?limit=7").json()
+        second = self.client.get(first["next"]).json()
+
+        self.assertIsNone(first["previous"])
+        self.assertEqual(self.ids(second), self.expected[7:14])
+        self.assertEqual(
+            self.ids(self.client.get(second["previous"]).json()), self.ids(first)
+        )
+
+    def test_rejects_malformed_cursor(self):
+        response = self.client.get("/store/orders/?cursor=nope")
+
+        self.assertEqual(response.status_code, 400)
+
+
+class ReservationTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Drops", slug="drops")
+        self.fern = make_product(category, "Fern", stock=3)
+        self.ada = APIClient()
+        self.ada.force_authenticate(make_cart("ada", []).user)
+        self.grace = APIClient()
+        self.grace.force_authenticate(make_cart("grace", []).user)
+
+    def add(self, client, quantity):
+        return client.post(
+            "/store/cart/0/add_item/",
+            {"product": self.fern.id, "quantity": quantity},
+            format="json",
+        )
+
+    def available(self):
+        response = self.ada.get(f"/store/products/availability/?ids={self.fern.id}")
+        return response.json()["results"][0]["available"]
+
+    def test_held_units_cannot_go_to_another_cart(self):
+        self.assertEqual(self.add(self.ada, 2).status_code, 200)
+
+        self.assertEqual(self.add(self.grace, 2).status_code, 400)
+        self.assertFalse(CartItem.objects.filter(cart__user__username="grace"))
+        self.assertEqual(self.add(self.grace, 1).status_code, 200)
+        self.assertEqual(self.available(), 0)
+
+    def test_checkout_converts_the_hold(self):
+        self.add(self.ada, 2)
+
+        response = self.ada.post(
+            "/store/orders/", {"shipping_address": "1 Garden Way"}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.fern.refresh_from_db()
+        self.assertEqual((self.fern.stock, self.fern.reserved), (1, 0))
+
+    def test_expired_holds_are_released_but_lines_kept(self):
+        self.add(self.ada, 3)
+        CartItem.objects.update(reserved_until=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(release_expired(batch_size=1), (1, 3))
+        self.assertEqual(self.available(), 3)
+        # The unheld line can still be bought from free stock
+        self.add(self.grace, 1)
+        response = self.ada.post(
+            "/store/orders/", {"shipping_address": "1 Garden Way"}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_removing_the_line_releases_it(self):
+        self.add(self.ada, 3)
+
+        self.ada.post(
+            "/store/cart/0/remove_item/", {"product": self.fern.id}, format="json"
+        )
+
+        self.assertEqual(self.available(), 3)
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """Many buyers racing for scarce stock must never drive it below zero."""
+
+    buyers = 40
+    stock = 25
+
+    def test_concurrent_checkouts_do_not_oversell(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("needs a database that threads can share")
+
+        category = Category.objects.create(name="Seeds", slug="seeds")
+        seeds = make_product(category, "Seeds", stock=self.stock)
+        bulbs = make_product(category, "Bulbs", stock=self.stock * 2)
+        carts = [
+            make_cart(f"buyer{i}", [(seeds, 1 + i % 2), (bulbs, 1)])
+            for i in range(self.buyers)
+        ]
+
+        placed, refused, errors = [], [], []
+        barrier = threading.Barrier(self.buyers)
+
+        def checkout(cart):
+            try:
+                barrier.wait()
+                placed.append(place_order(cart, "Somewhere"))
+            except OutOfStock:
+                refused.append(cart)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=checkout, args=(c,)) for c in carts]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(placed) + len(refused), self.buyers)
+        seeds.refresh_from_db()
+        bulbs.refresh_from_db()
+        sold = OrderItem.objects.filter(product=seeds).aggregate(n=Sum("quantity"))
+        self.assertGreaterEqual(seeds.stock, 0)
+        self.assertEqual(seeds.stock + (sold["n"] or 0), self.stock)
+        self.assertEqual(bulbs.stock + len(placed), self.stock * 2)
+        self.assertEqual(Order.objects.count(), len(placed))
+        sys.stderr.write(
+            f"\n{len(placed)} orders placed, {len(refused)} refused, "
+            f"{len(placed) / elapsed:.0f} orders/sec\n"
+        )
+
+    def test_concurrent_first_adds_share_one_line(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("needs a database that threads can share")
+
+        category = Category.objects.create(name="Seeds", slug="seeds")
+        seeds = make_product(category, "Seeds", stock=self.stock)
+        cart = make_cart("buyer", [])
+        adds = 8
+        errors = []
+        barrier = threading.Barrier(adds)
+
+        def add():
+            try:
+                barrier.wait()
+                hold(cart, seeds, 1, add=True)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=add) for _ in range(adds)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        seeds.refresh_from_db()
+        self.assertEqual(CartItem.objects.get(cart=cart).quantity, adds)
+        self.assertEqual(seeds.reserved, adds)
@@ -1,10 +1,17 @@
-from django.db import transaction
+from decimal import Decimal
+
+from django.db.models import F, Prefetch
+from django.db.models.functions import Greatest
 from django.shortcuts import get_object_or_404
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from .cache import CatalogCacheMixin, catalog_response
+from .checkout import CheckoutError, OutOfStock, place_order
 from .models import Cart, CartItem, Category, Order, OrderItem, Product
+from .reservations import drop, hold
+from .search import search_products
 from .serializers import (
     CartItemSerializer,
     CartSerializer,
@@ -17,62 +24,172 @@ from .serializers import (
 # Create your views here.
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    # A short, name-ordered list that menus load whole
+    pagination_class = None
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     lookup_field = "slug"
 
     def get_queryset(self):
-        queryset = Product.objects.all()
+        queryset = Product.objects.select_related("category")
+        # Delisted products stay editable but drop out of the public catalog
+        if self.request.method in permissions.SAFE_METHODS:
+            queryset = queryset.filter(is_active=True)
         category = self.request.query_params.get("category", None)
         if category:
             queryset = queryset.filter(category__slug=category)
         return queryset
 
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """
+        Ranked full-text search over active products, with category, price
+        and stock facets. Takes ``q`` plus optional ``category``,
+        ``min_price``, ``max_price``, ``in_stock``, ``page`` and ``page_size``.
+        """
+        return catalog_response(
+            request, "products:search", lambda: self.search_response(request)
+        )
+
+    def search_response(self, request):
+        try:
+            params = search_params(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        page, page_size = params.pop("page"), params.pop("page_size")
+        try:
+            results, count, facets = search_products(**params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        start = (page - 1) * page_size
+        products = results[start : start + page_size]
+        return Response(
+            {
+                "count": count,
+                "page": page,
+                "results": self.get_serializer(products, many=True).data,
+                "facets": facets,
+            }
+        )
+
+    @action(detail=False, methods=["get"])
+    def availability(self, request):
+        """
+        Units available to sell right now for ``ids`` (comma-separated, up to
+        100), read from the maintained stock and reserved counters. Not
+        cached, since holds come and go without touching the catalog.
+        """
+        try:
+            ids = availability_ids(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        rows = (
+            Product.objects.filter(pk__in=ids)
+            .annotate(available=Greatest(F("stock") - F("reserved"), 0))
+            .values("id", "available")
+        )
+        return Response({"results": list(rows)})
+
+
+def availability_ids(request):
+    raw = request.query_params.get("ids", "")
+    ids = [part for part in raw.split(",") if part]
+    if not ids or not all(part.isdigit() for part in ids):
+        raise ValueError("ids must be a comma-separated list of product ids")
+    if len(ids) > 100:
+        raise ValueError("At most 100 ids at a time")
+    return {int(part) for part in ids}
+
+
+def cart_quantity(request):
+    try:
+        return int(request.data.get("quantity", 1))
+    except (TypeError, ValueError):
+        raise ValueError("quantity must be a whole number")
+
+
+def search_params(request):
+    """Parse and validate the query params of the product search."""
+    params = request.query_params
+    page = int(params.get("page", 1))
+    page_size = int(params.get("page_size", 20))
+    if page < 1 or not 1 <= page_size <= 50:
+        raise ValueError("page must be positive and page_size 1-50")
+    prices = {}
+    for name in ("min_price", "max_price"):
+        if params.get(name):
+            try:
+                prices[name] = Decimal(params[name])
+            except ArithmeticError:
+                prices[name] = None
+            if prices[name] is None or not prices[name].is_finite():
+                raise ValueError(f"{name} must be a number")
+    return {
+        "text": params.get("q", ""),
+        "category": params.get("category") or None,
+        "in_stock": params.get("in_stock", "").lower() in ("1", "true", "yes"),
+        "page": page,
+        "page_size": page_size,
+        **prices,
+    }
+
 
 class CartViewSet(viewsets.ModelViewSet):
     serializer_class = CartSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Each user has the one cart
+    pagination_class = None
 
     def get_queryset(self):
-        return Cart.objects.filter(user=self.request.user)
+        return Cart.objects.filter(user=self.request.user).with_totals()
 
     def get_object(self):
+        # One query for the cart and its total, one for the items
+        cart = self.get_queryset().first()
+        if cart is None:
+            Cart.objects.get_or_create(user=self.request.user)
+            cart = self.get_queryset().get()
+        return cart
+
+    def get_cart(self):
+        """The bare cart row, for actions that don't serialize it."""
         cart, created = Cart.objects.get_or_create(user=self.request.user)
         return cart
 
     @action(detail=True, methods=["post"])
     def add_item(self, request, pk=None):
-        cart = self.get_object()
+        cart = self.get_cart()
         product_id = request.data.get("product")
-        quantity = int(request.data.get("quantity", 1))
-
         try:
-            product = Product.objects.get(id=product_id)
-            if product.stock < quantity:
-                return Response(
-                    {"error": "Not enough stock available"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            cart_item, created = CartItem.objects.get_or_create(
-                cart=cart, product=product, defaults={"quantity": quantity}
+            quantity = cart_quantity(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if quantity <= 0:
+            return Response(
+                {"error": "quantity must be positive"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-            if not created:
-                cart_item.quantity += quantity
-                cart_item.save()
-
+        try:
+            product = Product.objects.get(id=product_id)
+            cart_item = hold(cart, product, quantity, add=True)
             serializer = CartItemSerializer(cart_item)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
+        except OutOfStock:
+            return Response(
+                {"error": "Not enough stock available"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         except Product.DoesNotExist:
             return Response(
                 {"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND
@@ -80,12 +197,12 @@ class CartViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["post"])
     def remove_item(self, request, pk=None):
-        cart = self.get_object()
+        cart = self.get_cart()
         product_id = request.data.get("product")
 
         try:
             cart_item = CartItem.objects.get(cart=cart, product_id=product_id)
-            cart_item.delete()
+            drop(cart_item)
             return Response(status=status.HTTP_204_NO_CONTENT)
         except CartItem.DoesNotExist:
             return Response(
@@ -94,21 +211,30 @@ class CartViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["post"])
     def update_quantity(self, request, pk=None):
-        cart = self.get_object()
+        cart = self.get_cart()
         product_id = request.data.get("product")
-        quantity = int(request.data.get("quantity", 1))
+        try:
+            quantity = cart_quantity(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            cart_item = CartItem.objects.get(cart=cart, product_id=product_id)
+            cart_item = CartItem.objects.select_related("product").get(
+                cart=cart, product_id=product_id
+            )
             if quantity <= 0:
-                cart_item.delete()
+                drop(cart_item)
                 return Response(status=status.HTTP_204_NO_CONTENT)
 
-            cart_item.quantity = quantity
-            cart_item.save()
+            cart_item = hold(cart, cart_item.product, quantity)
             serializer = CartItemSerializer(cart_item)
             return Response(serializer.data)
 
+        except OutOfStock:
+            return Response(
+                {"error": "Not enough stock available"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         except CartItem.DoesNotExist:
             return Response(
                 {"error": "Item not found in cart"}, status=status.HTTP_404_NOT_FOUND
@@ -120,46 +246,23 @@ class OrderViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
-
-    @transaction.atomic
-    def create(self, request, *args, **kwargs):
-        cart = get_object_or_404(Cart, user=request.user)
-        if not cart.items.exists():
-            return Response(
-                {"error": "Cart is empty"}, status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # Create order
-        order = Order.objects.create(
-            user=request.user,
-            total_price=cart.total_price,
-            shipping_address=request.data.get("shipping_address"),
-        )
-
-        # Create order items and update product stock
-        for cart_item in cart.items.all():
-            product = cart_item.product
-            if product.stock < cart_item.quantity:
-                order.delete()
-                return Response(
-                    {"error": f"Not enough stock for {product.name}"},
-                    status=status.HTTP_400_BAD_REQUEST,
+        return (
+            Order.objects.filter(user=self.request.user)
+            .select_related("user")
+            .prefetch_related(
+                Prefetch(
+                    "items",
+                    queryset=OrderItem.objects.select_related("product").order_by("id"),
                 )
-
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                quantity=cart_item.quantity,
-                price=product.price,
             )
+        )
 
-            # Update product stock
-            product.stock -= cart_item.quantity
-            product.save()
-
-        # Clear cart
-        cart.items.all().delete()
+    def create(self, request, *args, **kwargs):
+        cart = get_object_or_404(Cart, user=request.user)
+        try:
+            order = place_order(cart, request.data.get("shipping_address"))
+        except CheckoutError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = self.get_serializer(order)
+        serializer = self.get_serializer(self.get_queryset().get(pk=order.pk))
         return Response(serializer.data, status=status.HTTP_201_CREATED)
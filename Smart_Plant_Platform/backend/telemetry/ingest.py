@@ -0,0 +1,93 @@
+import math
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from plants.models import UserPlant
+
+from .models import Metric, SensorReading, SensorRollup
+from .rollups import watermark
+
+METRIC_FIELDS = {metric.name.lower(): metric.value for metric in Metric}
+
+
+class IngestError(ValueError):
+    pass
+
+
+def parse_reading(reading, plant_ids, now, oldest=None):
+    """
+    Expand one ``{plant, ts, moisture, temperature, light}`` object into rows.
+    Readings before ``oldest``, the minute rollup watermark, are rejected: no
+    rollup would ever include them.
+    """
+    if not isinstance(reading, dict):
+        raise IngestError({"reading": "Must be an object"})
+    errors = {}
+    plant = reading.get("plant")
+    if plant not in plant_ids:
+        errors["plant"] = f"Unknown plant {plant}"
+    ts = reading.get("ts")
+    if isinstance(ts, bool) or not isinstance(ts, (int, float)):
+        errors["ts"] = "Must be epoch seconds"
+    elif ts > now + settings.TELEMETRY_MAX_CLOCK_SKEW:
+        errors["ts"] = "Is in the future"
+    elif oldest is not None and ts < oldest:
+        errors["ts"] = "Is older than the readings already rolled up"
+
+    rows = []
+    for name, metric in METRIC_FIELDS.items():
+        value = reading.get(name)
+        if value is None:
+            continue
+        if (
+            isinstance(value, bool)
+            or not isinstance(value, (int, float))
+            or not math.isfinite(value)
+        ):
+            errors[name] = "Must be a number"
+            continue
+        rows.append((metric, float(value)))
+    if not rows and not errors:
+        errors["reading"] = f"Needs at least one of {', '.join(METRIC_FIELDS)}"
+    if errors:
+        raise IngestError(errors)
+    return [(plant, int(ts), metric, value) for metric, value in rows]
+
+
+def insert_rows(rows):
+    """One executemany for the whole batch; readings never need save() or signals."""
+    meta = SensorReading._meta
+    quote = connection.ops.quote_name
+    columns = [
+        meta.get_field(name).column for name in ("plant", "ts", "metric", "value")
+    ]
+    sql = "INSERT INTO {} ({}) VALUES (%s, %s, %s, %s)".format(
+        quote(meta.db_table), ", ".join(quote(column) for column in columns)
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def ingest_readings(user, readings):
+    """
+    Validate a batch of readings against the user's plants and store the
+    valid ones. Returns ``(accepted_rows, rejected)`` where ``rejected``
+    lists the index and errors of each invalid reading.
+    """
+    plant_ids = set(UserPlant.objects.filter(user=user).values_list("id", flat=True))
+    now = time.time()
+    rows, rejected = [], []
+    # Locked until the insert commits, so a rollup can't move the watermark
+    # past these readings before it can see them
+    with transaction.atomic():
+        oldest = watermark(SensorRollup.MINUTE, lock=True)
+        for index, reading in enumerate(readings):
+            try:
+                rows.extend(parse_reading(reading, plant_ids, now, oldest))
+            except IngestError as e:
+                rejected.append({"index": index, "errors": e.args[0]})
+        if rows:
+            insert_rows(rows)
+    return len(rows), rejected
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from telemetry.rollups import apply_retention, rollup_all
+
+
+class Command(BaseCommand):
+    help = "Roll sensor readings up into minute/hour/day buckets and apply retention"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument(
+            "--no-retention",
+            action="store_true",
+            help="Only roll up; keep expired readings and rollups",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=None,
+            help="Keep running and roll up every INTERVAL seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            written = rollup_all(batch_size=options["batch_size"])
+            summary = ", ".join(f"{res}s: {count}" for res, count in written.items())
+            if not options["no_retention"]:
+                deleted = apply_retention()
+                summary += "; expired " + ", ".join(
+                    f"{level}: {count}" for level, count in deleted.items()
+                )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Rolled up buckets ({summary}) in {time.monotonic() - started:.1f}s"
+                )
+            )
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
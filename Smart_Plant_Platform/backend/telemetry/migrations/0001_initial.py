@@ -0,0 +1,120 @@
+# Generated by Django 5.1.6 on 2026-10-19 14:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("plants", "0006_alter_growthrecord_recorded_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RollupWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("resolution", models.PositiveIntegerField(unique=True)),
+                ("bucket", models.IntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="SensorReading",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("ts", models.IntegerField()),
+                (
+                    "metric",
+                    models.PositiveSmallIntegerField(
+                        choices=[(1, "Soil moisture"), (2, "Temperature"), (3, "Light")]
+                    ),
+                ),
+                ("value", models.FloatField()),
+                (
+                    "plant",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="plants.userplant",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["plant", "ts"], name="telemetry_reading_plant_ts"
+                    ),
+                    models.Index(fields=["ts"], name="telemetry_reading_ts"),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="SensorRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("resolution", models.PositiveIntegerField()),
+                ("bucket", models.IntegerField()),
+                (
+                    "metric",
+                    models.PositiveSmallIntegerField(
+                        choices=[(1, "Soil moisture"), (2, "Temperature"), (3, "Light")]
+                    ),
+                ),
+                ("count", models.PositiveIntegerField()),
+                ("total", models.FloatField()),
+                ("minimum", models.FloatField()),
+                ("maximum", models.FloatField()),
+                (
+                    "plant",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="plants.userplant",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["resolution", "bucket"],
+                        name="telemetry_rollup_res_bucket",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("plant", "resolution", "bucket", "metric"),
+                        name="telemetry_rollup_unique_bucket",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-19 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("telemetry", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="rollupwatermark",
+            name="bucket",
+            field=models.BigIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name="sensorreading",
+            name="ts",
+            field=models.BigIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name="sensorrollup",
+            name="bucket",
+            field=models.BigIntegerField(),
+        ),
+    ]
@@ -0,0 +1,75 @@
+from django.db import models
+
+from plants.models import UserPlant
+
+
+class Metric(models.IntegerChoices):
+    MOISTURE = 1, "Soil moisture"
+    TEMPERATURE = 2, "Temperature"
+    LIGHT = 3, "Light"
+
+
+class SensorReading(models.Model):
+    """
+    One raw sensor sample. Kept deliberately narrow (integer epoch seconds,
+    a small metric code and a float) since there are many of them; raw rows
+    are dropped after TELEMETRY_RETENTION_DAYS["raw"] days.
+    """
+
+    plant = models.ForeignKey(
+        UserPlant, on_delete=models.CASCADE, related_name="+", db_index=False
+    )
+    ts = models.BigIntegerField()
+    metric = models.PositiveSmallIntegerField(choices=Metric.choices)
+    value = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["plant", "ts"], name="telemetry_reading_plant_ts"),
+            # Lets rollups and retention walk recent or expired rows by time
+            models.Index(fields=["ts"], name="telemetry_reading_ts"),
+        ]
+
+
+class SensorRollup(models.Model):
+    """
+    Aggregate of one metric over a ``resolution``-second bucket. Count, sum,
+    min and max compose, so hours are built from minutes and days from
+    hours without going back to the raw readings.
+    """
+
+    MINUTE = 60
+    HOUR = 3600
+    DAY = 86400
+    RESOLUTIONS = (MINUTE, HOUR, DAY)
+
+    plant = models.ForeignKey(
+        UserPlant, on_delete=models.CASCADE, related_name="+", db_index=False
+    )
+    resolution = models.PositiveIntegerField()
+    bucket = models.BigIntegerField()
+    metric = models.PositiveSmallIntegerField(choices=Metric.choices)
+    count = models.PositiveIntegerField()
+    total = models.FloatField()
+    minimum = models.FloatField()
+    maximum = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["plant", "resolution", "bucket", "metric"],
+                name="telemetry_rollup_unique_bucket",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["resolution", "bucket"], name="telemetry_rollup_res_bucket"
+            ),
+        ]
+
+
+class RollupWatermark(models.Model):
+    """Start of the oldest bucket the next rollup run recomputes, per resolution."""
+
+    resolution = models.PositiveIntegerField(unique=True)
+    bucket = models.BigIntegerField()
@@ -0,0 +1,84 @@
+import time
+from itertools import groupby
+
+from django.conf import settings
+
+from .models import Metric, SensorReading, SensorRollup
+
+METRIC_NAMES = {metric.value: metric.name.lower() for metric in Metric}
+
+
+def covers(level, start, now):
+    """Whether ``level`` still holds data as old as ``start``."""
+    days = settings.TELEMETRY_RETENTION_DAYS.get(level)
+    return days is None or start >= now - days * 86400
+
+
+def pick_resolution(start, end, max_points, now=None):
+    """
+    The finest level that both still has data for the window and fits it
+    into ``max_points`` buckets. Short, recent windows are served raw.
+    """
+    now = now or time.time()
+    window = end - start
+    if window <= settings.TELEMETRY_RAW_MAX_WINDOW and covers("raw", start, now):
+        return "raw"
+    for resolution in SensorRollup.RESOLUTIONS:
+        if window / resolution <= max_points and covers(resolution, start, now):
+            return resolution
+    return SensorRollup.DAY
+
+
+def raw_series(plant, start, end):
+    rows = (
+        SensorReading.objects.filter(plant=plant, ts__gte=start, ts__lte=end)
+        .order_by("ts", "metric")
+        .values_list("ts", "metric", "value")
+    )
+    return [
+        {"ts": ts, **{METRIC_NAMES[metric]: value for _, metric, value in group}}
+        for ts, group in groupby(rows.iterator(), key=lambda row: row[0])
+    ]
+
+
+def rollup_series(plant, resolution, start, end):
+    rows = (
+        SensorRollup.objects.filter(
+            plant=plant,
+            resolution=resolution,
+            bucket__gte=start - start % resolution,
+            bucket__lte=end,
+        )
+        .order_by("bucket", "metric")
+        .values_list("bucket", "metric", "count", "total", "minimum", "maximum")
+    )
+    return [
+        {
+            "ts": bucket,
+            **{
+                METRIC_NAMES[metric]: {
+                    "avg": total / count,
+                    "min": minimum,
+                    "max": maximum,
+                    "count": count,
+                }
+                for _, metric, count, total, minimum, maximum in group
+            },
+        }
+        for bucket, group in groupby(rows.iterator(), key=lambda row: row[0])
+    ]
+
+
+def plant_series(plant, start, end, max_points):
+    resolution = pick_resolution(start, end, max_points)
+    if resolution == "raw":
+        points = raw_series(plant, start, end)
+    else:
+        points = rollup_series(plant, resolution, start, end)
+    return {
+        "plant": plant.id,
+        "start": start,
+        "end": end,
+        "resolution": resolution,
+        "points": points,
+    }
@@ -0,0 +1,159 @@
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Sum
+
+from .models import RollupWatermark, SensorReading, SensorRollup
+
+# Each resolution is built from the next finer one; None is the raw readings
+SOURCES = {
+    SensorRollup.MINUTE: None,
+    SensorRollup.HOUR: SensorRollup.MINUTE,
+    SensorRollup.DAY: SensorRollup.HOUR,
+}
+CONSUMERS = {source: resolution for resolution, source in SOURCES.items()}
+UPDATE_FIELDS = ["count", "total", "minimum", "maximum"]
+
+
+def floor_to(ts, resolution):
+    return ts - ts % resolution
+
+
+def source_rows(resolution):
+    source = SOURCES[resolution]
+    if source is None:
+        return SensorReading.objects.all(), "ts"
+    return SensorRollup.objects.filter(resolution=source), "bucket"
+
+
+def source_buckets(resolution, start, end):
+    """(plant, metric, bucket) aggregates over [start, end) of the source rows."""
+    rows, time_field = source_rows(resolution)
+    if SOURCES[resolution] is None:
+        aggregates = {
+            "agg_count": Count("id"),
+            "agg_total": Sum("value"),
+            "agg_min": Min("value"),
+            "agg_max": Max("value"),
+        }
+    else:
+        aggregates = {
+            "agg_count": Sum("count"),
+            "agg_total": Sum("total"),
+            "agg_min": Min("minimum"),
+            "agg_max": Max("maximum"),
+        }
+    return (
+        rows.filter(**{f"{time_field}__gte": start, f"{time_field}__lt": end})
+        .values("plant_id", "metric", slot=F(time_field) / resolution * resolution)
+        .annotate(**aggregates)
+        .order_by()
+    )
+
+
+def watermark(resolution, lock=False):
+    marks = RollupWatermark.objects.filter(resolution=resolution)
+    if lock:
+        marks = marks.select_for_update()
+    return marks.values_list("bucket", flat=True).first()
+
+
+def rollup(resolution, now=None, batch_size=2000):
+    """
+    Recompute the ``resolution`` buckets from the watermark up to now and
+    upsert them. The watermark then moves to the start of the bucket that
+    was open TELEMETRY_LATE_SECONDS ago, so readings that arrive a little
+    late are still folded in on the next run. Ingest rejects anything older
+    than the minute watermark.
+    """
+    now = int(now if now is not None else time.time())
+    written = 0
+    batch = []
+
+    def flush():
+        SensorRollup.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=["plant", "resolution", "bucket", "metric"],
+            update_fields=UPDATE_FIELDS,
+        )
+        batch.clear()
+
+    with transaction.atomic():
+        # Held for the whole run, so concurrent runs and ingests queue up
+        # rather than moving the watermark backwards or past unseen rows
+        mark = (
+            RollupWatermark.objects.select_for_update()
+            .filter(resolution=resolution)
+            .first()
+        )
+        if mark is None:
+            rows, time_field = source_rows(resolution)
+            first = rows.order_by(time_field).values_list(time_field, flat=True).first()
+            if first is None:
+                return 0
+            mark, _ = RollupWatermark.objects.select_for_update().get_or_create(
+                resolution=resolution, defaults={"bucket": floor_to(first, resolution)}
+            )
+        start = mark.bucket
+
+        buckets = source_buckets(resolution, start, now + 1)
+        for row in buckets.iterator(chunk_size=batch_size):
+            batch.append(
+                SensorRollup(
+                    plant_id=row["plant_id"],
+                    metric=row["metric"],
+                    resolution=resolution,
+                    bucket=row["slot"],
+                    count=row["agg_count"],
+                    total=row["agg_total"],
+                    minimum=row["agg_min"],
+                    maximum=row["agg_max"],
+                )
+            )
+            written += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+
+        next_start = floor_to(now - settings.TELEMETRY_LATE_SECONDS, resolution)
+        mark.bucket = max(start, next_start)
+        mark.save(update_fields=["bucket"])
+    return written
+
+
+def rollup_all(now=None, batch_size=2000):
+    return {
+        resolution: rollup(resolution, now, batch_size)
+        for resolution in SensorRollup.RESOLUTIONS
+    }
+
+
+def apply_retention(now=None, batch_seconds=3600):
+    """
+    Drop raw readings and rollups past TELEMETRY_RETENTION_DAYS, but never
+    rows the next coarser rollup has yet to consume. Deletes walk the time
+    index ``batch_seconds`` at a time to keep each transaction short.
+    """
+    now = int(now if now is not None else time.time())
+    deleted = {}
+    for level, days in settings.TELEMETRY_RETENTION_DAYS.items():
+        if level == "raw":
+            rows, time_field = SensorReading.objects.all(), "ts"
+            consumer = CONSUMERS[None]
+        else:
+            rows, time_field = SensorRollup.objects.filter(resolution=level), "bucket"
+            consumer = CONSUMERS.get(level)
+        cutoff = now - days * 86400
+        if consumer is not None:
+            cutoff = min(cutoff, watermark(consumer) or 0)
+
+        oldest = rows.order_by(time_field).values_list(time_field, flat=True)
+        count = 0
+        while (first := oldest.first()) is not None and first < cutoff:
+            upper = min(first + batch_seconds, cutoff)
+            count += rows.filter(**{f"{time_field}__lt": upper}).delete()[0]
+        deleted[level] = count
+    return deleted
@@ -0,0 +1,105 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from plants.models import UserPlant
+
+from .models import Metric, RollupWatermark, SensorRollup
+from .rollups import rollup, rollup_all
+
+User = get_user_model()
+
+
+@override_settings(TELEMETRY_LATE_SECONDS=300, TELEMETRY_MAX_CLOCK_SKEW=300)
+class TelemetryTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            email="ada@example.com", username="ada", password=None
+        )
+        self.plant = UserPlant.objects.create(user=user, name="Fern")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.now = int(time.time())
+
+    def ingest(self, *readings):
+        response = self.client.post(
+            "/telemetry/readings/",
+            [{"plant": self.plant.id, **reading} for reading in readings],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 202)
+        return response.json()
+
+    def minute(self, ts):
+        return SensorRollup.objects.get(
+            resolution=SensorRollup.MINUTE,
+            bucket=ts - ts % 60,
+            metric=Metric.MOISTURE,
+        )
+
+    def test_rejects_invalid_readings_and_keeps_the_rest(self):
+        result = self.ingest(
+            {"ts": self.now, "moisture": 40, "light": 900},
+            {"ts": self.now + 3600, "moisture": 41},
+            {"ts": self.now, "moisture": "wet"},
+            {"ts": self.now},
+        )
+
+        self.assertEqual(result["accepted"], 2)
+        self.assertEqual(
+            [(r["index"], list(r["errors"])) for r in result["rejected"]],
+            [(1, ["ts"]), (2, ["moisture"]), (3, ["reading"])],
+        )
+
+    def test_rollups_compose_from_minutes_to_days(self):
+        ts = self.now - 3600
+        self.ingest(
+            {"ts": ts, "moisture": 10},
+            {"ts": ts + 1, "moisture": 30},
+            {"ts": ts + 120, "moisture": 50},
+        )
+
+        rollup_all(now=self.now)
+
+        bucket = self.minute(ts)
+        self.assertEqual(
+            (bucket.count, bucket.total, bucket.minimum, bucket.maximum),
+            (2, 40.0, 10.0, 30.0),
+        )
+        day = SensorRollup.objects.get(
+            resolution=SensorRollup.DAY, metric=Metric.MOISTURE
+        )
+        self.assertEqual((day.count, day.total, day.maximum), (3, 90.0, 50.0))
+
+    def test_late_reading_inside_the_window_is_rolled_up(self):
+        ts = self.now - 120
+        self.ingest({"ts": ts, "moisture": 10})
+        rollup(SensorRollup.MINUTE, now=self.now)
+
+        result = self.ingest({"ts": ts + 1, "moisture": 30})
+        rollup(SensorRollup.MINUTE, now=self.now)
+
+        self.assertEqual(result["accepted"], 1)
+        self.assertEqual(self.minute(ts).count, 2)
+
+    def test_reading_older_than_the_watermark_is_rejected(self):
+        self.ingest({"ts": self.now - 3600, "moisture": 10})
+        rollup(SensorRollup.MINUTE, now=self.now)
+
+        result = self.ingest({"ts": self.now - 1800, "moisture": 30})
+
+        self.assertEqual(result["accepted"], 0)
+        self.assertEqual(list(result["rejected"][0]["errors"]), ["ts"])
+
+    def test_stale_run_never_moves_the_watermark_back(self):
+        self.ingest({"ts": self.now - 3600, "moisture": 10})
+        rollup(SensorRollup.MINUTE, now=self.now)
+        mark = RollupWatermark.objects.get(resolution=SensorRollup.MINUTE).bucket
+
+        rollup(SensorRollup.MINUTE, now=self.now - 1800)
+
+        self.assertEqual(
+            RollupWatermark.objects.get(resolution=SensorRollup.MINUTE).bucket, mark
+        )
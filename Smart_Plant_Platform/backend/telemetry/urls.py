@@ -0,0 +1,12 @@
+from django.urls import path
+
+from .views import PlantSeriesView, ReadingIngestView
+
+urlpatterns = [
+    path("readings/", ReadingIngestView.as_view(), name="telemetry-readings"),
+    path(
+        "plants/<int:plant_id>/series/",
+        PlantSeriesView.as_view(),
+        name="telemetry-plant-series",
+    ),
+]
@@ -0,0 +1,69 @@
+import time
+
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from plants.models import UserPlant
+
+from .ingest import ingest_readings
+from .queries import plant_series
+
+
+class ReadingIngestView(APIView):
+    """Accepts a batch of sensor readings for the user's plants."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        readings = request.data
+        if isinstance(readings, dict):
+            readings = readings.get("readings")
+        if not isinstance(readings, list) or not readings:
+            return Response(
+                {"error": "Send a non-empty list of readings"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(readings) > settings.TELEMETRY_MAX_BATCH:
+            return Response(
+                {
+                    "error": f"At most {settings.TELEMETRY_MAX_BATCH} readings per request"
+                },
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+
+        accepted, rejected = ingest_readings(request.user, readings)
+        return Response(
+            {"accepted": accepted, "rejected": rejected},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class PlantSeriesView(APIView):
+    """
+    Sensor history for one plant between ``start`` and ``end`` (epoch
+    seconds, default the last day), at the finest resolution that fits in
+    ``points`` buckets.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, plant_id):
+        plant = get_object_or_404(UserPlant, id=plant_id, user=request.user)
+        try:
+            end = int(request.query_params.get("end", time.time()))
+            start = int(request.query_params.get("start", end - 86400))
+            points = int(request.query_params.get("points", 500))
+        except ValueError:
+            return Response(
+                {"error": "start, end and points must be integers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if start >= end or not 1 <= points <= 5000:
+            return Response(
+                {"error": "start must be before end and points 1-5000"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(plant_series(plant, start, end, points))
@@ -4,13 +4,14 @@ import { useEffect, useState } from 'react'
 import { Header } from '@/components/header'
 import { Button } from '@/components/ui/button'
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card'
-import store, { Order } from '@/utils/store'
+import store, { Order, nextCursor } from '@/utils/store'
 import { toast } from 'react-toastify'
 import { AxiosError } from 'axios'
 import { useRouter } from 'next/navigation'
 
 export default function OrdersPage() {
 	const [orders, setOrders] = useState<Order[]>([])
+	const [cursor, setCursor] = useState<string | null>(null)
 	const [loading, setLoading] = useState(true)
 	const router = useRouter()
 
@@ -18,10 +19,13 @@ export default function OrdersPage() {
 		fetchOrders()
 	}, [])
 
-	const fetchOrders = async () => {
+	const fetchOrders = async (more?: string) => {
 		try {
-			const response = await store.getOrders()
-			setOrders(response.data)
+			const response = await store.getOrders(more)
+			setOrders((current) =>
+				more ? [...current, ...response.data.results] : response.data.results
+			)
+			setCursor(nextCursor(response.data))
 		} catch (error: unknown) {
 			if (error instanceof AxiosError) {
 				toast.error(error.response?.data?.error || 'Failed to load orders')
@@ -133,6 +137,13 @@ export default function OrdersPage() {
 						</Card>
 					))}
 				</div>
+				{cursor && (
+					<div className="flex justify-center mt-8">
+						<Button variant="outline" onClick={() => fetchOrders(cursor)}>
+							Load more
+						</Button>
+					</div>
+				)}
 			</main>
 		</div>
 	)
@@ -17,7 +17,7 @@ import {
 	SelectTrigger,
 	SelectValue,
 } from '@/components/ui/select'
-import store, { Category, Product } from '@/utils/store'
+import store, { Category, Product, nextCursor } from '@/utils/store'
 import Image from 'next/image'
 import { toast } from 'react-toastify'
 import { AxiosError } from 'axios'
@@ -25,8 +25,30 @@ import { AxiosError } from 'axios'
 export default function ShopPage() {
 	const [categories, setCategories] = useState<Category[]>([])
 	const [products, setProducts] = useState<Product[]>([])
+	const [cursor, setCursor] = useState<string | null>(null)
 	const [selectedCategory, setSelectedCategory] = useState<string>('')
 	const [loading, setLoading] = useState(true)
+	// Live units left after other carts' holds; the catalog only says in stock
+	const [available, setAvailable] = useState<Record<number, number>>({})
+
+	// undefined while the count is unknown but the catalog says in stock
+	const stockOf = (product: Product): number | undefined =>
+		available[product.id] ?? (product.in_stock ? undefined : 0)
+	const isLow = (left: number | undefined) => left !== undefined && left < 5
+
+	const loadAvailability = async (ids: number[]) => {
+		if (!ids.length) return
+		try {
+			const response = await store.getAvailability(ids)
+			setAvailable((current) => {
+				const next = { ...current }
+				for (const row of response.data.results) next[row.id] = row.available
+				return next
+			})
+		} catch {
+			// Fall back to the catalog's in-stock flags
+		}
+	}
 
 	useEffect(() => {
 		const fetchData = async () => {
@@ -36,7 +58,9 @@ export default function ShopPage() {
 					store.getProducts(),
 				])
 				setCategories(categoriesData.data)
-				setProducts(productsData.data)
+				setProducts(productsData.data.results)
+				setCursor(nextCursor(productsData.data))
+				loadAvailability(productsData.data.results.map((p) => p.id))
 			} catch (error: unknown) {
 				if (error instanceof AxiosError) {
 					toast.error(error.response?.data?.error || 'Failed to load products')
@@ -57,7 +81,30 @@ export default function ShopPage() {
 			const response = await store.getProducts(
 				category === 'all' ? undefined : category
 			)
-			setProducts(response.data)
+			setProducts(response.data.results)
+			setCursor(nextCursor(response.data))
+			loadAvailability(response.data.results.map((p) => p.id))
+		} catch (error: unknown) {
+			if (error instanceof AxiosError) {
+				toast.error(error.response?.data?.error || 'Failed to load products')
+			} else {
+				toast.error('Failed to load products')
+			}
+		}
+	}
+
+	const handleLoadMore = async () => {
+		if (!cursor) return
+		try {
+			const response = await store.getProducts(
+				selectedCategory && selectedCategory !== 'all'
+					? selectedCategory
+					: undefined,
+				cursor
+			)
+			setProducts((current) => [...current, ...response.data.results])
+			setCursor(nextCursor(response.data))
+			loadAvailability(response.data.results.map((p) => p.id))
 		} catch (error: unknown) {
 			if (error instanceof AxiosError) {
 				toast.error(error.response?.data?.error || 'Failed to load products')
@@ -78,6 +125,7 @@ export default function ShopPage() {
 				toast.error('Failed to add to cart')
 			}
 		}
+		loadAvailability([productId])
 	}
 
 	if (loading) {
@@ -155,29 +203,31 @@ export default function ShopPage() {
 									</p>
 									<p
 										className={`text-sm ${
-											product.stock === 0
+											stockOf(product) === 0
 												? 'text-red-500'
-												: product.stock < 5
+												: isLow(stockOf(product))
 												? 'text-orange-500'
 												: 'text-gray-500'
 										}`}
 									>
-										{product.stock === 0
+										{stockOf(product) === 0
 											? 'Out of Stock'
-											: product.stock < 5
-											? `Only ${product.stock} left in stock`
-											: `${product.stock} in stock`}
+											: stockOf(product) === undefined
+											? 'In stock'
+											: isLow(stockOf(product))
+											? `Only ${stockOf(product)} left in stock`
+											: `${stockOf(product)} in stock`}
 									</p>
 								</CardContent>
 								<CardFooter>
 									<Button
 										className="w-full"
 										onClick={() => handleAddToCart(product.id)}
-										disabled={product.stock === 0}
+										disabled={stockOf(product) === 0}
 									>
-										{product.stock === 0
+										{stockOf(product) === 0
 											? 'Out of Stock'
-											: product.stock < 5
+											: isLow(stockOf(product))
 											? 'Add to Cart (Limited Stock)'
 											: 'Add to Cart'}
 									</Button>
@@ -186,6 +236,13 @@ export default function ShopPage() {
 						))}
 					</div>
 				)}
+				{cursor && (
+					<div className="flex justify-center mt-8">
+						<Button variant="outline" onClick={handleLoadMore}>
+							Load more
+						</Button>
+					</div>
+				)}
 			</main>
 		</div>
 	)
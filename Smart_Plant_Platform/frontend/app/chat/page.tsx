@@ -6,6 +6,7 @@ import { Input } from '@/components/ui/input'
 import { ScrollArea } from '@/components/ui/scroll-area'
 import { Send } from 'lucide-react'
 import axios from '@/utils/axios'
+import { Page, nextCursor } from '@/utils/store'
 import { toast } from 'react-toastify'
 import ReactMarkdown from 'react-markdown'
 import remarkGfm from 'remark-gfm'
@@ -33,10 +34,15 @@ interface Conversation {
 
 export default function ChatPage() {
 	const [conversations, setConversations] = useState<Conversation[]>([])
+	const [conversationCursor, setConversationCursor] = useState<
+		string | null
+	>(null)
 	const [activeConversationId, setActiveConversationId] = useState<
 		number | null
 	>(null)
 	const [messages, setMessages] = useState<Message[]>([])
+	// Id of the oldest message loaded, while older history remains
+	const [olderCursor, setOlderCursor] = useState<string | null>(null)
 	const [inputMessage, setInputMessage] = useState('')
 	const [isLoading, setIsLoading] = useState(false)
 	const [isBotTyping, setIsBotTyping] = useState(false)
@@ -46,16 +52,25 @@ export default function ChatPage() {
 		messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' })
 	}
 
+	// Follow new messages, but stay put when older history is prepended
+	const lastMessageId = messages[messages.length - 1]?.id
 	useEffect(() => {
 		scrollToBottom()
-	}, [messages])
+	}, [lastMessageId])
 
-	const loadConversations = async () => {
+	const loadConversations = async (more?: string) => {
 		try {
-			const response = await axios.get('/chat/conversations/')
-			setConversations(response.data)
-			if (response.data.length > 0 && !activeConversationId) {
-				setActiveConversationId(response.data[0].id)
+			const response = await axios.get<Page<Conversation>>(
+				'/chat/conversations/',
+				{ params: { cursor: more } }
+			)
+			const results = response.data.results
+			setConversations((current) =>
+				more ? [...current, ...results] : results
+			)
+			setConversationCursor(nextCursor(response.data))
+			if (results.length > 0 && !activeConversationId) {
+				setActiveConversationId(results[0].id)
 			}
 		} catch (error) {
 			console.error('Failed to load conversations:', error)
@@ -63,12 +78,17 @@ export default function ChatPage() {
 		}
 	}
 
-	const loadMessages = async (conversationId: number) => {
+	const loadMessages = async (conversationId: number, before?: string) => {
 		try {
-			const response = await axios.get(
-				`/chat/conversations/${conversationId}/messages/`
+			const response = await axios.get<Page<Message>>(
+				`/chat/conversations/${conversationId}/messages/`,
+				{ params: { before } }
+			)
+			const { results, previous } = response.data
+			setMessages((current) => (before ? [...results, ...current] : results))
+			setOlderCursor(
+				previous ? new URL(previous).searchParams.get('before') : null
 			)
-			setMessages(response.data)
 		} catch (error) {
 			console.error('Failed to load messages:', error)
 			toast.error('Failed to load messages')
@@ -137,7 +157,12 @@ export default function ChatPage() {
 					conversations={conversations}
 					activeConversationId={activeConversationId}
 					onConversationSelect={setActiveConversationId}
-					onConversationsUpdate={loadConversations}
+					onConversationsUpdate={() => loadConversations()}
+					onLoadMore={
+						conversationCursor
+							? () => loadConversations(conversationCursor)
+							: undefined
+					}
 				/>
 
 				<div className="flex-1 flex flex-col">
@@ -145,6 +170,19 @@ export default function ChatPage() {
 						<>
 							<ScrollArea className="flex-1 p-4">
 								<div className="space-y-4">
+									{olderCursor && (
+										<div className="flex justify-center">
+											<Button
+												variant="outline"
+												size="sm"
+												onClick={() =>
+													loadMessages(activeConversationId, olderCursor)
+												}
+											>
+												Load older messages
+											</Button>
+										</div>
+									)}
 									{messages.map((message) => (
 										<div
 											key={message.id}
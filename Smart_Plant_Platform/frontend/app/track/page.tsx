@@ -7,22 +7,26 @@ import { motion } from 'framer-motion'
 import { Button } from '@/components/ui/button'
 import { Plus } from 'lucide-react'
 import Link from 'next/link'
-import store, { UserPlant } from '@/utils/store'
+import store, { UserPlantSummary, nextCursor } from '@/utils/store'
 import { toast } from 'react-toastify'
 import { AxiosError } from 'axios'
 
 export default function TrackPage() {
-	const [plants, setPlants] = useState<UserPlant[]>([])
+	const [plants, setPlants] = useState<UserPlantSummary[]>([])
+	const [cursor, setCursor] = useState<string | null>(null)
 	const [loading, setLoading] = useState(true)
 
 	useEffect(() => {
 		fetchPlants()
 	}, [])
 
-	const fetchPlants = async () => {
+	const fetchPlants = async (more?: string) => {
 		try {
-			const response = await store.getUserPlants()
-			setPlants(response.data || [])
+			const response = await store.getUserPlants(more)
+			setPlants((current) =>
+				more ? [...current, ...response.data.results] : response.data.results
+			)
+			setCursor(nextCursor(response.data))
 		} catch (error: unknown) {
 			if (error instanceof AxiosError) {
 				toast.error(error.response?.data?.error || 'Failed to load plants')
@@ -113,6 +117,13 @@ export default function TrackPage() {
 						))}
 					</motion.div>
 				)}
+				{cursor && (
+					<div className="flex justify-center mt-8">
+						<Button variant="outline" onClick={() => fetchPlants(cursor)}>
+							Load more
+						</Button>
+					</div>
+				)}
 			</main>
 			<footer className="bg-green-600 text-white py-4 mt-16">
 				<div className="container mx-auto text-center">
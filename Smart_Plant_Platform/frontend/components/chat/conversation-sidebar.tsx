@@ -25,6 +25,8 @@ interface ConversationSidebarProps {
 	activeConversationId: number | null
 	onConversationSelect: (id: number) => void
 	onConversationsUpdate: () => void
+	// Set while there are older conversations to page in
+	onLoadMore?: () => void
 }
 
 export function ConversationSidebar({
@@ -32,6 +34,7 @@ export function ConversationSidebar({
 	activeConversationId,
 	onConversationSelect,
 	onConversationsUpdate,
+	onLoadMore,
 }: ConversationSidebarProps) {
 	const [isCreating, setIsCreating] = useState(false)
 	const [newTitle, setNewTitle] = useState('')
@@ -193,6 +196,11 @@ export function ConversationSidebar({
 							)}
 						</div>
 					))}
+					{onLoadMore && (
+						<Button variant="ghost" className="w-full" onClick={onLoadMore}>
+							Load more
+						</Button>
+					)}
 				</div>
 			</ScrollArea>
 		</div>
@@ -1,5 +1,15 @@
 import axios from '../utils/axios'
 
+// List endpoints return one keyset page at a time; follow `next` for more
+export interface Page<T> {
+	next: string | null
+	previous: string | null
+	results: T[]
+}
+
+export const nextCursor = (page: Page<unknown>) =>
+	page.next ? new URL(page.next).searchParams.get('cursor') : null
+
 export interface Category {
 	id: number
 	name: string
@@ -17,7 +27,8 @@ export interface Product {
 	category_name: string
 	description: string
 	price: number
-	stock: number
+	// Counts come from getAvailability; the cached catalog only has this
+	in_stock: boolean
 	image: string
 	is_active: boolean
 	created_at: string
@@ -32,10 +43,17 @@ export interface CartItem {
 	product_image: string
 	quantity: number
 	subtotal: number
+	// Stock is held for the line until then; null once the hold has lapsed
+	reserved_until: string | null
 	created_at: string
 	updated_at: string
 }
 
+export interface Availability {
+	id: number
+	available: number
+}
+
 export interface Cart {
 	id: number
 	items: CartItem[]
@@ -104,15 +122,35 @@ export interface UserPlant {
 	growth_records: GrowthRecord[]
 }
 
+export interface UserPlantSummary {
+	id: number
+	name: string
+	description: string
+	image: string | null
+	created_at: string
+	updated_at: string
+	notes_count: number
+	care_routines_count: number
+	growth_records_count: number
+	latest_growth_record: GrowthRecord | null
+	next_due_task: CareRoutine | null
+}
+
 const store = {
 	// Categories
 	getCategories: () => axios.get<Category[]>('/store/categories/'),
 	getCategory: (id: number) => axios.get<Category>(`/store/categories/${id}/`),
 
 	// Products
-	getProducts: (category?: string) =>
-		axios.get<Product[]>('/store/products/', { params: { category } }),
+	getProducts: (category?: string, cursor?: string) =>
+		axios.get<Page<Product>>('/store/products/', {
+			params: { category, cursor },
+		}),
 	getProduct: (slug: string) => axios.get<Product>(`/store/products/${slug}/`),
+	getAvailability: (ids: number[]) =>
+		axios.get<{ results: Availability[] }>('/store/products/availability/', {
+			params: { ids: ids.join(',') },
+		}),
 
 	// Cart
 	getCart: () => axios.get<Cart[]>('/store/cart/'),
@@ -130,13 +168,15 @@ const store = {
 		}),
 
 	// Orders
-	getOrders: () => axios.get<Order[]>('/store/orders/'),
+	getOrders: (cursor?: string) =>
+		axios.get<Page<Order>>('/store/orders/', { params: { cursor } }),
 	getOrder: (id: number) => axios.get<Order>(`/store/orders/${id}/`),
 	createOrder: (shippingAddress: string) =>
 		axios.post<Order>('/store/orders/', { shipping_address: shippingAddress }),
 
 	// Plant tracking functions
-	getUserPlants: () => axios.get<UserPlant[]>('/plants/'),
+	getUserPlants: (cursor?: string) =>
+		axios.get<Page<UserPlantSummary>>('/plants/', { params: { cursor } }),
 	getUserPlant: (id: number) => axios.get<UserPlant>(`/plants/${id}/`),
 	createUserPlant: (data: FormData) =>
 		axios.post<UserPlant>('/plants/', data, {